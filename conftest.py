@@ -1,26 +1,436 @@
 """
 Configuration and fixtures for Petstore API tests
 """
+import argparse
+import os
+import random
+import threading
+
 import pytest
-import requests
 
 
 # Base API URL
 API_BASE_URL = "https://petstore.swagger.io/v2"
 
+# --base-url values dispatching to the app in the test process
+IN_PROCESS_APPS = ("wsgi", "asgi")
+
+# requests.jsonl at the repository root is the team backlog, not a cassette
+DEFAULT_CASSETTE = os.path.join("cassettes", "petstore.jsonl")
+
+DEFAULT_PERF_BASELINE = os.path.join("baselines", "petstore.json")
+
+CLIENT_KEY = pytest.StashKey()
+TEARDOWN_KEY = pytest.StashKey()
+METRICS_KEY = pytest.StashKey()
+POOLS_KEY = pytest.StashKey()
+POOL_DEMAND_KEY = pytest.StashKey()
+DURATIONS_KEY = pytest.StashKey()
+PERF_KEY = pytest.StashKey()
+MEMORY_KEY = pytest.StashKey()
+
+# pyd_test.py is a pydantic demo script that builds a model and prints at import,
+# not a test module, but it matches pytest's *_test.py pattern
+collect_ignore = ["pyd_test.py"]
+
+# Exclusive pooled fixtures per resource kind, counted at collection to size the pools
+POOLED_FIXTURES = {"fresh_pet": "pet", "fresh_order": "order", "fresh_user": "user"}
+
+
+def _timeout_option(value):
+    if value in ("adaptive", "none"):
+        return value
+    try:
+        return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected seconds, 'adaptive' or 'none', got {value!r}")
+
+
+def _size_option(value):
+    from petstore.memory import parse_size
+
+    try:
+        return parse_size(value)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--base-url",
+        default=os.environ.get("PETSTORE_BASE_URL", "local"),
+        help=(
+            "Petstore API base URL, 'local' to start a server on localhost, or 'wsgi'/'asgi' "
+            "to call the app in-process without sockets "
+            f"(default: $PETSTORE_BASE_URL or 'local'; public API: {API_BASE_URL})"
+        ),
+    )
+    parser.addoption(
+        "--seed", type=int, default=None,
+        help="Seed for payload randomness and ID offsets (default: random, shown in the header)",
+    )
+    parser.addoption(
+        "--cassette-mode", choices=("off", "record", "replay"), default="off",
+        help="Record all traffic to the cassette or replay it without network (default: off)",
+    )
+    parser.addoption(
+        "--cassette", default=DEFAULT_CASSETTE,
+        help=f"Cassette file for --cassette-mode (default: {DEFAULT_CASSETTE})",
+    )
+    parser.addoption(
+        "--defer-teardown", action="store_true",
+        help="Queue cleanup deletions and drain them once at session end",
+    )
+    parser.addoption(
+        "--petstore-metrics", metavar="PATH", default=None,
+        help="Write per-endpoint latency histograms and percentiles to a JSON file",
+    )
+    parser.addoption(
+        "--pool-connections", type=int, default=4,
+        help="Number of per-host connection pools kept by the client (default: 4)",
+    )
+    parser.addoption(
+        "--pool-maxsize", type=int, default=16,
+        help="Keep-alive connections kept per host pool (default: 16)",
+    )
+    parser.addoption(
+        "--request-timeout", type=_timeout_option, default="adaptive", metavar="SECONDS|adaptive|none",
+        help="Read timeout per request, 'adaptive' derives it from each endpoint's p99 (default: adaptive)",
+    )
+    parser.addoption(
+        "--hedge", type=float, nargs="?", const=95.0, default=None, metavar="PERCENTILE",
+        help="Send a duplicate of GETs slower than this percentile of their endpoint (default: off, bare flag: 95)",
+    )
+    parser.addoption(
+        "--response-cache", type=float, default=None, metavar="TTL",
+        help="Cache GET responses in the client for TTL seconds, invalidated by writes (default: off)",
+    )
+    parser.addoption(
+        "--response-cache-size", type=int, default=1024,
+        help="Maximum cached GET responses, least recently used are evicted first (default: 1024)",
+    )
+    parser.addoption(
+        "--accept-encoding", default="gzip, deflate",
+        help="Accept-Encoding sent with every request, 'identity' for uncompressed responses (default: gzip, deflate)",
+    )
+    parser.addoption(
+        "--compress-requests", type=int, nargs="?", const=1024, default=None, metavar="BYTES",
+        help="gzip request bodies of at least BYTES (default: off, bare flag: 1024)",
+    )
+    parser.addoption(
+        "--perf", action="store_true",
+        help="Run the endpoint benchmarks marked perf and check their SLOs and baselines",
+    )
+    parser.addoption(
+        "--perf-baseline", default=DEFAULT_PERF_BASELINE,
+        help=f"Baseline file the benchmarks are compared with (default: {DEFAULT_PERF_BASELINE})",
+    )
+    parser.addoption(
+        "--perf-update", action="store_true",
+        help="Store this run's benchmarks as the new baselines instead of comparing",
+    )
+    parser.addoption(
+        "--perf-tolerance", type=float, default=0.25,
+        help="Relative slowdown tolerated before a statistic counts as a regression (default: 0.25)",
+    )
+    parser.addoption(
+        "--memory", action="store_true",
+        help="Track each test's allocations with tracemalloc and report peak, net and allocation sites",
+    )
+    parser.addoption(
+        "--memory-budget", type=_size_option, default=None, metavar="SIZE",
+        help="Fail tests whose peak allocation exceeds SIZE, e.g. 64MiB, implies --memory (default: off)",
+    )
+    parser.addoption(
+        "--memory-top", type=int, default=5,
+        help="Allocation sites reported per test with --memory (default: 5)",
+    )
+    parser.addoption(
+        "--schedule", choices=("auto", "lpt", "off"), default="auto",
+        help=(
+            "Run tests longest first using durations stored by earlier runs, "
+            "'auto' does so only under xdist (default: auto)"
+        ),
+    )
+
+
+def pytest_configure(config):
+    from petstore import ids
+
+    config.addinivalue_line("markers", "perf: endpoint benchmark, run only with --perf")
+    config.addinivalue_line("markers", "slo(*slos): thresholds such as 'p99<200ms' checked by the perf fixture")
+    if config.getoption("--perf"):
+        from petstore.perf import Baselines, PerfSession
+
+        config.stash[PERF_KEY] = PerfSession(
+            Baselines(config.getoption("--perf-baseline")),
+            update=config.getoption("--perf-update"),
+            tolerance=config.getoption("--perf-tolerance"),
+        )
+    config.addinivalue_line("markers", "memory_budget(size): peak allocation allowed with --memory, e.g. '64MiB'")
+    numprocesses = getattr(config.option, "numprocesses", None)
+    if not hasattr(config, "workerinput") and (getattr(config, "cache", None) is not None or numprocesses):
+        # Durations are stored for --schedule and summarized under xdist, the controller sees every report
+        from petstore.schedule import DurationRecorder
+
+        config.stash[DURATIONS_KEY] = DurationRecorder()
+        config.pluginmanager.register(config.stash[DURATIONS_KEY], "petstore-durations")
+    if config.getoption("--memory") or config.getoption("--memory-budget") is not None:
+        from petstore.memory import MemoryProfiler
+
+        profiler = MemoryProfiler(
+            top=config.getoption("--memory-top"),
+            budget=config.getoption("--memory-budget"),
+            # The xdist controller runs no tests, it collects the workers' reports
+            trace=hasattr(config, "workerinput") or not getattr(config.option, "numprocesses", None),
+        )
+        profiler.start()
+        config.stash[MEMORY_KEY] = profiler
+        config.pluginmanager.register(profiler, "petstore-memory")
+
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:
+        # xdist worker: share the controller's seed, own a slice of every ID range
+        config.petstore_seed = workerinput["petstore_seed"]
+        worker_index = int(workerinput["workerid"].lstrip("gw"))
+        worker_count = workerinput["workercount"]
+    else:
+        seed = config.getoption("--seed")
+        cassette_mode = config.getoption("--cassette-mode")
+        if cassette_mode != "off" and getattr(config.option, "numprocesses", None):
+            raise pytest.UsageError("--cassette-mode needs a single process, IDs differ per xdist worker")
+        if cassette_mode == "record" and config.getoption("--base-url") in IN_PROCESS_APPS:
+            raise pytest.UsageError("--cassette-mode=record needs a server, use --base-url=local")
+        if cassette_mode != "off" and config.getoption("--hedge") is not None:
+            raise pytest.UsageError("--hedge sends duplicate requests, which cassettes cannot record or replay")
+        if seed is None and cassette_mode == "replay":
+            # Replay the IDs and usernames the cassette was recorded with
+            from petstore.cassette import read_meta
+
+            seed = read_meta(config.getoption("--cassette"))["seed"]
+        config.petstore_seed = seed if seed is not None else random.randrange(2 ** 32)
+        worker_index, worker_count = 0, 1
+    ids.configure(worker_index, worker_count, config.petstore_seed)
+
+    if workerinput is not None or not getattr(config.option, "numprocesses", None):
+        # Build pydantic validators while tests are collected, the xdist controller runs none
+        threading.Thread(target=_warm_models, name="petstore-models-warm", daemon=True).start()
+
+
+def _metrics(config):
+    """Return the run's endpoint metrics, created on first use so runs without requests skip importing requests"""
+    metrics = config.stash.get(METRICS_KEY, None)
+    if metrics is None:
+        from petstore.metrics import Metrics
+
+        metrics = config.stash[METRICS_KEY] = Metrics()
+    return metrics
+
+
+def _warm_models():
+    from petstore.models import REGISTRY
+
+    REGISTRY.warm()
+
+
+def pytest_unconfigure(config):
+    profiler = config.stash.get(MEMORY_KEY, None)
+    if profiler is not None:
+        profiler.stop()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """Hand the run seed to each xdist worker"""
+    node.workerinput["petstore_seed"] = node.config.petstore_seed
+
+
+def pytest_collection_modifyitems(config, items):
+    demand = dict.fromkeys(POOLED_FIXTURES.values(), 0)
+    skip_perf = None if config.getoption("--perf") else pytest.mark.skip(reason="benchmark, run with --perf")
+    for item in items:
+        if skip_perf is not None and item.get_closest_marker("perf"):
+            item.add_marker(skip_perf)
+        for fixture_name in getattr(item, "fixturenames", ()):
+            kind = POOLED_FIXTURES.get(fixture_name)
+            if kind is not None:
+                demand[kind] += 1
+    config.stash[POOL_DEMAND_KEY] = demand
+
+    schedule = config.getoption("--schedule")
+    if schedule == "off" or (schedule == "auto" and not hasattr(config, "workerinput")):
+        return
+    from petstore.schedule import DURATIONS_CACHE_KEY, lpt_order
+
+    cache = getattr(config, "cache", None)
+    durations = cache.get(DURATIONS_CACHE_KEY, {}) if cache is not None else {}
+    if durations:
+        # Every xdist worker reads the same stored durations, so all collect the same order
+        by_nodeid = {item.nodeid: item for item in items}
+        items[:] = [by_nodeid[nodeid] for nodeid in lpt_order(by_nodeid, durations)]
+
+
+def pytest_runtest_setup(item):
+    # Seed per test so results do not depend on ordering or worker placement
+    random.seed(f"{item.config.petstore_seed}:{item.nodeid}")
+
+
+def pytest_report_header(config):
+    return f"petstore: base-url={config.getoption('--base-url')}, seed={config.petstore_seed}"
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge the latency histograms collected by an xdist worker"""
+    worker_metrics = getattr(node, "workeroutput", {}).get("petstore_metrics")
+    if worker_metrics:
+        _metrics(node.config).merge(worker_metrics)
+    worker_perf = getattr(node, "workeroutput", {}).get("petstore_perf")
+    if worker_perf:
+        node.config.stash[PERF_KEY].add(worker_perf)
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    metrics = config.stash.get(METRICS_KEY, None)
+    perf = config.stash.get(PERF_KEY, None)
+    if hasattr(config, "workeroutput"):
+        if metrics is not None:
+            config.workeroutput["petstore_metrics"] = metrics.to_dict()
+        if perf is not None:
+            config.workeroutput["petstore_perf"] = perf.to_dict()
+        return
+    if perf is not None:
+        perf.finish()
+    metrics_path = config.getoption("--petstore-metrics")
+    if metrics_path:
+        _metrics(config).write_json(metrics_path)
+    cache = getattr(config, "cache", None)
+    recorder = config.stash.get(DURATIONS_KEY, None)
+    measured = recorder.durations if recorder is not None else None
+    if cache is not None and measured:
+        from petstore.schedule import DURATIONS_CACHE_KEY, merge_durations
+
+        cache.set(DURATIONS_CACHE_KEY, merge_durations(cache.get(DURATIONS_CACHE_KEY, {}), measured))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix, session):
+    metrics = session.config.stash.get(METRICS_KEY, None)
+    if metrics is not None and metrics.endpoints():
+        postfix.append(metrics.to_html())
+    profiler = session.config.stash.get(MEMORY_KEY, None)
+    if profiler is not None and profiler.usage:
+        postfix.append(profiler.to_html())
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    metrics = config.stash.get(METRICS_KEY, None)
+    if metrics is not None and metrics.endpoints():
+        terminalreporter.write_sep("-", "petstore endpoint latency")
+        for line in metrics.format_table():
+            terminalreporter.write_line(line)
+    perf = config.stash.get(PERF_KEY, None)
+    if perf is not None and perf.results:
+        from petstore.perf import format_table
+
+        action = "saved as baselines to" if perf.update else "compared with"
+        terminalreporter.write_sep("-", f"petstore benchmarks ({action} {perf.baselines.path})")
+        for line in format_table(result for _, result in sorted(perf.results.items())):
+            terminalreporter.write_line(line)
+    profiler = config.stash.get(MEMORY_KEY, None)
+    if profiler is not None and profiler.usage:
+        over_budget = profiler.over_budget()
+        budget = f", {len(over_budget)} over budget" if profiler.budget is not None or over_budget else ""
+        terminalreporter.write_sep("-", f"petstore memory (highest peak of {len(profiler.usage)} tests{budget})")
+        for line in profiler.format_table():
+            terminalreporter.write_line(line)
+    recorder = config.stash.get(DURATIONS_KEY, None)
+    workers = getattr(config.option, "numprocesses", None) or 1
+    if recorder is not None and recorder.durations and workers > 1 and not hasattr(config, "workerinput"):
+        from petstore.schedule import summary as schedule_summary
+
+        schedule = schedule_summary(recorder.durations.values(), workers)
+        terminalreporter.write_sep("-", "petstore schedule")
+        terminalreporter.write_line(
+            f"{schedule['tests']} tests, {schedule['work']:.2f}s of work on {workers} workers: "
+            f"longest-first makespan {schedule['makespan']:.2f}s, lower bound {schedule['bound']:.2f}s"
+        )
+    if metrics is not None and metrics.transfer():
+        terminalreporter.write_sep("-", "petstore transfer (bodies before and after content coding)")
+        for line in metrics.format_transfer_table():
+            terminalreporter.write_line(line)
+    client = config.stash.get(CLIENT_KEY, None)
+    if client is None:
+        return
+    stats = client.connection_stats()
+    terminalreporter.write_sep("-", "petstore client")
+    if stats["requests"]:
+        terminalreporter.write_line(
+            f"{stats['requests']} requests over {stats['connections']} connections "
+            f"({stats['reuse_ratio']:.0%} reused)"
+        )
+    if client.cache is not None:
+        cache_stats = client.cache.stats()
+        terminalreporter.write_line(
+            f"response cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+            f"{cache_stats['coalesced']} coalesced, {cache_stats['invalidations']} invalidated "
+            f"({cache_stats['hit_ratio']:.0%} served without a request)"
+        )
+    pools = config.stash.get(POOLS_KEY, {})
+    if pools:
+        terminalreporter.write_line("pools: " + ", ".join(
+            f"{kind} {summary['created']} created ({summary['checked_out']} checked out, "
+            f"{summary['shared_uses']} shared uses)"
+            for kind, summary in ((kind, pool.summary()) for kind, pool in sorted(pools.items()))
+        ))
+    if client.hedge is not None:
+        hedge_stats = client.hedge.stats()
+        terminalreporter.write_line(
+            f"hedging: {hedge_stats['hedged']} of {hedge_stats['requests']} GETs hedged "
+            f"({hedge_stats['hedge_ratio']:.1%}), backup won {hedge_stats['won']}"
+        )
+    teardown = config.stash.get(TEARDOWN_KEY, None)
+    if teardown is not None:
+        summary = teardown.summary()
+        terminalreporter.write_line(
+            f"teardown: {summary['deleted']} deleted, {summary['missing']} already gone, "
+            f"{summary['failed']} failed"
+        )
+        for path, reason in teardown.failures:
+            terminalreporter.write_line(f"  leaked {path}: {reason}", yellow=True)
+
 
 @pytest.fixture(scope="session")
-def base_url():
+def base_url(request):
     """Base URL for all API requests"""
-    return API_BASE_URL
+    url = request.config.getoption("--base-url")
+    if url == "local" and request.config.getoption("--cassette-mode") == "replay":
+        # Replay never touches the network, only the path is matched
+        yield "http://cassette.invalid/v2"
+        return
+    if url in IN_PROCESS_APPS:
+        from petstore.inprocess import INPROCESS_URL
+
+        yield INPROCESS_URL
+        return
+    if url != "local":
+        yield url.rstrip("/")
+        return
+
+    from petstore.server import PetstoreServer
+
+    with PetstoreServer() as server:
+        yield server.url
 
 
 @pytest.fixture(scope="function")
-def headers():
+def headers(request):
     """Base headers for HTTP requests"""
     return {
         "Content-Type": "application/json",
-        "Accept": "application/json"
+        "Accept": "application/json",
+        "Accept-Encoding": request.config.getoption("--accept-encoding"),
     }
 
 
@@ -32,51 +442,218 @@ def api_key_headers(headers):
     return headers_with_key
 
 
+@pytest.fixture(scope="session")
+def client(request, base_url):
+    """Pooled Petstore client shared by the whole session (one per xdist worker)"""
+    from petstore.client import PetstoreClient
+
+    config = request.config
+    client_options = {}
+    cassette_mode = config.getoption("--cassette-mode")
+    if cassette_mode != "off":
+        from petstore.cassette import Cassette, CassetteAdapter, CassetteRecorder
+
+        cassette_path = config.getoption("--cassette")
+        if cassette_mode == "record":
+            os.makedirs(os.path.dirname(cassette_path) or ".", exist_ok=True)
+            client_options["recorder"] = CassetteRecorder(
+                cassette_path, seed=config.petstore_seed, base_url=base_url
+            )
+        else:
+            client_options["cassette"] = Cassette(cassette_path)
+        client_options["adapter_class"] = CassetteAdapter
+    elif config.getoption("--base-url") in IN_PROCESS_APPS:
+        from petstore.inprocess import ASGIApp, InProcessAdapter, WSGIApp
+
+        client_options["adapter_class"] = InProcessAdapter
+        client_options["app"] = ASGIApp() if config.getoption("--base-url") == "asgi" else WSGIApp()
+    request_timeout = config.getoption("--request-timeout")
+    if request_timeout == "adaptive":
+        from petstore.tail import AdaptiveTimeout
+
+        client_options["timeout"] = AdaptiveTimeout()
+    elif request_timeout != "none":
+        client_options["timeout"] = request_timeout
+    hedge_percentile = config.getoption("--hedge")
+    if hedge_percentile is not None:
+        from petstore.tail import EndpointLatency, Hedge
+
+        latency = getattr(client_options.get("timeout"), "latency", None) or EndpointLatency()
+        client_options["hedge"] = Hedge(latency, percentile=hedge_percentile)
+    cache_ttl = config.getoption("--response-cache")
+    if cache_ttl is not None:
+        from petstore.cache import ResponseCache
+
+        client_options["cache"] = ResponseCache(ttl=cache_ttl, maxsize=config.getoption("--response-cache-size"))
+    petstore_client = PetstoreClient(
+        base_url,
+        accept_encoding=config.getoption("--accept-encoding"),
+        compress_min_size=config.getoption("--compress-requests"),
+        pool_connections=config.getoption("--pool-connections"),
+        pool_maxsize=config.getoption("--pool-maxsize"),
+        metrics=_metrics(config),
+        **client_options,
+    )
+    config.stash[CLIENT_KEY] = petstore_client
+    yield petstore_client
+    petstore_client.close()
+    if petstore_client.hedge is not None:
+        petstore_client.hedge.close()
+
+
+@pytest.fixture(scope="session")
+def async_client(client):
+    """Async front end over the shared client for concurrent fan-out"""
+    from petstore.aio import AsyncPetstoreClient
+
+    with AsyncPetstoreClient(client, concurrency=client.pool_maxsize) as petstore_async_client:
+        yield petstore_async_client
+
+
+@pytest.fixture(scope="session")
+def teardown_queue(request, async_client):
+    """Session-wide queue of deletions, drained concurrently"""
+    from petstore.teardown import TeardownQueue
+
+    queue = TeardownQueue(async_client)
+    request.config.stash[TEARDOWN_KEY] = queue
+    yield queue
+    queue.drain()
+
+
+def _resource_pool(request, async_client, kind):
+    from petstore.pools import ResourcePool
+
+    demand = request.config.stash.get(POOL_DEMAND_KEY, {}).get(kind)
+    pool = ResourcePool(async_client, kind, demand=demand)
+    request.config.stash.setdefault(POOLS_KEY, {})[kind] = pool
+    return pool
+
+
+@pytest.fixture(scope="session")
+def pet_pool(request, async_client, teardown_queue):
+    """Session pool of pets, deleted together at session end"""
+    pool = _resource_pool(request, async_client, "pet")
+    yield pool
+    teardown_queue.extend(pool.paths())
+
+
+@pytest.fixture(scope="session")
+def order_pool(request, async_client, teardown_queue):
+    """Session pool of orders, deleted together at session end"""
+    pool = _resource_pool(request, async_client, "order")
+    yield pool
+    teardown_queue.extend(pool.paths())
+
+
+@pytest.fixture(scope="session")
+def user_pool(request, async_client, teardown_queue):
+    """Session pool of users, deleted together at session end"""
+    pool = _resource_pool(request, async_client, "user")
+    yield pool
+    teardown_queue.extend(pool.paths())
+
+
+@pytest.fixture(scope="function")
+def fresh_pet(pet_pool):
+    """Existing pet owned by this test, it may be updated or deleted"""
+    return pet_pool.checkout()
+
+
+@pytest.fixture(scope="function")
+def shared_pet(pet_pool):
+    """Existing pet shared between tests, read-only"""
+    return pet_pool.shared()
+
+
+@pytest.fixture(scope="function")
+def fresh_order(order_pool):
+    """Existing order owned by this test, it may be deleted"""
+    return order_pool.checkout()
+
+
+@pytest.fixture(scope="function")
+def shared_order(order_pool):
+    """Existing order shared between tests, read-only"""
+    return order_pool.shared()
+
+
+@pytest.fixture(scope="function")
+def fresh_user(user_pool):
+    """Existing user owned by this test, it may be updated or deleted"""
+    return user_pool.checkout()
+
+
 @pytest.fixture(scope="function")
-def session():
+def shared_user(user_pool):
+    """Existing user shared between tests, read-only"""
+    return user_pool.shared()
+
+
+@pytest.fixture(scope="function")
+def perf(request, client):
+    """Benchmark an endpoint against the test's slo markers and the stored baseline
+
+    perf("get_inventory") runs the load generator's endpoint of that name and
+    raises PerfRegression when an SLO is missed or the baseline regressed.
+    Write benchmarks pass a cleanup fixture's list, perf("create_pet", cleanup=cleanup_pets),
+    to have the ID, or another field, of everything they created deleted after the test.
+    """
+    from petstore.load import ENDPOINTS
+    from petstore.perf import SLO, RecordingCall
+
+    perf_session = request.config.stash[PERF_KEY]
+    slos = [SLO.parse(text) for marker in request.node.iter_markers("slo") for text in marker.args]
+
+    def run(name, cleanup=None, field="id", call=None, **kwargs):
+        if cleanup is None:
+            return perf_session.run(client, name, slos, call, **kwargs)
+        call = RecordingCall(ENDPOINTS[name] if call is None else call)
+        try:
+            return perf_session.run(client, name, slos, call, **kwargs)
+        finally:
+            cleanup.extend(call.created(field))
+
+    return run
+
+
+@pytest.fixture(scope="session")
+def session(client):
     """HTTP session for connection reuse"""
-    session = requests.Session()
-    yield session
-    session.close()
+    return client.session
 
 
 @pytest.fixture(scope="function")
-def cleanup_pets():
+def cleanup_pets(request, teardown_queue):
     """Fixture for cleaning up created pets after tests"""
     created_pet_ids = []
     yield created_pet_ids
     
     # Cleanup after test
-    for pet_id in created_pet_ids:
-        try:
-            requests.delete(f"{API_BASE_URL}/pet/{pet_id}")
-        except Exception:
-            pass
+    teardown_queue.extend(f"/pet/{pet_id}" for pet_id in created_pet_ids)
+    if not request.config.getoption("--defer-teardown"):
+        teardown_queue.drain()
 
 
 @pytest.fixture(scope="function")
-def cleanup_orders():
+def cleanup_orders(request, teardown_queue):
     """Fixture for cleaning up created orders after tests"""
     created_order_ids = []
     yield created_order_ids
     
     # Cleanup after test
-    for order_id in created_order_ids:
-        try:
-            requests.delete(f"{API_BASE_URL}/store/order/{order_id}")
-        except Exception:
-            pass
+    teardown_queue.extend(f"/store/order/{order_id}" for order_id in created_order_ids)
+    if not request.config.getoption("--defer-teardown"):
+        teardown_queue.drain()
 
 
 @pytest.fixture(scope="function")
-def cleanup_users():
+def cleanup_users(request, teardown_queue):
     """Fixture for cleaning up created users after tests"""
     created_usernames = []
     yield created_usernames
     
     # Cleanup after test
-    for username in created_usernames:
-        try:
-            requests.delete(f"{API_BASE_URL}/user/{username}")
-        except Exception:
-            pass
+    teardown_queue.extend(f"/user/{username}" for username in created_usernames)
+    if not request.config.getoption("--defer-teardown"):
+        teardown_queue.drain()
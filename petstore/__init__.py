@@ -0,0 +1,31 @@
+"""
+Support code for the Petstore API test suites
+
+The main classes are importable from the package but their modules, and with
+them requests, asyncio and pydantic, are only imported on first use.
+"""
+import importlib
+
+
+_LAZY_ATTRIBUTES = {
+    "AsyncPetstoreClient": "petstore.aio",
+    "PetstoreApp": "petstore.app",
+    "PetstoreClient": "petstore.client",
+    "PetstoreServer": "petstore.server",
+    "ResponseCache": "petstore.cache",
+}
+
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -0,0 +1,144 @@
+"""
+Asyncio front end for the Petstore client
+Fans independent calls out over one event loop with bounded concurrency
+
+requests is blocking, so each call runs on a dedicated executor sized to the
+concurrency limit while sharing the wrapped client's keep-alive pool.
+"""
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+
+DEFAULT_CONCURRENCY = 16
+
+
+class AsyncPetstoreClient:
+    """Async counterpart of PetstoreClient"""
+
+    def __init__(self, client, concurrency=DEFAULT_CONCURRENCY):
+        self.client = client
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="petstore-aio")
+        # Semaphores are bound to an event loop, keep one per running loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    async def call(self, function, *args, **kwargs):
+        """Run a blocking function on the executor under the concurrency limit"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    async def request(self, method, path, **kwargs):
+        """Send a request without blocking the event loop"""
+        return await self.call(self.client.request, method, path, **kwargs)
+
+    async def get(self, path, **kwargs):
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path, **kwargs):
+        return await self.request("POST", path, **kwargs)
+
+    async def put(self, path, **kwargs):
+        return await self.request("PUT", path, **kwargs)
+
+    async def delete(self, path, **kwargs):
+        return await self.request("DELETE", path, **kwargs)
+
+    async def gather(self, calls, return_exceptions=False):
+        """Await coroutines concurrently and return results in order"""
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+    async def map(self, method, paths, return_exceptions=False, **kwargs):
+        """Send the same kind of request to many paths concurrently"""
+        return await self.gather(
+            [self.request(method, path, **kwargs) for path in paths],
+            return_exceptions=return_exceptions,
+        )
+
+    # Pets
+
+    async def create_pet(self, pet, **kwargs):
+        return await self.post("/pet", json=pet, **kwargs)
+
+    async def get_pet(self, pet_id, **kwargs):
+        return await self.get(f"/pet/{pet_id}", **kwargs)
+
+    async def delete_pet(self, pet_id, **kwargs):
+        return await self.delete(f"/pet/{pet_id}", **kwargs)
+
+    async def upload_image(self, pet_id, path, additional_metadata=None, **kwargs):
+        from petstore.upload import upload_image
+
+        return await self.call(upload_image, self.client, pet_id, path, additional_metadata, **kwargs)
+
+    # Orders
+
+    async def place_order(self, order, **kwargs):
+        return await self.post("/store/order", json=order, **kwargs)
+
+    async def get_order(self, order_id, **kwargs):
+        return await self.get(f"/store/order/{order_id}", **kwargs)
+
+    async def delete_order(self, order_id, **kwargs):
+        return await self.delete(f"/store/order/{order_id}", **kwargs)
+
+    # Users
+
+    async def create_user(self, user, **kwargs):
+        return await self.post("/user", json=user, **kwargs)
+
+    async def create_users_with_list(self, users, **kwargs):
+        return await self.post("/user/createWithList", json=users, **kwargs)
+
+    async def get_user(self, username, **kwargs):
+        return await self.get(f"/user/{username}", **kwargs)
+
+    async def delete_user(self, username, **kwargs):
+        return await self.delete(f"/user/{username}", **kwargs)
+
+    async def login(self, username, password, **kwargs):
+        return await self.get("/user/login", params={"username": username, "password": password}, **kwargs)
+
+    def run(self, coroutine):
+        """Run a coroutine to completion from synchronous code"""
+        return asyncio.run(coroutine)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+async def bounded(limit, calls, handle):
+    """Await (key, coroutine) pairs with at most limit pending, passing each result to handle
+
+    New coroutines are only created once a slot is free, so a lazy iterable of
+    calls is consumed at the rate the server accepts them.
+    """
+    pending = {}
+    for key, coroutine in calls:
+        if len(pending) >= limit:
+            await _collect(pending, handle, asyncio.FIRST_COMPLETED)
+        pending[asyncio.ensure_future(coroutine)] = key
+    if pending:
+        await _collect(pending, handle, asyncio.ALL_COMPLETED)
+
+
+async def _collect(pending, handle, return_when):
+    done, _ = await asyncio.wait(pending, return_when=return_when)
+    for task in done:
+        key = pending.pop(task)
+        try:
+            result = task.result()
+        except Exception as error:
+            result = error
+        handle(key, result)
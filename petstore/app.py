@@ -0,0 +1,319 @@
+"""
+Petstore v2 request handling independent of the HTTP server
+Mirrors the behaviour of https://petstore.swagger.io/v2 closely enough for the test suites
+"""
+import json
+import re
+import time
+import zlib
+from urllib.parse import parse_qs, unquote
+
+from petstore.compression import DEFAULT_MIN_SIZE, UnsupportedEncoding, compress, decompress, negotiate
+from petstore.storage import PetstoreStorage, encode_json
+
+
+ORDER_STATUSES = ("placed", "approved", "delivered")
+
+JSON_HEADERS = [("Content-Type", "application/json")]
+
+
+def _message(code, message, type_="unknown"):
+    return {"code": code, "type": type_, "message": message}
+
+
+def _parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _valid_pet(pet):
+    """Return whether a pet has the field types the storage keys and indexes on"""
+    if not isinstance(pet, dict):
+        return False
+    if pet.get("id") is not None and not _is_int(pet["id"]):
+        return False
+    if pet.get("status") is not None and not isinstance(pet["status"], str):
+        return False
+    tags = pet.get("tags")
+    if tags is None:
+        return True
+    return isinstance(tags, list) and all(
+        isinstance(tag, dict) and (tag.get("name") is None or isinstance(tag["name"], str)) for tag in tags
+    )
+
+
+def _valid_user(user):
+    return isinstance(user, dict) and isinstance(user.get("username"), str) and bool(user["username"])
+
+
+def _split_values(query, name):
+    """Return query values, accepting both repeated and comma-separated forms"""
+    values = []
+    for raw in query.get(name, ()):
+        values.extend(item for item in raw.split(",") if item)
+    return values
+
+
+class PetstoreApp:
+    """Route Petstore requests to the storage
+
+    Responses of at least compress_min_size bytes are gzip or deflate encoded
+    when the request's Accept-Encoding allows, None disables compression.
+    Request bodies with a gzip or deflate Content-Encoding are decoded.
+    """
+
+    def __init__(self, storage=None, compress_min_size=DEFAULT_MIN_SIZE):
+        self.storage = storage if storage is not None else PetstoreStorage()
+        self.compress_min_size = compress_min_size
+        self._routes = [
+            ("GET", re.compile(r"^/pet/findByStatus$"), self.find_pets_by_status),
+            ("GET", re.compile(r"^/pet/findByTags$"), self.find_pets_by_tags),
+            ("POST", re.compile(r"^/pet$"), self.put_pet),
+            ("PUT", re.compile(r"^/pet$"), self.put_pet),
+            ("POST", re.compile(r"^/pet/(?P<pet_id>[^/]+)/uploadImage$"), self.upload_image),
+            ("GET", re.compile(r"^/pet/(?P<pet_id>[^/]+)$"), self.get_pet),
+            ("POST", re.compile(r"^/pet/(?P<pet_id>[^/]+)$"), self.update_pet_with_form),
+            ("DELETE", re.compile(r"^/pet/(?P<pet_id>[^/]+)$"), self.delete_pet),
+            ("GET", re.compile(r"^/store/inventory$"), self.get_inventory),
+            ("POST", re.compile(r"^/store/order$"), self.place_order),
+            ("GET", re.compile(r"^/store/order/(?P<order_id>[^/]+)$"), self.get_order),
+            ("DELETE", re.compile(r"^/store/order/(?P<order_id>[^/]+)$"), self.delete_order),
+            ("POST", re.compile(r"^/user/(?:createWithList|createWithArray)$"), self.create_users),
+            ("GET", re.compile(r"^/user/login$"), self.login),
+            ("GET", re.compile(r"^/user/logout$"), self.logout),
+            ("POST", re.compile(r"^/user$"), self.create_user),
+            ("GET", re.compile(r"^/user/(?P<username>[^/]+)$"), self.get_user),
+            ("PUT", re.compile(r"^/user/(?P<username>[^/]+)$"), self.update_user),
+            ("DELETE", re.compile(r"^/user/(?P<username>[^/]+)$"), self.delete_user),
+        ]
+
+    def handle(self, method, path, query_string="", headers=None, body=b""):
+        """Handle a request and return (status, headers, body bytes)"""
+        path = unquote(path)
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+        try:
+            response = self._route(method, path, query_string, headers, body)
+        except Exception:
+            # A handler bug must not take the connection down with it
+            response = self._respond(500, _message(500, "something bad happened"))
+        return self._encode(headers.get("accept-encoding"), *response)
+
+    def _route(self, method, path, query_string, headers, body):
+        if headers.get("content-encoding"):
+            try:
+                body = decompress(body, headers["content-encoding"])
+            except UnsupportedEncoding as error:
+                return self._respond(415, _message(415, str(error)))
+            except zlib.error:
+                return self._respond(400, _message(400, "Malformed compressed body"))
+        request = {
+            "query": parse_qs(query_string, keep_blank_values=True),
+            "headers": headers,
+            "body": body,
+        }
+        path_matched = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            path_matched = True
+            if route_method == method:
+                return self._respond(*handler(request, **match.groupdict()))
+        if path_matched:
+            return self._respond(405, None)
+        return self._respond(404, _message(404, "Not Found"))
+
+    def _encode(self, accept_encoding, status, headers, payload):
+        if self.compress_min_size is None or len(payload) < self.compress_min_size:
+            return status, headers, payload
+        # Caches must key compressible responses on the request's Accept-Encoding
+        headers.append(("Vary", "Accept-Encoding"))
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            return status, headers, payload
+        headers.append(("Content-Encoding", encoding))
+        return status, headers, compress(payload, encoding)
+
+    @staticmethod
+    def _respond(status, payload):
+        if payload is None:
+            return status, [], b""
+        if isinstance(payload, (bytes, bytearray)):
+            return status, list(JSON_HEADERS), bytes(payload)
+        return status, list(JSON_HEADERS), encode_json(payload)
+
+    @staticmethod
+    def _json_body(request):
+        try:
+            return json.loads(request["body"] or b"null")
+        except ValueError:
+            return None
+
+    # Pets
+
+    def put_pet(self, request):
+        pet = self._json_body(request)
+        if not _valid_pet(pet):
+            return 405, _message(405, "Invalid input")
+        pet.setdefault("photoUrls", [])
+        pet.setdefault("tags", [])
+        return 200, self.storage.put_pet(pet)
+
+    def get_pet(self, request, pet_id):
+        parsed_id = _parse_id(pet_id)
+        if parsed_id is None:
+            return 404, _message(404, f'java.lang.NumberFormatException: For input string: "{pet_id}"')
+        encoded = self.storage.get_pet_json(parsed_id)
+        if encoded is None:
+            return 404, _message(1, "Pet not found", "error")
+        return 200, encoded
+
+    def update_pet_with_form(self, request, pet_id):
+        parsed_id = _parse_id(pet_id)
+        if parsed_id is None:
+            return 404, _message(404, f'java.lang.NumberFormatException: For input string: "{pet_id}"')
+        try:
+            form = parse_qs(request["body"].decode("utf-8"))
+        except UnicodeDecodeError:
+            return 405, _message(405, "Invalid input")
+        pet = self.storage.update_pet(
+            parsed_id,
+            name=form.get("name", [None])[0],
+            status=form.get("status", [None])[0],
+        )
+        if pet is None:
+            return 404, _message(404, "not found")
+        return 200, _message(200, str(parsed_id))
+
+    def delete_pet(self, request, pet_id):
+        parsed_id = _parse_id(pet_id)
+        if parsed_id is None:
+            return 404, _message(404, f'java.lang.NumberFormatException: For input string: "{pet_id}"')
+        if not self.storage.delete_pet(parsed_id):
+            return 404, None
+        return 200, _message(200, str(parsed_id))
+
+    def find_pets_by_status(self, request):
+        pets = self.storage.find_pets_by_status(_split_values(request["query"], "status"))
+        return 200, b"[" + b",".join(pets) + b"]"
+
+    def find_pets_by_tags(self, request):
+        pets = self.storage.find_pets_by_tags(_split_values(request["query"], "tags"))
+        return 200, b"[" + b",".join(pets) + b"]"
+
+    def upload_image(self, request, pet_id):
+        parsed_id = _parse_id(pet_id)
+        if parsed_id is None or self.storage.get_pet(parsed_id) is None:
+            return 404, _message(404, "Pet not found")
+        fields, files = _parse_multipart(request)
+        metadata = fields.get("additionalMetadata", "")
+        filename, size = files[0] if files else ("", 0)
+        return 200, _message(200, f"additionalMetadata: {metadata}\nFile uploaded to ./{filename}, {size} bytes")
+
+    # Store
+
+    def get_inventory(self, request):
+        return 200, self.storage.inventory()
+
+    def place_order(self, request):
+        order = self._json_body(request)
+        if not isinstance(order, dict) or order.get("status", "placed") not in ORDER_STATUSES:
+            return 400, _message(400, "Invalid Order")
+        if not all(order.get(key) is None or _is_int(order[key]) for key in ("id", "petId", "quantity")):
+            return 400, _message(400, "Invalid Order")
+        order = {
+            "id": order.get("id") or 0,
+            "petId": order.get("petId", 0),
+            "quantity": order.get("quantity", 0),
+            **{key: order[key] for key in ("shipDate", "status") if key in order},
+            "complete": bool(order.get("complete", False)),
+        }
+        return 200, self.storage.put_order(order)
+
+    def get_order(self, request, order_id):
+        order = self.storage.get_order(_parse_id(order_id))
+        if order is None:
+            return 404, _message(1, "Order not found", "error")
+        return 200, order
+
+    def delete_order(self, request, order_id):
+        parsed_id = _parse_id(order_id)
+        if not self.storage.delete_order(parsed_id):
+            return 404, _message(404, "Order Not Found")
+        return 200, _message(200, str(parsed_id))
+
+    # Users
+
+    def create_user(self, request):
+        user = self._json_body(request)
+        if not _valid_user(user):
+            return 400, _message(400, "Invalid user supplied")
+        self.storage.put_user(user)
+        return 200, _message(200, str(user.get("id", 0)))
+
+    def create_users(self, request):
+        users = self._json_body(request)
+        if not isinstance(users, list) or not all(_valid_user(user) for user in users):
+            return 400, _message(400, "Invalid user supplied")
+        for user in users:
+            self.storage.put_user(user)
+        return 200, _message(200, "ok")
+
+    def get_user(self, request, username):
+        user = self.storage.get_user(username)
+        if user is None:
+            return 404, _message(1, "User not found", "error")
+        return 200, user
+
+    def update_user(self, request, username):
+        user = self._json_body(request)
+        if not isinstance(user, dict):
+            return 400, _message(400, "Invalid user supplied")
+        user["username"] = user.get("username") or username
+        if not _valid_user(user):
+            return 400, _message(400, "Invalid user supplied")
+        if user["username"] != username:
+            self.storage.delete_user(username)
+        self.storage.put_user(user)
+        return 200, _message(200, str(user.get("id", 0)))
+
+    def delete_user(self, request, username):
+        if not self.storage.delete_user(username):
+            return 404, None
+        return 200, _message(200, username)
+
+    def login(self, request):
+        return 200, _message(200, f"logged in user session:{int(time.time() * 1000)}")
+
+    def logout(self, request):
+        return 200, _message(200, "ok")
+
+
+def _parse_multipart(request):
+    """Return (form fields, [(filename, size)]) from a multipart/form-data body"""
+    content_type = request["headers"].get("content-type", "")
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    fields, files = {}, []
+    if match is None:
+        return fields, files
+    delimiter = b"--" + match.group(1).encode("latin-1")
+    body = request["body"]
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, content = part.partition(b"\r\n\r\n")
+        content = content[:-2] if content.endswith(b"\r\n") else content
+        disposition = head.decode("latin-1")
+        name = re.search(r'name="([^"]*)"', disposition)
+        filename = re.search(r'filename="([^"]*)"', disposition)
+        if filename is not None:
+            files.append((filename.group(1), len(content)))
+        elif name is not None:
+            fields[name.group(1)] = content.decode("utf-8", "replace")
+    return fields, files
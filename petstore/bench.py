@@ -0,0 +1,259 @@
+"""
+Micro-benchmarks for the test support code
+
+Usage:
+    python -m petstore.bench validation --count 20000
+    python -m petstore.bench factories --count 1000000 --repeat 3
+    python -m petstore.bench startup --repeat 5
+    python -m petstore.bench models --repeat 10
+    python -m petstore.bench templates --count 20000
+    python -m petstore.bench compression --count 5000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Modules timed on their own by the startup benchmark
+STARTUP_MODULES = ("petstore", "petstore.client", "petstore.aio", "petstore.models", "petstore.factories")
+
+
+def measure(function, repeat):
+    """Return the median wall time of function in seconds"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def bench_validation(args):
+    """Compare response.json() plus manual asserts with one-pass schema validation"""
+    from pydantic import TypeAdapter
+
+    from petstore.factories import generate_pet_data
+    from petstore.models import PET_LIST, Pet
+
+    body = json.dumps([generate_pet_data(status="available") for _ in range(args.count)]).encode("utf-8")
+
+    def manual():
+        pets = json.loads(body.decode("utf-8"))
+        assert isinstance(pets, list)
+        for pet in pets:
+            assert pet["status"] == "available"
+
+    def manual_full_schema():
+        pets = json.loads(body.decode("utf-8"))
+        assert isinstance(pets, list)
+        for pet in pets:
+            assert isinstance(pet["id"], int) and isinstance(pet["name"], str)
+            assert isinstance(pet["category"]["id"], int) and isinstance(pet["category"]["name"], str)
+            assert all(isinstance(url, str) for url in pet["photoUrls"])
+            assert all(isinstance(tag["id"], int) and isinstance(tag["name"], str) for tag in pet["tags"])
+            assert pet["status"] == "available"
+
+    def bulk_validator():
+        for pet in PET_LIST.validate_json(body):
+            assert pet["status"] == "available"
+
+    pet_models = TypeAdapter(list[Pet])
+
+    def model_per_item():
+        for pet in pet_models.validate_json(body):
+            assert pet.status == "available"
+
+    results = {
+        "json.loads + asserts (status only)": measure(manual, args.repeat),
+        "json.loads + asserts (full schema)": measure(manual_full_schema, args.repeat),
+        "PET_LIST.validate_json (full schema)": measure(bulk_validator, args.repeat),
+        "TypeAdapter(list[Pet]) (model per item)": measure(model_per_item, args.repeat),
+    }
+    return [f"{name:<40} {seconds * 1000:>9.2f} ms" for name, seconds in results.items()]
+
+
+def bench_factories(args):
+    """Compare per-payload factories with the bulk factories when seeding users"""
+    from petstore import factories
+    from petstore.storage import encode_json
+
+    def per_payload():
+        return [encode_json(factories.generate_user_data()) for _ in range(args.count)]
+
+    results = {
+        "generate_user_data + encode_json": measure(per_payload, args.repeat),
+        "generate_users (dicts)": measure(lambda: factories.generate_users(args.count), args.repeat),
+        "generate_users (items)": measure(
+            lambda: factories.generate_users(args.count, output=factories.ITEMS), args.repeat
+        ),
+        "generate_users (array)": measure(
+            lambda: factories.generate_users(args.count, output=factories.ARRAY), args.repeat
+        ),
+    }
+    return [f"{name:<40} {seconds * 1000:>9.2f} ms" for name, seconds in results.items()]
+
+
+def _python(*args):
+    return subprocess.run(
+        [sys.executable, *args], check=True, capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+
+def slowest_imports(importtime_output, top=10):
+    """Return (cumulative microseconds, module) of the slowest top-level imports in -X importtime output"""
+    imports = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented below the module importing them
+        if not name[1:].startswith(" "):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def bench_startup(args):
+    """Time interpreter start, module imports and collecting the suite, each in a fresh process"""
+    collect = ("-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider")
+    results = {"python -c pass": measure(lambda: _python("-c", "pass"), args.repeat)}
+    for module in STARTUP_MODULES:
+        results[f"import {module}"] = measure(lambda: _python("-c", f"import {module}"), args.repeat)
+    results["pytest --collect-only"] = measure(lambda: _python(*collect), args.repeat)
+
+    lines = [f"{name:<40} {seconds * 1000:>9.2f} ms" for name, seconds in results.items()]
+    lines.append("slowest imports while collecting (cumulative):")
+    # -s, or pytest captures the import times test modules write to stderr
+    importtime = _python("-X", "importtime", *collect, "-s").stderr
+    for microseconds, module in slowest_imports(importtime):
+        lines.append(f"  {module:<38} {microseconds / 1000:>9.2f} ms")
+    return lines
+
+
+# Run in a fresh process per repeat so every validator starts unbuilt
+_MODELS_SCRIPT = """
+import json, time
+from petstore.factories import generate_pet_data
+pet = generate_pet_data()
+started = time.perf_counter()
+from petstore.models import REGISTRY, Pet
+imported = time.perf_counter()
+Pet.model_validate(pet)
+cold = time.perf_counter()
+Pet.model_validate(pet)
+warm = time.perf_counter()
+REGISTRY.warm()
+print(json.dumps({
+    "import petstore.models": imported - started,
+    "Pet.model_validate, cold": cold - imported,
+    "Pet.model_validate, warm": warm - cold,
+    "REGISTRY.warm() (remaining validators)": time.perf_counter() - warm,
+}))
+"""
+
+
+def bench_models(args):
+    """Compare the first, schema-building construction of a model with a warm one"""
+    runs = [json.loads(_python("-c", _MODELS_SCRIPT).stdout) for _ in range(args.repeat)]
+    return [
+        f"{name:<40} {statistics.median(run[name] for run in runs) * 1000:>9.3f} ms"
+        for name in runs[0]
+    ]
+
+
+def bench_templates(args):
+    """Compare client CPU per request for json=, pre-serialized bytes and a RequestTemplate
+
+    Requests go to an adapter answering without I/O, so only client-side work is timed.
+    """
+    import requests
+    from requests.adapters import BaseAdapter
+
+    from petstore.client import PetstoreClient
+    from petstore.factories import ITEMS, generate_pets
+
+    class NullAdapter(BaseAdapter):
+        def send(self, request, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.request = request
+            return response
+
+        def close(self):
+            pass
+
+    pets = generate_pets(args.count)
+    bodies = generate_pets(args.count, output=ITEMS)
+    petstore_client = PetstoreClient("http://petstore.invalid/v2", timeout=(5, 30))
+    petstore_client.session.mount("http://", NullAdapter())
+    create_pet = petstore_client.template("POST", "/pet")
+    get_pet = petstore_client.template("GET", "/pet/{petId}")
+
+    json_header = {"Content-Type": "application/json"}
+    calls = {
+        "client.post(json=dict)": (pets, lambda pet: petstore_client.post("/pet", json=pet)),
+        "client.post(data=bytes)": (bodies, lambda body: petstore_client.post("/pet", data=body, headers=json_header)),
+        "template.send(bytes)": (bodies, create_pet.send),
+        "client.get(f'/pet/{id}')": (pets, lambda pet: petstore_client.get(f"/pet/{pet['id']}")),
+        "template.send(petId=id)": (pets, lambda pet: get_pet.send(petId=pet["id"])),
+    }
+    results = {
+        name: measure(lambda: [send(item) for item in items], args.repeat) for name, (items, send) in calls.items()
+    }
+    return [f"{name:<40} {seconds / args.count * 1e6:>9.2f} us/request" for name, seconds in results.items()]
+
+
+def bench_compression(args):
+    """Compare wire size and time of /pet/findByStatus with count pets per Accept-Encoding
+
+    The app runs in-process, so times include compressing and decoding but no network transfer.
+    """
+    from petstore.client import PetstoreClient
+    from petstore.factories import generate_pets
+    from petstore.inprocess import INPROCESS_URL, InProcessAdapter, WSGIApp
+    from petstore.metrics import Metrics
+
+    app = WSGIApp()
+    for pet in generate_pets(args.count):
+        app.app.storage.put_pet(dict(pet, status="available"))
+    lines = [f"{'Accept-Encoding':<20} {'wire KiB':>10} {'ms/request':>11}"]
+    for accept_encoding in ("identity", "deflate", "gzip"):
+        metrics = Metrics()
+        with PetstoreClient(INPROCESS_URL, adapter_class=InProcessAdapter, app=app, metrics=metrics,
+                            accept_encoding=accept_encoding) as petstore_client:
+            seconds = measure(
+                lambda: petstore_client.get("/pet/findByStatus", params={"status": "available"}), args.repeat
+            )
+        counts = metrics.transfer()["GET /pet/findByStatus"]
+        lines.append(
+            f"{accept_encoding:<20} {counts['response_wire_bytes'] / args.repeat / 1024:>10.1f} {seconds * 1000:>11.2f}"
+        )
+    return lines
+
+
+BENCHMARKS = {
+    "compression": bench_compression,
+    "factories": bench_factories,
+    "models": bench_models,
+    "templates": bench_templates,
+    "startup": bench_startup,
+    "validation": bench_validation,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run support-code micro-benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--count", type=int, default=20000, help="Items per payload (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=15, help="Runs per measurement (default: 15)")
+    args = parser.parse_args(argv)
+    for line in BENCHMARKS[args.benchmark](args):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
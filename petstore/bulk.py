@@ -0,0 +1,232 @@
+"""
+Bulk user import through /user/createWithList and /user/createWithArray
+Users are streamed in batches with a bounded number of batches in flight, then
+read back with bounded concurrency
+
+Usage:
+    python -m petstore.bulk --base-url local --users 100000 --batch-size 500
+    python -m petstore.bulk --base-url local --users 20000 --tune
+"""
+import argparse
+import itertools
+import json
+import time
+
+from petstore.storage import encode_json
+
+
+DEFAULT_BATCH_SIZE = 250
+DEFAULT_IN_FLIGHT = 8
+DEFAULT_TUNING_SIZES = (10, 50, 100, 250, 500, 1000, 2500)
+ENDPOINTS = ("/user/createWithList", "/user/createWithArray")
+
+_JSON_HEADERS = {"Content-Type": "application/json", "Accept": "application/json"}
+
+
+def batched(iterable, size):
+    """Yield lists of up to size items, pulling from iterable only as needed"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def generate_user_stream(total, chunk_size=10000):
+    """Yield total fresh user payloads, generated in bulk chunk_size at a time"""
+    from petstore.factories import generate_users
+
+    for start in range(0, total, chunk_size):
+        yield from generate_users(min(chunk_size, total - start))
+
+
+def _describe(result):
+    if isinstance(result, Exception):
+        return f"{type(result).__name__}: {result}"
+    return f"HTTP {result.status_code}: {result.text[:200]}"
+
+
+class ImportReport:
+    """Outcome of a bulk import and its verification"""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.batches = 0
+        self.created = []
+        self.failures = []
+        self.verified = 0
+        self.verify_failures = []
+        self.elapsed = 0.0
+
+    @property
+    def users_per_second(self):
+        return len(self.created) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        """Return counters for reporting"""
+        return {
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "created": len(self.created),
+            "failed_batches": len(self.failures),
+            "verified": self.verified,
+            "verify_failures": len(self.verify_failures),
+            "elapsed": self.elapsed,
+            "users_per_second": self.users_per_second,
+        }
+
+    def format_lines(self):
+        summary = self.summary()
+        lines = [
+            f"{summary['created']} users in {summary['batches']} batches of {self.batch_size} "
+            f"in {summary['elapsed']:.2f}s ({summary['users_per_second']:.0f} users/s)",
+            f"{summary['failed_batches']} failed batches, {summary['verified']} verified, "
+            f"{summary['verify_failures']} failed verification",
+        ]
+        for first_username, reason in self.failures[:10]:
+            lines.append(f"  batch starting at {first_username}: {reason}")
+        for username, reason in self.verify_failures[:10]:
+            lines.append(f"  {username}: {reason}")
+        return lines
+
+
+class BulkImporter:
+    """Post users in concurrent batches and read them back"""
+
+    def __init__(self, async_client, batch_size=DEFAULT_BATCH_SIZE, in_flight=DEFAULT_IN_FLIGHT,
+                 endpoint=ENDPOINTS[0], verify_concurrency=None, timeout=30):
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"endpoint must be one of {ENDPOINTS}, got {endpoint!r}")
+        self.async_client = async_client
+        self.batch_size = batch_size
+        self.in_flight = in_flight
+        self.endpoint = endpoint
+        self.verify_concurrency = verify_concurrency or async_client.concurrency
+        self.timeout = timeout
+
+    def run(self, users, verify=True):
+        """Import an iterable of user payloads and return an ImportReport"""
+        return self.async_client.run(self.import_users(users, verify=verify))
+
+    async def import_users(self, users, verify=True):
+        """Import users, holding at most in_flight batches in memory at once"""
+        from petstore.aio import bounded
+
+        report = ImportReport(self.batch_size)
+        started = time.perf_counter()
+        await bounded(
+            self.in_flight,
+            ((batch, self._post(batch)) for batch in batched(users, self.batch_size)),
+            lambda batch, result: self._record_batch(report, batch, result),
+        )
+        report.elapsed = time.perf_counter() - started
+        if verify:
+            await self.verify(report)
+        return report
+
+    async def verify(self, report):
+        """Read back every created user and record mismatches in report.verify_failures"""
+        from petstore.aio import bounded
+
+        def calls():
+            for username in report.created:
+                yield username, self.async_client.get(
+                    f"/user/{username}", headers=_JSON_HEADERS, timeout=self.timeout
+                )
+
+        def check(username, result):
+            if isinstance(result, Exception) or result.status_code != 200:
+                report.verify_failures.append((username, _describe(result)))
+                return
+            got = result.json().get("username")
+            if got != username:
+                report.verify_failures.append((username, f"got user {got!r}"))
+            else:
+                report.verified += 1
+
+        await bounded(self.verify_concurrency, calls(), check)
+        return report
+
+    async def _post(self, batch):
+        return await self.async_client.post(
+            self.endpoint, data=encode_json(batch), headers=_JSON_HEADERS, timeout=self.timeout
+        )
+
+    def _record_batch(self, report, batch, result):
+        report.batches += 1
+        if isinstance(result, Exception) or result.status_code != 200:
+            report.failures.append((batch[0].get("username"), _describe(result)))
+        else:
+            report.created.extend(user["username"] for user in batch)
+
+
+def tune_batch_size(async_client, make_users, total, sizes=DEFAULT_TUNING_SIZES, cleanup=None, **importer_kwargs):
+    """Import total fresh users per candidate batch size and return (best size, reports by size)
+
+    make_users(count) returns new user payloads. cleanup(usernames), if given,
+    runs after each trial so trials do not grow the server's user table.
+    """
+    reports = {}
+    for size in sizes:
+        importer = BulkImporter(async_client, batch_size=size, **importer_kwargs)
+        report = importer.run(make_users(total), verify=False)
+        reports[size] = report
+        if cleanup is not None:
+            cleanup(report.created)
+    best = max(reports, key=lambda size: (not reports[size].failures, reports[size].users_per_second))
+    return best, reports
+
+
+def main(argv=None):
+    from petstore.aio import AsyncPetstoreClient
+    from petstore.client import PetstoreClient
+    from petstore.server import PetstoreServer
+
+    parser = argparse.ArgumentParser(description="Bulk import users into a Petstore API")
+    parser.add_argument("--base-url", default="local", help="API base URL or 'local' for an in-process server")
+    parser.add_argument("--users", type=int, default=10000, help="Users to import (default: 10000)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Users per request (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--in-flight", type=int, default=DEFAULT_IN_FLIGHT,
+                        help=f"Batches posted concurrently (default: {DEFAULT_IN_FLIGHT})")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default=ENDPOINTS[0])
+    parser.add_argument("--no-verify", action="store_true", help="Skip reading the users back")
+    parser.add_argument("--tune", action="store_true",
+                        help="Import --users users per candidate batch size and report the fastest")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    server = PetstoreServer().start() if args.base_url == "local" else None
+    base_url = server.url if server is not None else args.base_url
+    concurrency = max(args.in_flight, 16)
+    try:
+        with PetstoreClient(base_url, pool_maxsize=concurrency) as client, \
+                AsyncPetstoreClient(client, concurrency=concurrency) as async_client:
+            options = {"in_flight": args.in_flight, "endpoint": args.endpoint}
+            if args.tune:
+                def cleanup(usernames):
+                    async_client.run(async_client.map(
+                        "DELETE", [f"/user/{username}" for username in usernames], return_exceptions=True
+                    ))
+
+                best, reports = tune_batch_size(async_client, generate_user_stream, args.users, cleanup=cleanup, **options)
+                for size, report in reports.items():
+                    marker = "  <- best" if size == best else ""
+                    print(f"batch {size:>5}: {report.users_per_second:>10.0f} users/s{marker}")
+                result = {"best_batch_size": best, "trials": [report.summary() for report in reports.values()]}
+            else:
+                importer = BulkImporter(async_client, batch_size=args.batch_size, **options)
+                report = importer.run(generate_user_stream(args.users), verify=not args.no_verify)
+                print("\n".join(report.format_lines()))
+                result = report.summary()
+    finally:
+        if server is not None:
+            server.stop()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as report_file:
+            json.dump(result, report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
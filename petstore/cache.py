@@ -0,0 +1,150 @@
+"""
+Client-side cache for idempotent GET responses
+Entries expire after a TTL, the least recently used are evicted past maxsize, writes
+invalidate every cached read of the resource family they touch, and concurrent
+identical GETs share one upstream call
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from requests.models import PreparedRequest
+
+
+DEFAULT_TTL = 30.0
+DEFAULT_MAXSIZE = 1024
+
+# Longest prefix wins, anything else falls back to its first path segment
+RESOURCE_FAMILIES = ("/store/inventory", "/store/order", "/pet", "/user")
+
+# Cached reads derived from another family, the inventory counts pets by status
+DEPENDENT_FAMILIES = {
+    "/pet": ("/store/inventory",),
+}
+
+# Session endpoints answer differently on every call
+UNCACHEABLE_PATHS = frozenset({"/user/login", "/user/logout"})
+
+_CACHEABLE_KWARGS = frozenset({"params", "headers", "timeout"})
+
+
+def resource_family(path):
+    """Return the resource family an API path belongs to, e.g. /pet/12 -> /pet"""
+    for family in RESOURCE_FAMILIES:
+        if path == family or path.startswith(family + "/"):
+            return family
+    return "/" + path.strip("/").split("/", 1)[0]
+
+
+def cache_key(url, params=None, headers=None):
+    """Return the cache key of a GET: the full URL with its query plus the explicit headers"""
+    prepared = PreparedRequest()
+    prepared.prepare_url(url, params)
+    return prepared.url, tuple(sorted((headers or {}).items()))
+
+
+class ResponseCache:
+    """Thread-safe TTL and LRU bounded store of 200 GET responses"""
+
+    def __init__(self, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE, clock=time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        # key -> (expires, family, response), ordered from least to most recently used
+        self._entries = OrderedDict()
+        self._families = {}
+        self._generations = {}
+        self._inflight = {}
+
+    def cacheable(self, path, kwargs):
+        """Return whether a GET with these request arguments may be served from the cache"""
+        return path not in UNCACHEABLE_PATHS and _CACHEABLE_KWARGS.issuperset(kwargs)
+
+    def fetch(self, key, path, send):
+        """Return the cached response for key, or call send() once for all concurrent callers"""
+        family = resource_family(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                self._discard(key)
+            pending = self._inflight.get(key)
+            if pending is None:
+                self.misses += 1
+                pending = self._inflight[key] = Future()
+                generation = self._generations.get(family, 0)
+            else:
+                self.coalesced += 1
+                generation = None
+        if generation is None:
+            return pending.result()
+
+        try:
+            response = send()
+        except BaseException as error:
+            with self._lock:
+                del self._inflight[key]
+            pending.set_exception(error)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            # A write to the family while this GET was in flight makes the response stale
+            if response.status_code == 200 and self._generations.get(family, 0) == generation:
+                self._store(key, family, response)
+        pending.set_result(response)
+        return response
+
+    def invalidate(self, path):
+        """Drop every cached read of the families a write to path can change"""
+        family = resource_family(path)
+        with self._lock:
+            for affected in (family,) + DEPENDENT_FAMILIES.get(family, ()):
+                self._generations[affected] = self._generations.get(affected, 0) + 1
+                for key in list(self._families.get(affected, ())):
+                    self._discard(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._families.clear()
+
+    def stats(self):
+        """Return hit, miss, coalescing and invalidation counters"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _store(self, key, family, response):
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (self.clock() + self.ttl, family, response)
+        self._families.setdefault(family, {})[key] = None
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        _, family, _ = self._entries.pop(key)
+        keys = self._families[family]
+        del keys[key]
+        if not keys:
+            del self._families[family]
@@ -0,0 +1,325 @@
+"""
+Record/replay of Petstore traffic in a JSON Lines cassette
+Replay serves responses from an index of line offsets, the file is never parsed per lookup
+
+Every line is a JSON object whose first field is "key":
+    {"key": "GET /v2/pet/1001 -", "status": 200, "headers": {...}, "body": "..."}
+The first line holds run metadata under the "#meta" key.
+While recording, bodies are spooled as the caller reads them, so streamed
+responses reach the caller chunk by chunk and are written out once complete.
+"""
+import base64
+import codecs
+import hashlib
+import json
+import tempfile
+import threading
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from petstore.metrics import InstrumentedAdapter
+
+
+META_KEY = "#meta"
+
+# Body fields that change between otherwise identical runs
+VOLATILE_FIELDS = frozenset({"shipDate"})
+
+_KEY_PREFIX = '{"key": '
+
+# Recorded bodies are kept in memory up to this size, then spooled to a temporary file
+SPOOL_MEMORY = 1024 * 1024
+# Multiple of 3 so every chunk base64-encodes without padding
+_SPOOL_CHUNK = 3 * 64 * 1024
+
+
+class CassetteMiss(requests.ConnectionError):
+    """No recorded response matches the request"""
+
+
+def _strip_volatile(document):
+    if isinstance(document, dict):
+        return {key: _strip_volatile(value) for key, value in document.items() if key not in VOLATILE_FIELDS}
+    if isinstance(document, list):
+        return [_strip_volatile(item) for item in document]
+    return document
+
+
+def normalize_body(body):
+    """Return a stable digest of a request body"""
+    if body is None or body == b"" or body == "":
+        return "-"
+    if not isinstance(body, (bytes, str)):
+        # Streamed bodies are not read just to build a key
+        return "stream"
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        canonical = json.dumps(_strip_volatile(json.loads(body)), sort_keys=True, separators=(",", ":"))
+        body = canonical.encode("utf-8")
+    except ValueError:
+        pass
+    return hashlib.sha1(body).hexdigest()[:16]
+
+
+def request_key(method, url, body):
+    """Return the lookup key of a request, independent of scheme and host"""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    target = f"{parts.path}?{query}" if query else parts.path
+    return f"{method} {target} {normalize_body(body)}"
+
+
+def read_meta(path):
+    """Return the metadata line of a cassette"""
+    with open(path, "rb") as cassette_file:
+        record = json.loads(cassette_file.readline())
+    if record.get("key") != META_KEY:
+        raise ValueError(f"{path} is not a cassette: missing {META_KEY} line")
+    return record
+
+
+class CassetteRecorder:
+    """Append request/response pairs to a cassette file"""
+
+    def __init__(self, path, **meta):
+        self.path = path
+        self._file = open(path, "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._write({"key": META_KEY, **meta})
+
+        # Bodies not read to the end yet, recorded at the latest on close()
+        self._pending = set()
+
+    @staticmethod
+    def _record(request, response):
+        return {
+            "key": request_key(request.method, request.url, request.body),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+        }
+
+    def record(self, request, response):
+        """Record a response whose body has been read"""
+        record = self._record(request, response)
+        try:
+            record["body"] = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            record["body_b64"] = base64.b64encode(response.content).decode("ascii")
+        self._write(record)
+
+    def record_stream(self, request, response):
+        """Record a response once the caller has read its body, which is left unread until then"""
+        record = self._record(request, response)
+
+        def finish(spool):
+            with self._lock:
+                self._pending.discard(body)
+            self._write_spooled(record, spool)
+
+        body = _RecordingBody(response.raw, finish)
+        response.raw = body
+        with self._lock:
+            self._pending.add(body)
+
+    def _write(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+
+    def _write_spooled(self, record, spool):
+        spool.seek(0)
+        text_decoder = codecs.getincrementaldecoder("utf-8")()
+        try:
+            for chunk in iter(lambda: spool.read(_SPOOL_CHUNK), b""):
+                text_decoder.decode(chunk)
+            text_decoder.decode(b"", final=True)
+            is_text = True
+        except UnicodeDecodeError:
+            is_text = False
+        spool.seek(0)
+        text_decoder.reset()
+        # The record's JSON without its closing brace, the body is appended piece by piece
+        prefix = json.dumps(record)[:-1] + (', "body": "' if is_text else ', "body_b64": "')
+        with self._lock:
+            self._file.write(prefix)
+            for chunk in iter(lambda: spool.read(_SPOOL_CHUNK), b""):
+                if is_text:
+                    self._file.write(json.dumps(text_decoder.decode(chunk))[1:-1])
+                else:
+                    self._file.write(base64.b64encode(chunk).decode("ascii"))
+            self._file.write('"}\n')
+
+    def close(self):
+        """Record bodies still unread, then close the cassette"""
+        with self._lock:
+            pending = list(self._pending)
+        for body in pending:
+            body.complete()
+        with self._lock:
+            self._file.close()
+
+
+class _RecordingBody:
+    """urllib3 response proxy spooling the body as requests reads it and recording it once complete
+
+    Closing or releasing the response before the end drains the rest first,
+    the caller never sees those bytes. A body that fails to drain is not recorded.
+    """
+
+    def __init__(self, raw, finish):
+        self._raw = raw
+        self._finish = finish
+        self._spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY)
+        self._complete = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        for chunk in self._raw.stream(amt, decode_content=decode_content):
+            self._spool.write(chunk)
+            yield chunk
+        self.complete()
+
+    def read(self, amt=None, **kwargs):
+        data = self._raw.read(amt, **kwargs)
+        self._spool.write(data)
+        if amt is None or not data:
+            self.complete()
+        return data
+
+    def complete(self):
+        """Read whatever the caller left unread and record the body, once"""
+        if self._complete:
+            return
+        self._complete = True
+        try:
+            for chunk in self._raw.stream(_SPOOL_CHUNK, decode_content=True):
+                self._spool.write(chunk)
+        except Exception:
+            self._spool.close()
+            return
+        try:
+            self._finish(self._spool)
+        finally:
+            self._spool.close()
+
+    def close(self):
+        self.complete()
+        self._raw.close()
+
+    def release_conn(self):
+        self.complete()
+        self._raw.release_conn()
+
+
+class Cassette:
+    """Indexed read access to a recorded cassette"""
+
+    def __init__(self, path):
+        self.path = path
+        self._index = None
+        self._calls = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _build_index(self):
+        index = {}
+        decoder = json.JSONDecoder()
+        with open(self.path, "rb") as cassette_file:
+            offset = 0
+            for line in cassette_file:
+                text = line.decode("utf-8")
+                if text.startswith(_KEY_PREFIX):
+                    # Decode only the key string, not the whole record
+                    key, _ = decoder.raw_decode(text, len(_KEY_PREFIX))
+                    if key != META_KEY:
+                        index.setdefault(key, []).append(offset)
+                offset += len(line)
+        return index
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_index()
+            return sum(len(offsets) for offsets in self._index.values())
+
+    def _ensure_index(self):
+        if self._index is None:
+            self._index = self._build_index()
+            self._file = open(self.path, "rb")
+
+    def lookup(self, method, url, body):
+        """Return the recorded record for the next call with this key, or None"""
+        key = request_key(method, url, body)
+        with self._lock:
+            self._ensure_index()
+            offsets = self._index.get(key)
+            if not offsets:
+                return None
+            call = self._calls.get(key, 0)
+            self._calls[key] = call + 1
+            # Repeat the last recording once a key has been replayed through
+            self._file.seek(offsets[min(call, len(offsets) - 1)])
+            line = self._file.readline()
+        return json.loads(line)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CassetteAdapter(InstrumentedAdapter):
+    """Transport adapter that records real traffic or replays a cassette"""
+
+    def __init__(self, recorder=None, cassette=None, **kwargs):
+        if (recorder is None) == (cassette is None):
+            raise ValueError("CassetteAdapter needs exactly one of recorder or cassette")
+        self.recorder = recorder
+        self.cassette = cassette
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if self.recorder is not None:
+            response = super().send(request, **kwargs)
+            self.recorder.record_stream(request, response)
+            return response
+        record = self.cassette.lookup(request.method, request.url, request.body)
+        if record is None:
+            raise CassetteMiss(
+                f"No recording for {request_key(request.method, request.url, request.body)}",
+                request=request,
+            )
+        return self.build_replay_response(request, record)
+
+    @staticmethod
+    def build_replay_response(request, record):
+        response = requests.Response()
+        response.status_code = record["status"]
+        response.reason = record.get("reason", "")
+        response.headers = CaseInsensitiveDict(record["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        if "body_b64" in record:
+            response._content = base64.b64decode(record["body_b64"])
+        else:
+            response._content = record["body"].encode("utf-8")
+        response._content_consumed = True
+        # Bodies are stored decoded, drop transfer headers that no longer apply
+        response.headers.pop("Content-Encoding", None)
+        response.headers["Content-Length"] = str(len(response._content))
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        super().close()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.cassette is not None:
+            self.cassette.close()
@@ -0,0 +1,258 @@
+"""
+Pooled HTTP client for the Petstore API
+One keep-alive connection pool is shared by every request made through the client
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from petstore.cache import cache_key
+from petstore.compression import ACCEPT_ENCODING, compress_body
+from petstore.metrics import InstrumentedAdapter, endpoint_key
+from petstore.storage import encode_json
+from petstore.streaming import DEFAULT_CHUNK_SIZE, JsonArrayStream
+from petstore.tail import HEDGEABLE_METHODS
+from petstore.templates import RequestTemplate
+
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 16
+
+
+class PetstoreClient:
+    """Petstore API client backed by a pooled requests.Session
+
+    timeout is a requests timeout or a callable such as AdaptiveTimeout that
+    returns one per endpoint. hedge, a petstore.tail.Hedge, duplicates slow GETs.
+    accept_encoding is sent with every request, compressed responses are
+    decoded as they stream. Bytes and json= bodies of at least
+    compress_min_size bytes are sent gzip-compressed, None sends them as they are.
+    """
+
+    def __init__(self, base_url, headers=None, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False, timeout=None, adapter_class=InstrumentedAdapter,
+                 metrics=None, cache=None, hedge=None, accept_encoding=ACCEPT_ENCODING, compress_min_size=None,
+                 **adapter_kwargs):
+        self.base_url = base_url.rstrip("/")
+        self.base_path = urlsplit(self.base_url).path
+        self.metrics = metrics
+        self.compress_min_size = compress_min_size
+        self.cache = cache
+        self.timeout = timeout
+        self.hedge = hedge
+        # Latency trackers feeding adaptive timeouts and hedge delays, each fed once
+        self._latencies = []
+        for policy in (timeout, hedge):
+            latency = getattr(policy, "latency", None)
+            if latency is not None and all(latency is not known for known in self._latencies):
+                self._latencies.append(latency)
+        self.pool_maxsize = pool_maxsize
+        self.session = requests.Session()
+        # requests' default also lists br and zstd when their decoders are installed
+        self.session.headers["Accept-Encoding"] = accept_encoding
+        if headers:
+            self.session.headers.update(headers)
+        self.adapter = adapter_class(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            **adapter_kwargs,
+        )
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self._lock = threading.Lock()
+        self._closed_requests = 0
+        self._closed_connections = 0
+
+    def url(self, path):
+        """Return an absolute URL for an API path"""
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+
+    def api_path(self, url):
+        """Return the path of a URL relative to the API base path"""
+        path = urlsplit(url).path
+        if self.base_path and path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+        return path or "/"
+
+    def request(self, method, path, **kwargs):
+        """Send a request to an API path and return the requests.Response"""
+        url = self.url(path)
+        if self.compress_min_size is not None and ("json" in kwargs or "data" in kwargs):
+            kwargs = self._compress(method, self.api_path(url), kwargs)
+        if "timeout" not in kwargs:
+            kwargs["timeout"] = (
+                self.timeout(endpoint_key(method, self.api_path(url))) if callable(self.timeout) else self.timeout
+            )
+        if self.cache is None:
+            return self._send(method, url, **kwargs)
+        api_path = self.api_path(url)
+        if method == "GET":
+            if not self.cache.cacheable(api_path, kwargs):
+                return self._send(method, url, **kwargs)
+            key = cache_key(url, kwargs.get("params"), kwargs.get("headers"))
+            return self.cache.fetch(key, api_path, lambda: self._send(method, url, **kwargs))
+        if method in ("HEAD", "OPTIONS"):
+            return self._send(method, url, **kwargs)
+        # Invalidate on both sides so reads racing the write are never kept
+        self.cache.invalidate(api_path)
+        try:
+            return self._send(method, url, **kwargs)
+        finally:
+            self.cache.invalidate(api_path)
+
+    def _compress(self, method, api_path, kwargs):
+        """Return kwargs with a large body replaced by its gzip encoding"""
+        if kwargs.get("json") is not None:
+            if kwargs.get("data") is not None:
+                return kwargs
+            kwargs = dict(kwargs, data=encode_json(kwargs.pop("json")))
+            kwargs["headers"] = {"Content-Type": "application/json", **(kwargs.get("headers") or {})}
+        body, encoding = compress_body(kwargs.get("data"), self.compress_min_size)
+        if encoding is None:
+            return kwargs
+        self.count_request_bytes(method, api_path, len(kwargs["data"]), len(body))
+        return dict(kwargs, data=body, headers={**(kwargs.get("headers") or {}), "Content-Encoding": encoding})
+
+    def count_request_bytes(self, method, api_path, size, wire_size):
+        """Count a request body's size before and after content coding"""
+        if self.metrics is not None:
+            self.metrics.add_bytes(method, api_path, "request_bytes", size)
+            self.metrics.add_bytes(method, api_path, "request_wire_bytes", wire_size)
+
+    def count_response_bytes(self, response, method, api_path, size):
+        """Count the decoded size of a response body against the bytes read from the connection"""
+        if self.metrics is None:
+            return
+        raw = getattr(response, "raw", None)
+        # Replayed responses have no connection and were stored decoded
+        wire_size = raw.tell() if raw is not None and hasattr(raw, "tell") else size
+        self.metrics.add_bytes(method, api_path, "response_bytes", size)
+        self.metrics.add_bytes(method, api_path, "response_wire_bytes", wire_size)
+
+    def _send(self, method, url, **kwargs):
+        api_path = self.api_path(url)
+        if self.hedge is None or method not in HEDGEABLE_METHODS or kwargs.get("stream"):
+            return self._send_once(method, url, api_path, **kwargs)
+        on_fire = None
+        if self.metrics is not None:
+            def on_fire(counter):
+                self.metrics.increment(method, api_path, counter)
+        return self.hedge.send(
+            endpoint_key(method, api_path), lambda: self._send_once(method, url, api_path, **kwargs), on_fire
+        )
+
+    def _send_once(self, method, url, api_path, **kwargs):
+        return self._timed(method, api_path, lambda: self.session.request(method, url, **kwargs))
+
+    def send_prepared(self, prepared, api_path, **kwargs):
+        """Send a requests.PreparedRequest for an API path, bypassing hedging
+
+        kwargs go to Session.send, which applies no session settings of its own.
+        GETs are served from the cache, keyed on the URL and the prepared
+        headers, which include the session's, so they do not share entries with request().
+        """
+        def send():
+            return self._timed(prepared.method, api_path, lambda: self.session.send(prepared, **kwargs))
+
+        if self.cache is None or prepared.method in ("HEAD", "OPTIONS"):
+            return send()
+        if prepared.method == "GET":
+            if kwargs.get("stream") or not self.cache.cacheable(api_path, {}):
+                return send()
+            key = (prepared.url, tuple(sorted(prepared.headers.items())))
+            return self.cache.fetch(key, api_path, send)
+        self.cache.invalidate(api_path)
+        try:
+            return send()
+        finally:
+            self.cache.invalidate(api_path)
+
+    def template(self, method, path, **kwargs):
+        """Return a RequestTemplate for an API path such as /pet/{petId}"""
+        return RequestTemplate(self, method, path, **kwargs)
+
+    def _timed(self, method, api_path, send):
+        started = time.perf_counter()
+        response = send()
+        elapsed = time.perf_counter() - started
+        if self.metrics is not None:
+            timings = dict(getattr(response, "timings", None) or {})
+            timings["total"] = elapsed
+            self.metrics.record(method, api_path, timings)
+            self._count_bytes(response, method, api_path)
+        if self._latencies:
+            endpoint = endpoint_key(method, api_path)
+            for latency in self._latencies:
+                latency.record(endpoint, elapsed)
+        return response
+
+    def _count_bytes(self, response, method, api_path):
+        request = getattr(response, "request", None)
+        body = getattr(request, "body", None)
+        # Compressed bodies were counted with their original size when compressed
+        if isinstance(body, (bytes, str)) and "Content-Encoding" not in request.headers:
+            size = len(body)
+            self.count_request_bytes(method, api_path, size, size)
+        # Streamed bodies are counted by their reader once consumed
+        if getattr(response, "_content_consumed", False) and response._content is not None:
+            self.count_response_bytes(response, method, api_path, len(response._content))
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def stream_array(self, path, method="GET", chunk_size=DEFAULT_CHUNK_SIZE, validate=None, **kwargs):
+        """Send a request and iterate the JSON array in its body item by item"""
+        response = self.request(method, path, stream=True, **kwargs)
+        api_path = self.api_path(self.url(path))
+        return JsonArrayStream(
+            response, chunk_size=chunk_size, validate=validate,
+            on_close=lambda stream: self.count_response_bytes(response, method, api_path, stream.bytes_read),
+        )
+
+    def connection_stats(self):
+        """Return request and connection counts for the pool"""
+        with self._lock:
+            sent, opened = self._closed_requests, self._closed_connections
+            for pool in self._pools():
+                sent += pool.num_requests
+                opened += pool.num_connections
+        return {
+            "requests": sent,
+            "connections": opened,
+            "reused": max(sent - opened, 0),
+            "reuse_ratio": (sent - opened) / sent if sent else 0.0,
+        }
+
+    def _pools(self):
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                yield pool
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools():
+                self._closed_requests += pool.num_requests
+                self._closed_connections += pool.num_connections
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
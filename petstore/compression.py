@@ -0,0 +1,81 @@
+"""
+gzip and deflate content coding for Petstore requests and responses
+Used by PetstoreApp to compress responses and decode compressed request bodies,
+and by PetstoreClient to compress large request bodies
+
+deflate is the zlib format of RFC 9110. gzip output carries no timestamp, so the
+same body always compresses to the same bytes, e.g. for cassette keys.
+"""
+import zlib
+
+
+ENCODINGS = ("gzip", "deflate")
+ACCEPT_ENCODING = "gzip, deflate"
+
+# Bodies smaller than this are sent as they are, headers and framing outweigh the saving
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVEL = 6
+
+_WBITS = {"gzip": 31, "deflate": 15}
+
+
+class UnsupportedEncoding(ValueError):
+    """Raised for a Content-Encoding other than identity, gzip or deflate"""
+
+
+def negotiate(accept_encoding):
+    """Return the preferred supported coding of an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    best = None
+    for encoding in ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > 0 and (best is None or weight > weights.get(best, weights.get("*", 0.0))):
+            best = encoding
+    return best
+
+
+def compress(data, encoding, level=DEFAULT_LEVEL):
+    """Return data compressed with gzip or deflate"""
+    try:
+        wbits = _WBITS[encoding]
+    except KeyError:
+        raise UnsupportedEncoding(f"unsupported content coding {encoding!r}") from None
+    compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+def decompress(data, content_encoding):
+    """Return data decoded according to a Content-Encoding header, codings applied in order"""
+    for encoding in reversed([item.strip().lower() for item in (content_encoding or "").split(",")]):
+        if encoding in ("", "identity"):
+            continue
+        if encoding not in _WBITS:
+            raise UnsupportedEncoding(f"unsupported content coding {encoding!r}")
+        try:
+            data = zlib.decompress(data, _WBITS[encoding])
+        except zlib.error:
+            if encoding != "deflate":
+                raise
+            # Some clients send raw deflate streams without the zlib wrapper
+            data = zlib.decompress(data, -15)
+    return data
+
+
+def compress_body(body, min_size=DEFAULT_MIN_SIZE, encoding="gzip", level=DEFAULT_LEVEL):
+    """Return (body, encoding) with bytes bodies of at least min_size compressed, encoding None otherwise"""
+    if not isinstance(body, (bytes, bytearray)) or len(body) < min_size:
+        return body, None
+    return compress(bytes(body), encoding, level), encoding
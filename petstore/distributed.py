@@ -0,0 +1,119 @@
+"""
+Open-loop load from several worker processes, coordinated by the calling process
+Each worker owns a client with its own connection pool and a slice of every
+ID range, so the GIL of one process no longer caps the offered load
+
+The coordinator starts the workers, releases them together through a barrier
+once every client is ready, and merges their latency histograms into one
+LoadReport. Each worker sends rate / workers of every endpoint, phase-shifted
+so the combined arrivals stay evenly spaced.
+
+Usage:
+    python -m petstore.load --base-url wsgi --workers 4 --rate get_inventory=4000 --duration 10
+"""
+import multiprocessing
+import os
+import queue
+import random
+import traceback
+
+from petstore.load import DEFAULT_CONCURRENCY, LoadReport, run_load
+
+
+# Seconds allowed for workers to import and build their clients before the start
+DEFAULT_START_TIMEOUT = 30.0
+
+
+class DistributedLoadError(RuntimeError):
+    """Raised when a worker process fails or does not report back"""
+
+
+def make_client(base_url, concurrency=DEFAULT_CONCURRENCY, **client_options):
+    """Return a PetstoreClient for a base URL, 'wsgi' and 'asgi' dispatch to an app in this process"""
+    from petstore.client import PetstoreClient
+
+    if base_url in ("wsgi", "asgi"):
+        from petstore.inprocess import INPROCESS_URL, ASGIApp, InProcessAdapter, WSGIApp
+
+        app = ASGIApp() if base_url == "asgi" else WSGIApp()
+        return PetstoreClient(
+            INPROCESS_URL, pool_maxsize=concurrency, adapter_class=InProcessAdapter, app=app, **client_options
+        )
+    return PetstoreClient(base_url, pool_maxsize=concurrency, **client_options)
+
+
+def _worker(index, workers, seed, base_url, rates, duration, concurrency, barrier, results):
+    from petstore import ids
+
+    try:
+        ids.configure(index, workers, seed)
+        random.seed(f"{seed}:{index}")
+        share = {name: rate / workers for name, rate in rates.items()}
+        with make_client(base_url, concurrency) as client:
+            barrier.wait()
+            report = run_load(client, share, duration, concurrency, phase=index / workers)
+        results.put((index, report.to_dict(), None))
+    except Exception:
+        # Release the coordinator and the other workers if still waiting to start
+        barrier.abort()
+        results.put((index, None, traceback.format_exc()))
+
+
+def _failures(results):
+    failures = []
+    while True:
+        try:
+            index, _, error = results.get(timeout=1)
+        except queue.Empty:
+            return "\n".join(failures)
+        if error is not None:
+            failures.append(f"worker {index}:\n{error}")
+
+
+def run_distributed(base_url, rates, duration, workers=None, concurrency=DEFAULT_CONCURRENCY, seed=None,
+                    start_timeout=DEFAULT_START_TIMEOUT):
+    """Run rates for duration seconds split across worker processes and return the merged LoadReport
+
+    concurrency is per worker. With base_url 'wsgi' or 'asgi' every worker
+    runs its own in-process app, otherwise all target the same server.
+    """
+    workers = workers or os.cpu_count() or 1
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    # spawn: workers must not inherit the coordinator's threads, sockets or server
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=_worker, name=f"petstore-load-{index}",
+            args=(index, workers, seed, base_url, rates, duration, concurrency, barrier, results),
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        try:
+            barrier.wait(timeout=start_timeout)
+        except Exception:
+            # Broken by a failing worker, whose traceback is in the queue, or timed out
+            raise DistributedLoadError(_failures(results) or f"workers not ready after {start_timeout}s") from None
+        reports = []
+        failures = []
+        for _ in processes:
+            try:
+                index, report, error = results.get(timeout=duration + start_timeout)
+            except queue.Empty:
+                raise DistributedLoadError(f"{workers - len(reports) - len(failures)} workers did not report") from None
+            if error is not None:
+                failures.append(f"worker {index}:\n{error}")
+            else:
+                reports.append(LoadReport.from_dict(report))
+        if failures:
+            raise DistributedLoadError("\n".join(failures))
+        return LoadReport.merged(reports)
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
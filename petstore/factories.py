@@ -0,0 +1,210 @@
+"""
+Payload factories for pets, orders and users
+IDs and usernames come from petstore.ids so parallel workers never collide
+
+The generate_* functions build one payload. The bulk functions (generate_pets,
+generate_orders, generate_users) build count payloads in one pass, as dicts,
+as one JSON bytes object per payload, or as a single JSON array in bytes.
+"""
+import json
+import random
+import string
+from datetime import datetime, timedelta, timezone
+
+from petstore import ids
+
+
+def generate_pet_data(pet_id=None, name=None, status="available"):
+    """Generate data for creating a pet"""
+    if pet_id is None:
+        pet_id = ids.next_id("pet")
+    if name is None:
+        name = f"TestPet_{pet_id}"
+
+    return {
+        "id": pet_id,
+        "name": name,
+        "category": {
+            "id": 1,
+            "name": "Dogs"
+        },
+        "photoUrls": [
+            "http://example.com/photo1.jpg",
+            "http://example.com/photo2.jpg"
+        ],
+        "tags": [
+            {"id": 1, "name": "tag1"},
+            {"id": 2, "name": "tag2"}
+        ],
+        "status": status
+    }
+
+
+def generate_order_data(order_id=None, pet_id=None, quantity=1, status="placed"):
+    """Generate data for creating an order"""
+    if order_id is None:
+        order_id = ids.next_id("order")
+    if pet_id is None:
+        pet_id = random.randint(1, 1000)
+
+    return {
+        "id": order_id,
+        "petId": pet_id,
+        "quantity": quantity,
+        "shipDate": ship_date(),
+        "status": status,
+        "complete": False
+    }
+
+
+def ship_date(days=1):
+    """Return a UTC ISO 8601 timestamp days from now, e.g. 2024-01-02T03:04:05.678901Z"""
+    return (datetime.now(timezone.utc) + timedelta(days=days)).replace(tzinfo=None).isoformat() + "Z"
+
+
+def generate_username(length=8):
+    """Generate a unique username
+
+    Starts with a worker-unique token and is padded with random
+    letters and digits up to length.
+    """
+    token = ids.next_token()
+    padding = max(length - len(token), 0)
+    return token + ''.join(random.choices(string.ascii_lowercase + string.digits, k=padding))
+
+
+def generate_user_data(username=None, user_id=None):
+    """Generate data for creating a user"""
+    if username is None:
+        username = f"testuser_{generate_username()}"
+    if user_id is None:
+        user_id = ids.next_id("user")
+
+    return {
+        "id": user_id,
+        "username": username,
+        "firstName": "John",
+        "lastName": "Doe",
+        "email": f"{username}@example.com",
+        "password": "SecurePassword123!",
+        "phone": "+1-555-123-4567",
+        "userStatus": 1
+    }
+
+
+# Bulk factories
+
+DICTS = "dicts"
+ITEMS = "items"
+ARRAY = "array"
+OUTPUTS = (DICTS, ITEMS, ARRAY)
+
+# Compact JSON, as produced by encode_json, with the constant fields serialized once.
+# Only ID-derived names and usernames are substituted, they never need escaping.
+_PET_TEMPLATE = (
+    '{"id":%d,"name":"TestPet_%d","category":{"id":1,"name":"Dogs"},'
+    '"photoUrls":["http://example.com/photo1.jpg","http://example.com/photo2.jpg"],'
+    '"tags":[{"id":1,"name":"tag1"},{"id":2,"name":"tag2"}],"status":%s}'
+)
+_ORDER_TEMPLATE = '{"id":%%d,"petId":%%d,"quantity":%d,"shipDate":%s,"status":%s,"complete":false}'
+_USER_TEMPLATE = (
+    '{"id":%d,"username":"%s","firstName":"John","lastName":"Doe","email":"%s@example.com",'
+    '"password":"SecurePassword123!","phone":"+1-555-123-4567","userStatus":1}'
+)
+
+
+def _emit(output, template, rows, build):
+    if output == DICTS:
+        return [build(*row) for row in rows]
+    if output == ITEMS:
+        return [(template % row).encode("utf-8") for row in rows]
+    if output == ARRAY:
+        return ("[" + ",".join([template % row for row in rows]) + "]").encode("utf-8")
+    raise ValueError(f"output must be one of {OUTPUTS}, got {output!r}")
+
+
+def _literal(value):
+    # JSON-encode a constant field once, escaped so it survives %-formatting
+    return json.dumps(value).replace("%", "%%")
+
+
+def _rng(seed):
+    # The module-level generator is reseeded per test, an explicit seed gives a private stream
+    return random if seed is None else random.Random(seed)
+
+
+def generate_pets(count, status="available", output=DICTS):
+    """Generate count pet payloads equal to calling generate_pet_data count times"""
+    pet_ids = ids.next_ids("pet", count)
+    template = _PET_TEMPLATE.replace("%s", _literal(status))
+
+    def build(pet_id, _):
+        return {
+            "id": pet_id,
+            "name": f"TestPet_{pet_id}",
+            "category": {"id": 1, "name": "Dogs"},
+            "photoUrls": ["http://example.com/photo1.jpg", "http://example.com/photo2.jpg"],
+            "tags": [{"id": 1, "name": "tag1"}, {"id": 2, "name": "tag2"}],
+            "status": status,
+        }
+
+    return _emit(output, template, [(pet_id, pet_id) for pet_id in pet_ids], build)
+
+
+def generate_orders(count, quantity=1, status="placed", max_pet_id=1000, seed=None, output=DICTS):
+    """Generate count order payloads with random pet IDs and one shared ship date"""
+    order_ids = ids.next_ids("order", count)
+    pet_ids = _rng(seed).choices(range(1, max_pet_id + 1), k=count)
+    shipped = ship_date()
+    template = _ORDER_TEMPLATE % (quantity, _literal(shipped), _literal(status))
+
+    def build(order_id, pet_id):
+        return {
+            "id": order_id,
+            "petId": pet_id,
+            "quantity": quantity,
+            "shipDate": shipped,
+            "status": status,
+            "complete": False,
+        }
+
+    return _emit(output, template, list(zip(order_ids, pet_ids)), build)
+
+
+def generate_usernames(count, length=8, seed=None):
+    """Generate count unique usernames like generate_username, drawing all padding at once"""
+    tokens = ids.next_tokens(count)
+    rng = _rng(seed)
+    padding = max(length - 6, 0)
+    # Draw up to three characters per choice from a table of all base36 strings of that width
+    parts = []
+    while padding:
+        width = min(padding, 3)
+        parts.append(rng.choices(ids.base36_table(width), k=count))
+        padding -= width
+    if not parts:
+        return tokens
+    if len(parts) == 1:
+        return [token + part for token, part in zip(tokens, parts[0])]
+    return ["".join(pieces) for pieces in zip(tokens, *parts)]
+
+
+def generate_users(count, seed=None, output=DICTS):
+    """Generate count user payloads equal to calling generate_user_data count times"""
+    user_ids = ids.next_ids("user", count)
+    usernames = ["testuser_" + username for username in generate_usernames(count, seed=seed)]
+
+    def build(user_id, username, _):
+        return {
+            "id": user_id,
+            "username": username,
+            "firstName": "John",
+            "lastName": "Doe",
+            "email": f"{username}@example.com",
+            "password": "SecurePassword123!",
+            "phone": "+1-555-123-4567",
+            "userStatus": 1,
+        }
+
+    rows = [(user_id, username, username) for user_id, username in zip(user_ids, usernames)]
+    return _emit(output, _USER_TEMPLATE, rows, build)
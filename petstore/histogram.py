@@ -0,0 +1,112 @@
+"""
+HDR-style latency histogram
+Log-linear buckets give a bounded relative error at any magnitude and merge losslessly
+"""
+import math
+
+
+# 2**SUB_BUCKET_BITS linear sub-buckets per power of two, under 1% relative error
+SUB_BUCKET_BITS = 8
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+
+def bucket_index(value):
+    """Return the bucket index of a non-negative integer value"""
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def bucket_bounds(index):
+    """Return the inclusive (low, high) values covered by a bucket"""
+    if index < SUB_BUCKET_COUNT:
+        return index, index
+    shift, offset = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+    shift += 1
+    low = (offset + SUB_BUCKET_HALF) << shift
+    return low, low + (1 << shift) - 1
+
+
+class LatencyHistogram:
+    """Histogram of durations recorded in microseconds"""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        """Record a duration given in seconds"""
+        self.record_value(max(int(seconds * 1_000_000), 0))
+
+    def record_value(self, micros, count=1):
+        """Record a duration given in whole microseconds"""
+        index = bucket_index(micros)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += micros * count
+        self.min = micros if self.min is None else min(self.min, micros)
+        self.max = micros if self.max is None else max(self.max, micros)
+
+    def merge(self, other):
+        """Add another histogram's samples to this one"""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, percent):
+        """Return the value in seconds at or below which percent of samples fall"""
+        if not self.count:
+            return 0.0
+        threshold = max(math.ceil(self.count * percent / 100), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= threshold:
+                # Highest value equivalent to the bucket, never above the real max
+                return min(bucket_bounds(index)[1], self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def mean(self):
+        """Return the mean in seconds"""
+        return self.total / self.count / 1_000_000 if self.count else 0.0
+
+    def summary(self):
+        """Return count and latency percentiles in seconds"""
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": (self.max or 0) / 1_000_000,
+        }
+
+    def to_dict(self):
+        """Return a JSON-serializable form that round-trips through from_dict"""
+        return {
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
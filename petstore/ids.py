@@ -0,0 +1,128 @@
+"""
+Collision-free resource IDs for parallel test runs
+Each worker process draws pet, order and user IDs from its own slice of the ID range
+"""
+import threading
+from functools import lru_cache
+
+
+# Inclusive ID ranges per resource kind, matching what the suites used before
+ID_RANGES = {
+    "pet": (1000, 999999),
+    "order": (1, 999999),
+    "user": (1, 999999),
+    "name": (0, 36 ** 6 - 1),
+}
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def to_base36(number):
+    """Encode a non-negative integer with lowercase letters and digits"""
+    encoded = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        encoded = _DIGITS[remainder] + encoded
+        if not number:
+            return encoded
+
+
+class IdAllocator:
+    """Hand out IDs from a worker-private slice of each range
+
+    Slices are disjoint across workers, so IDs never collide between
+    processes. The starting offset inside a slice is derived from the seed
+    so reruns with the same seed reproduce the same IDs.
+    """
+
+    def __init__(self, worker_index=0, worker_count=1, seed=0):
+        if not 0 <= worker_index < worker_count:
+            raise ValueError(f"worker_index must be in [0, {worker_count}), got {worker_index}")
+        self.worker_index = worker_index
+        self.worker_count = worker_count
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._offsets = {}
+
+    def slice_for(self, kind):
+        """Return the inclusive (low, high) range owned by this worker"""
+        low, high = ID_RANGES[kind]
+        size = (high - low + 1) // self.worker_count
+        start = low + self.worker_index * size
+        return start, start + size - 1
+
+    def _reserve(self, kind, count):
+        with self._lock:
+            offset = self._offsets.get(kind, 0)
+            self._offsets[kind] = offset + count
+        return offset
+
+    def next_id(self, kind):
+        """Return the next ID of a resource kind"""
+        offset = self._reserve(kind, 1)
+        low, high = self.slice_for(kind)
+        size = high - low + 1
+        # Wraps around only after the whole slice has been used
+        return low + (self.seed + offset) % size
+
+    def next_ids(self, kind, count):
+        """Return the next count IDs of a resource kind, reserved in one step"""
+        offset = self._reserve(kind, count)
+        low, high = self.slice_for(kind)
+        size = high - low + 1
+        start = (self.seed + offset) % size
+        allocated = []
+        while count:
+            taken = min(count, size - start)
+            allocated.extend(range(low + start, low + start + taken))
+            count -= taken
+            start = 0
+        return allocated
+
+    def next_token(self):
+        """Return a unique lowercase alphanumeric token"""
+        return to_base36(self.next_id("name")).rjust(6, "0")
+
+    def next_tokens(self, count):
+        """Return count unique tokens, equal to calling next_token count times"""
+        halves = base36_table(3)
+        return [halves[number // 46656] + halves[number % 46656] for number in self.next_ids("name", count)]
+
+
+@lru_cache(maxsize=None)
+def base36_table(width):
+    """Return every base36 string of width characters, in numeric order
+
+    With width 3 a six-character token is two table lookups instead of six divmods.
+    """
+    return [to_base36(number).rjust(width, "0") for number in range(36 ** width)]
+
+
+_allocator = IdAllocator()
+
+
+def configure(worker_index=0, worker_count=1, seed=0):
+    """Replace the process-wide allocator"""
+    global _allocator
+    _allocator = IdAllocator(worker_index, worker_count, seed)
+    return _allocator
+
+
+def next_id(kind):
+    """Return the next ID of a resource kind from the process-wide allocator"""
+    return _allocator.next_id(kind)
+
+
+def next_ids(kind, count):
+    """Return count IDs of a resource kind from the process-wide allocator"""
+    return _allocator.next_ids(kind, count)
+
+
+def next_token():
+    """Return a unique token from the process-wide allocator"""
+    return _allocator.next_token()
+
+
+def next_tokens(count):
+    """Return count unique tokens from the process-wide allocator"""
+    return _allocator.next_tokens(count)
@@ -0,0 +1,241 @@
+"""
+In-process transport from requests to the Petstore app, no sockets involved
+WSGIApp and ASGIApp expose PetstoreApp through the standard server interfaces,
+InProcessAdapter calls either of them directly from a requests.Session
+
+    client = PetstoreClient(INPROCESS_URL, adapter_class=InProcessAdapter, app=WSGIApp())
+
+Responses are built by HTTPAdapter.build_response around a urllib3 response
+over the body bytes, so streaming, encodings and cookies behave as over HTTP.
+"""
+import asyncio
+import inspect
+import io
+import sys
+import threading
+import time
+from http import HTTPStatus
+from urllib.parse import quote, unquote, unquote_to_bytes, urlsplit
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from petstore.app import PetstoreApp
+from petstore.server import BASE_PATH
+
+
+INPROCESS_URL = f"http://petstore.inprocess{BASE_PATH}"
+
+
+def _reason(status):
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ""
+
+
+def _api_path(path, base_path):
+    if base_path and path.startswith(base_path):
+        path = path[len(base_path):]
+    return path or "/"
+
+
+class WSGIApp:
+    """WSGI application serving PetstoreApp under base_path"""
+
+    def __init__(self, app=None, base_path=BASE_PATH):
+        self.app = app if app is not None else PetstoreApp()
+        self.base_path = base_path
+
+    def __call__(self, environ, start_response):
+        headers = {
+            key[5:].replace("_", "-").lower(): value for key, value in environ.items() if key.startswith("HTTP_")
+        }
+        for key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            if environ.get(key):
+                headers[key.replace("_", "-").lower()] = environ[key]
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        body = environ["wsgi.input"].read(length) if length else b""
+        # PATH_INFO is decoded, PetstoreApp.handle expects the path as sent
+        path = quote(environ.get("PATH_INFO", "").encode("latin-1"))
+        status, response_headers, payload = self.app.handle(
+            environ["REQUEST_METHOD"], _api_path(path, self.base_path), environ.get("QUERY_STRING", ""),
+            headers, body,
+        )
+        start_response(
+            f"{status} {_reason(status)}", response_headers + [("Content-Length", str(len(payload)))]
+        )
+        return [payload]
+
+
+class ASGIApp:
+    """ASGI 3 application serving PetstoreApp under base_path"""
+
+    def __init__(self, app=None, base_path=BASE_PATH):
+        self.app = app if app is not None else PetstoreApp()
+        self.base_path = base_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            raise ValueError(f"unsupported ASGI scope type {scope['type']!r}")
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        raw_path = scope.get("raw_path")
+        path = raw_path.decode("latin-1") if raw_path else quote(scope["path"])
+        status, response_headers, payload = self.app.handle(
+            scope["method"], _api_path(path, self.base_path), scope.get("query_string", b"").decode("latin-1"),
+            {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]},
+            b"".join(chunks),
+        )
+        headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response_headers]
+        headers.append((b"content-length", str(len(payload)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": payload})
+
+
+def is_asgi(app):
+    """Return whether app is an ASGI callable rather than a WSGI one"""
+    call = app if inspect.isfunction(app) or inspect.ismethod(app) else getattr(app, "__call__", None)
+    return inspect.iscoroutinefunction(call)
+
+
+def _body_bytes(body):
+    if body is None:
+        return b""
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body)
+    if hasattr(body, "read"):
+        return body.read()
+    # Streamed bodies may release each chunk once the next one is requested
+    return b"".join(bytes(chunk) for chunk in body)
+
+
+class InProcessAdapter(HTTPAdapter):
+    """Transport adapter dispatching every request to a WSGI or ASGI app in the calling thread
+
+    ASGI apps run on one event loop per calling thread. Responses carry
+    response.timings with ttfb, the time spent in the app.
+    """
+
+    def __init__(self, app=None, **kwargs):
+        self.app = app if app is not None else WSGIApp()
+        self.asgi = is_asgi(self.app)
+        self._local = threading.local()
+        self._loops = []
+        self._loops_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        url = urlsplit(request.url)
+        body = _body_bytes(request.body)
+        started = time.perf_counter()
+        if self.asgi:
+            status, headers, payload = self._call_asgi(request, url, body)
+        else:
+            status, headers, payload = self._call_wsgi(request, url, body)
+        elapsed = time.perf_counter() - started
+        raw = HTTPResponse(
+            body=io.BytesIO(payload), headers=headers, status=status, reason=_reason(status),
+            preload_content=False, request_method=request.method, request_url=request.url,
+        )
+        response = self.build_response(request, raw)
+        response.timings = {"ttfb": elapsed}
+        return response
+
+    def _call_wsgi(self, request, url, body):
+        environ = {
+            "REQUEST_METHOD": request.method,
+            "SCRIPT_NAME": "",
+            # Percent-decoded bytes as latin-1, per PEP 3333
+            "PATH_INFO": unquote_to_bytes(url.path).decode("latin-1"),
+            "QUERY_STRING": url.query,
+            "SERVER_NAME": url.hostname or "localhost",
+            "SERVER_PORT": str(url.port or (443 if url.scheme == "https" else 80)),
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": url.scheme,
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in request.headers.items():
+            key = name.upper().replace("-", "_")
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                key = "HTTP_" + key
+            environ[key] = value
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [int(status.split(" ", 1)[0]), headers]
+
+        result = self.app(environ, start_response)
+        try:
+            payload = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return started[0], started[1], payload
+
+    def _call_asgi(self, request, url, body):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": request.method,
+            "scheme": url.scheme,
+            "path": unquote(url.path),
+            "raw_path": url.path.encode("latin-1"),
+            "query_string": url.query.encode("latin-1"),
+            "root_path": "",
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                        for name, value in request.headers.items()],
+            "server": (url.hostname or "localhost", url.port or 80),
+        }
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        sent = []
+
+        async def receive():
+            return messages.pop() if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        self._loop().run_until_complete(self.app(scope, receive, send))
+        start = next(message for message in sent if message["type"] == "http.response.start")
+        payload = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+        headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in start.get("headers", ())]
+        return start["status"], headers, payload
+
+    def _loop(self):
+        loop = getattr(self._local, "loop", None)
+        if loop is None:
+            loop = self._local.loop = asyncio.new_event_loop()
+            with self._loops_lock:
+                self._loops.append(loop)
+        return loop
+
+    def close(self):
+        super().close()
+        with self._loops_lock:
+            loops, self._loops = self._loops, []
+        for loop in loops:
+            if not loop.is_running():
+                loop.close()
+
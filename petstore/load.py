@@ -0,0 +1,264 @@
+"""
+Open-loop load generation against any Petstore base URL
+Reuses the payload factories of the test suites to drive sustained traffic
+
+Usage:
+    python -m petstore.load --base-url local --rate create_pet=50 --rate get_inventory=200 --duration 10
+"""
+import argparse
+import heapq
+import json
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from petstore.factories import generate_orders, generate_pets, generate_users
+from petstore.histogram import LatencyHistogram
+from petstore.templates import BodyStream
+
+
+DEFAULT_CONCURRENCY = 32
+
+
+def templated(method, path, body=None, **template_kwargs):
+    """Return an endpoint call sending a RequestTemplate built once per client
+
+    body, when given, is called for every request and returns the bytes to send.
+    """
+    templates = weakref.WeakKeyDictionary()
+    lock = threading.Lock()
+
+    def call(client):
+        template = templates.get(client)
+        if template is None:
+            with lock:
+                template = templates.get(client)
+                if template is None:
+                    template = templates[client] = client.template(method, path, **template_kwargs)
+        return template.send(body() if body is not None else None)
+
+    return call
+
+
+# Named calls a load run can target, each sends one request through a client.
+# Requests are prepared once per endpoint and bodies pre-serialized in batches.
+ENDPOINTS = {
+    "create_pet": templated("POST", "/pet", BodyStream(generate_pets)),
+    "find_pets_by_status": templated("GET", "/pet/findByStatus", params={"status": "available"}),
+    "find_pets_by_tags": templated("GET", "/pet/findByTags", params={"tags": "tag1"}),
+    "place_order": templated("POST", "/store/order", BodyStream(generate_orders)),
+    "get_inventory": templated("GET", "/store/inventory"),
+    "create_user": templated("POST", "/user", BodyStream(generate_users)),
+    "login": templated("GET", "/user/login", params={"username": "loaduser", "password": "secret"}),
+}
+
+
+def is_success(response):
+    return response.status_code < 400
+
+
+class EndpointLoad:
+    """Counters and latency histograms for one endpoint of a load run"""
+
+    def __init__(self, name, call, rate):
+        self.name = name
+        self.call = call
+        self.rate = rate
+        self.requests = 0
+        self.errors = 0
+        # From the scheduled send time, so queueing delay is not hidden
+        self.latency = LatencyHistogram()
+        # From the actual send time
+        self.service = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    def fire(self, client, scheduled, ok=is_success):
+        started = time.perf_counter()
+        try:
+            failed = not ok(self.call(client))
+        except Exception:
+            failed = True
+        finished = time.perf_counter()
+        with self._lock:
+            self.requests += 1
+            self.errors += failed
+            self.latency.record(finished - scheduled)
+            self.service.record(finished - started)
+
+    def summary(self, elapsed):
+        return {
+            "target_rps": self.rate,
+            "achieved_rps": self.requests / elapsed if elapsed else 0.0,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": self.errors / self.requests if self.requests else 0.0,
+            "latency": self.latency.summary(),
+            "service": self.service.summary(),
+        }
+
+    def to_dict(self):
+        return {
+            "rate": self.rate,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency": self.latency.to_dict(),
+            "service": self.service.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, name, data):
+        load = cls(name, None, data["rate"])
+        load.requests = data["requests"]
+        load.errors = data["errors"]
+        load.latency = LatencyHistogram.from_dict(data["latency"])
+        load.service = LatencyHistogram.from_dict(data["service"])
+        return load
+
+    def merge(self, other):
+        """Add another run's share of this endpoint, rates add up"""
+        self.rate += other.rate
+        self.requests += other.requests
+        self.errors += other.errors
+        self.latency.merge(other.latency)
+        self.service.merge(other.service)
+        return self
+
+
+class LoadReport:
+    """Result of a load run"""
+
+    def __init__(self, loads, elapsed):
+        self.loads = loads
+        self.elapsed = elapsed
+
+    def summary(self):
+        return {name: load.summary(self.elapsed) for name, load in sorted(self.loads.items())}
+
+    def format_lines(self):
+        lines = [
+            f"{'endpoint':<22} {'target/s':>9} {'actual/s':>9} {'errors':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        ]
+        for name, stats in self.summary().items():
+            latency = stats["latency"]
+            lines.append(
+                f"{name:<22} {stats['target_rps']:>9.1f} {stats['achieved_rps']:>9.1f} "
+                f"{stats['error_rate']:>7.1%} {latency['p50'] * 1000:>8.2f} "
+                f"{latency['p95'] * 1000:>8.2f} {latency['p99'] * 1000:>8.2f}"
+            )
+        return lines
+
+    def to_dict(self):
+        return {
+            "elapsed": self.elapsed,
+            "summary": self.summary(),
+            "histograms": {name: load.to_dict() for name, load in self.loads.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        loads = {name: EndpointLoad.from_dict(name, load) for name, load in data["histograms"].items()}
+        return cls(loads, data["elapsed"])
+
+    @classmethod
+    def merged(cls, reports):
+        """Combine reports of concurrent runs, e.g. one per worker process, without losing samples"""
+        loads = {}
+        elapsed = 0.0
+        for report in reports:
+            elapsed = max(elapsed, report.elapsed)
+            for name, load in report.loads.items():
+                if name in loads:
+                    loads[name].merge(load)
+                else:
+                    loads[name] = EndpointLoad.from_dict(name, load.to_dict())
+        return cls(loads, elapsed)
+
+
+def run_load(client, rates, duration, concurrency=DEFAULT_CONCURRENCY, endpoints=None, ok=is_success, phase=0.0):
+    """Send requests at fixed per-endpoint rates for duration seconds
+
+    Open loop: requests are issued on schedule whether or not earlier ones
+    finished, so a slow server shows up as latency instead of lower offered load.
+    phase, in [0, 1), delays the first request of each endpoint by that fraction
+    of its interval, so runs splitting a rate between them interleave evenly.
+    """
+    endpoints = ENDPOINTS if endpoints is None else endpoints
+    unknown = sorted(set(rates) - set(endpoints))
+    if unknown:
+        raise ValueError(f"Unknown endpoints {unknown}, expected some of {sorted(endpoints)}")
+    loads = {name: EndpointLoad(name, endpoints[name], rate) for name, rate in rates.items() if rate > 0}
+    # (offset, name, sent): offsets are computed from the count, not accumulated, so they do not drift
+    schedule = [(phase / load.rate, name, 0) for name, load in loads.items()]
+    heapq.heapify(schedule)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="petstore-load") as executor:
+        start = time.perf_counter()
+        while schedule:
+            offset, name, sent = schedule[0]
+            if offset >= duration:
+                heapq.heappop(schedule)
+                continue
+            delay = offset - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+                continue
+            heapq.heapreplace(schedule, ((sent + 1 + phase) / loads[name].rate, name, sent + 1))
+            executor.submit(loads[name].fire, client, start + offset, ok)
+    return LoadReport(loads, time.perf_counter() - start)
+
+
+def parse_rate(value):
+    name, _, rate = value.partition("=")
+    try:
+        return name, float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected ENDPOINT=RPS, got {value!r}")
+
+
+def main(argv=None):
+    from petstore.cache import ResponseCache
+    from petstore.distributed import make_client, run_distributed
+    from petstore.server import PetstoreServer
+
+    parser = argparse.ArgumentParser(description="Drive open-loop load against a Petstore API")
+    parser.add_argument("--base-url", default="local",
+                        help="API base URL, 'local' for a server in this process or 'wsgi'/'asgi' for no sockets")
+    parser.add_argument("--rate", type=parse_rate, action="append", required=True, metavar="ENDPOINT=RPS",
+                        help=f"Target rate per endpoint, one of: {', '.join(sorted(ENDPOINTS))}")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load (default: 10)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Maximum requests in flight per process (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes sharing the rates, 0 for one per core (default: 1)")
+    parser.add_argument("--cache-ttl", type=float, default=None, metavar="SECONDS",
+                        help="Serve repeated GETs from a client-side cache for SECONDS (default: off)")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+    if args.workers != 1 and args.cache_ttl is not None:
+        parser.error("--cache-ttl needs --workers 1, caches are per process")
+
+    server = PetstoreServer().start() if args.base_url == "local" else None
+    base_url = server.url if server is not None else args.base_url
+    cache = None
+    try:
+        if args.workers != 1:
+            report = run_distributed(base_url, dict(args.rate), args.duration, args.workers, args.concurrency)
+        else:
+            cache = ResponseCache(ttl=args.cache_ttl) if args.cache_ttl is not None else None
+            with make_client(base_url, args.concurrency, cache=cache) as client:
+                report = run_load(client, dict(args.rate), args.duration, args.concurrency)
+    finally:
+        if server is not None:
+            server.stop()
+    print("\n".join(report.format_lines()))
+    if cache is not None:
+        print("cache: " + ", ".join(f"{name}={value}" for name, value in cache.stats().items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as report_file:
+            json.dump(report.to_dict(), report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
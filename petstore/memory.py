@@ -0,0 +1,210 @@
+"""
+Per-test memory profiling with tracemalloc
+Each test's call phase runs with fresh traces, so the numbers cover what the
+test itself allocated, not fixtures set up before it
+
+peak is the most memory the test's allocations held at once, net what they
+still hold when it returns, and the allocation sites are those of the net
+memory, i.e. what the test left behind in caches, pools or leaks.
+Tracing is process-wide, so allocations of background threads running during
+a test, such as the session's server, are counted with it.
+Sizes are given as bytes or with a binary suffix, e.g. "64MiB", "512K" or "1.5G".
+"""
+import html
+import re
+import tracemalloc
+
+import pytest
+
+
+DEFAULT_TOP = 5
+
+# Frames stored per allocation, sites are grouped by the innermost one
+TRACEBACK_FRAMES = 1
+
+# Key of the usage in report.user_properties, which xdist sends to the controller
+USER_PROPERTY = "petstore_memory"
+
+_SIZE = re.compile(r"^\s*(?P<value>[0-9]+(?:\.[0-9]*)?)\s*(?:(?P<unit>[KMG])(?:i?B)?|B)?\s*$", re.IGNORECASE)
+_UNITS = {None: 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+# Allocations by the profiler and the test runner themselves
+_IGNORED = (tracemalloc.__file__, "*/_pytest/*", "*/pluggy/*", __file__)
+
+
+def parse_size(text):
+    """Return bytes for a size such as '64MiB', '512K' or '1000'"""
+    match = _SIZE.match(str(text))
+    if match is None:
+        raise ValueError(f"expected a size such as '64MiB' or '512K', got {text!r}")
+    unit = match["unit"].upper() if match["unit"] else None
+    return int(float(match["value"]) * _UNITS[unit])
+
+
+def format_size(size):
+    """Return a size in bytes as text with a binary unit, e.g. '1.5 MiB'"""
+    if abs(size) < 1024:
+        return f"{size} B"
+    for unit in ("KiB", "MiB"):
+        size /= 1024
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GiB"
+
+
+class MemoryUsage:
+    """Peak and net allocations of one test and the sites of its net allocations"""
+
+    def __init__(self, nodeid, peak, net, sites=(), budget=None):
+        self.nodeid = nodeid
+        self.peak = peak
+        self.net = net
+        # (file:line, bytes, blocks), largest first
+        self.sites = [tuple(site) for site in sites]
+        self.budget = budget
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.peak > self.budget
+
+    def to_dict(self):
+        return {"peak": self.peak, "net": self.net, "sites": self.sites, "budget": self.budget}
+
+    @classmethod
+    def from_dict(cls, nodeid, data):
+        return cls(nodeid, data["peak"], data["net"], data["sites"], data.get("budget"))
+
+    def format_lines(self):
+        budget = f", budget {format_size(self.budget)}" if self.budget is not None else ""
+        lines = [f"peak {format_size(self.peak)}, net {format_size(self.net)}{budget}"]
+        lines.extend(f"{format_size(size):>10} in {count:>6} blocks at {site}" for site, size, count in self.sites)
+        return lines
+
+
+def reset():
+    """Discard traces and the peak so far, tracemalloc must be tracing"""
+    tracemalloc.clear_traces()
+
+
+def usage_since_reset(nodeid, top=DEFAULT_TOP, budget=None):
+    """Return the MemoryUsage of allocations since the last reset()"""
+    net, peak = tracemalloc.get_traced_memory()
+    sites = []
+    if top:
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED]
+        )
+        sites = [
+            (f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", stat.size, stat.count)
+            for stat in snapshot.statistics("lineno")[:top]
+        ]
+    return MemoryUsage(nodeid, peak, net, sites, budget)
+
+
+class MemoryProfiler:
+    """pytest plugin measuring each test's call phase and failing tests over their memory budget
+
+    budget is in bytes, None for no budget, and a memory_budget("64MiB") marker
+    overrides it per test. With trace=False, e.g. on the xdist controller, it
+    only collects the usage sent along with the reports.
+    """
+
+    def __init__(self, top=DEFAULT_TOP, budget=None, trace=True):
+        self.top = top
+        self.budget = budget
+        self.trace = trace
+        self.usage = {}
+        self._started = False
+
+    def start(self):
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_FRAMES)
+            self._started = True
+
+    def stop(self):
+        if self._started:
+            tracemalloc.stop()
+            self._started = False
+
+    def budget_of(self, item):
+        marker = item.get_closest_marker("memory_budget")
+        return parse_size(marker.args[0]) if marker is not None else self.budget
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_call(self, item):
+        if not self.trace or not tracemalloc.is_tracing():
+            return (yield)
+        reset()
+        try:
+            return (yield)
+        finally:
+            usage = usage_since_reset(item.nodeid, self.top, self.budget_of(item))
+            item.user_properties.append((USER_PROPERTY, usage.to_dict()))
+            item.add_report_section("call", "memory", "\n".join(usage.format_lines()))
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        report = yield
+        if call.when == "call" and report.passed:
+            usage = usage_of(report)
+            if usage is not None and usage.over_budget:
+                report.outcome = "failed"
+                # The allocation sites follow in the report's memory section
+                report.longrepr = (
+                    f"{item.nodeid} exceeded its memory budget: peak {format_size(usage.peak)} "
+                    f"> {format_size(usage.budget)}"
+                )
+        return report
+
+    def pytest_runtest_logreport(self, report):
+        usage = usage_of(report) if report.when == "call" else None
+        if usage is not None:
+            self.usage[report.nodeid] = usage
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_html_results_table_header(self, cells):
+        cells.insert(2, "<th class=\"sortable\" data-column-type=\"peak\">Peak memory</th>")
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_html_results_table_row(self, report, cells):
+        usage = usage_of(report)
+        cells.insert(2, f"<td class=\"col-peak\">{'' if usage is None else format_size(usage.peak)}</td>")
+
+    def largest(self, count=10):
+        """Return the usage of the count tests with the highest peak"""
+        return sorted(self.usage.values(), key=lambda usage: -usage.peak)[:count]
+
+    def over_budget(self):
+        return [usage for usage in self.usage.values() if usage.over_budget]
+
+    def format_table(self, count=10):
+        lines = [f"{'peak':>10} {'net':>10}  test"]
+        for usage in self.largest(count):
+            flag = "  OVER BUDGET" if usage.over_budget else ""
+            lines.append(f"{format_size(usage.peak):>10} {format_size(usage.net):>10}  {usage.nodeid}{flag}")
+        return lines
+
+    def to_html(self, count=10):
+        """Return an HTML table of the tests with the highest peak and their allocation sites"""
+        rows = []
+        for usage in self.largest(count):
+            sites = "<br>".join(
+                html.escape(f"{format_size(size)} in {blocks} blocks at {site}") for site, size, blocks in usage.sites
+            )
+            style = " style=\"color: red\"" if usage.over_budget else ""
+            rows.append(
+                f"<tr{style}><td>{html.escape(usage.nodeid)}</td><td>{format_size(usage.peak)}</td>"
+                f"<td>{format_size(usage.net)}</td><td>{sites}</td></tr>"
+            )
+        return (
+            "<h2>Test memory</h2><table id=\"petstore-memory\">"
+            f"<tr><th>test</th><th>peak</th><th>net</th><th>net allocation sites</th></tr>{''.join(rows)}</table>"
+        )
+
+
+def usage_of(report):
+    """Return the MemoryUsage recorded with a test report, or None"""
+    for name, value in report.user_properties:
+        if name == USER_PROPERTY:
+            return MemoryUsage.from_dict(report.nodeid, value)
+    return None
@@ -0,0 +1,310 @@
+"""
+Per-endpoint transport metrics for the Petstore client
+Records DNS, connect, TLS, TTFB and total time per endpoint template in latency histograms
+"""
+import html
+import json
+import re
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+from petstore.histogram import LatencyHistogram
+
+
+PHASES = ("dns", "connect", "tls", "ttfb", "total")
+
+# Body sizes before and after content coding, counted by PetstoreClient
+BYTE_COUNTERS = ("request_bytes", "request_wire_bytes", "response_bytes", "response_wire_bytes")
+
+# Most specific first, paths are relative to the API base path
+ENDPOINT_TEMPLATES = [
+    (re.compile(r"^/pet/findByStatus$"), "/pet/findByStatus"),
+    (re.compile(r"^/pet/findByTags$"), "/pet/findByTags"),
+    (re.compile(r"^/pet/[^/]+/uploadImage$"), "/pet/{petId}/uploadImage"),
+    (re.compile(r"^/pet/[^/]+$"), "/pet/{petId}"),
+    (re.compile(r"^/store/order/[^/]+$"), "/store/order/{orderId}"),
+    (re.compile(r"^/user/(login|logout|createWithList|createWithArray)$"), None),
+    (re.compile(r"^/user/[^/]+$"), "/user/{username}"),
+]
+
+_local = threading.local()
+
+
+def endpoint_template(path):
+    """Return the endpoint template of an API path, e.g. /pet/{petId}"""
+    path = path.split("?", 1)[0].rstrip("/") or "/"
+    for pattern, template in ENDPOINT_TEMPLATES:
+        if pattern.match(path):
+            return template or path
+    return path
+
+
+def endpoint_key(method, path):
+    """Return the metrics key of a request, e.g. GET /pet/{petId}"""
+    return f"{method} {endpoint_template(path)}"
+
+
+def _current_timing():
+    return getattr(_local, "timing", None)
+
+
+class _TimedConnectionMixin:
+    """Time name resolution and TCP connect of new connections"""
+
+    def _new_conn(self):
+        timing = _current_timing()
+        started = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(
+                self._dns_host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        sock = self._connect_resolved(addresses)
+        if timing is not None:
+            timing["dns"] = resolved - started
+            timing["connect"] = time.perf_counter() - resolved
+        return sock
+
+    def _connect_resolved(self, addresses):
+        """Connect to each resolved address in turn, as urllib3 would after its own lookup"""
+        # urllib3 resolves _dns_host again, a numeric address needs no lookup
+        dns_host = self._dns_host
+        error = NewConnectionError(self, "Failed to establish a new connection: getaddrinfo returned no addresses")
+        try:
+            for *_, sockaddr in addresses:
+                self._dns_host = sockaddr[0]
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    error = e
+        finally:
+            self._dns_host = dns_host
+        raise error
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        timing = _current_timing()
+        if timing is not None:
+            elapsed = time.perf_counter() - started
+            timing["tls"] = max(elapsed - timing.get("dns", 0) - timing.get("connect", 0), 0)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """HTTPAdapter that attaches phase timings to every response as response.timings"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _local.timing = timing = {}
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            _local.timing = None
+        # The adapter returns once headers are parsed, the body is read later
+        timing["ttfb"] = time.perf_counter() - started
+        response.timings = timing
+        return response
+
+
+def _transfer_line(endpoint, counts):
+    size = counts["request_bytes"] + counts["response_bytes"]
+    wire_size = counts["request_wire_bytes"] + counts["response_wire_bytes"]
+    saved = 1 - wire_size / size if size else 0.0
+    return (
+        f"{endpoint:<40} {counts['request_bytes'] / 1024:>9.1f} {counts['request_wire_bytes'] / 1024:>9.1f} "
+        f"{counts['response_bytes'] / 1024:>12.1f} {counts['response_wire_bytes'] / 1024:>9.1f} {saved:>6.0%}"
+    )
+
+
+class Metrics:
+    """Thread-safe registry of per-endpoint phase histograms and event counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self._counters = {}
+        self._transfer = {}
+
+    def record(self, method, path, timings):
+        """Record phase durations in seconds for a request to an API path"""
+        endpoint = endpoint_key(method, path)
+        with self._lock:
+            histograms = self._endpoints.get(endpoint)
+            if histograms is None:
+                histograms = self._endpoints[endpoint] = {}
+            for phase, seconds in timings.items():
+                histogram = histograms.get(phase)
+                if histogram is None:
+                    histogram = histograms[phase] = LatencyHistogram()
+                histogram.record(seconds)
+
+    def increment(self, method, path, counter, amount=1):
+        """Count an event for a request to an API path, e.g. a hedged duplicate"""
+        endpoint = endpoint_key(method, path)
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {})
+            counters[counter] = counters.get(counter, 0) + amount
+
+    def counters(self):
+        """Return {endpoint: {counter: count}}"""
+        with self._lock:
+            return {endpoint: dict(counters) for endpoint, counters in sorted(self._counters.items())}
+
+    def add_bytes(self, method, path, counter, amount):
+        """Add to one of BYTE_COUNTERS for a request to an API path"""
+        endpoint = endpoint_key(method, path)
+        with self._lock:
+            counts = self._transfer.get(endpoint)
+            if counts is None:
+                counts = self._transfer[endpoint] = dict.fromkeys(BYTE_COUNTERS, 0)
+            counts[counter] += amount
+
+    def transfer(self):
+        """Return {endpoint: {byte counter: bytes}} for endpoints that sent or received bodies"""
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in sorted(self._transfer.items())}
+
+    def histogram(self, endpoint, phase="total"):
+        """Return the histogram of an endpoint phase, e.g. ("GET /pet/{petId}", "total")"""
+        with self._lock:
+            return self._endpoints.get(endpoint, {}).get(phase)
+
+    def endpoints(self):
+        with self._lock:
+            return sorted(self._endpoints)
+
+    def merge(self, other):
+        """Merge another Metrics instance or its to_dict() form"""
+        data = other.to_dict() if isinstance(other, Metrics) else other
+        with self._lock:
+            for endpoint, phases in data["histograms"].items():
+                histograms = self._endpoints.setdefault(endpoint, {})
+                for phase, histogram_data in phases.items():
+                    histograms.setdefault(phase, LatencyHistogram()).merge(
+                        LatencyHistogram.from_dict(histogram_data)
+                    )
+            for endpoint, counts in data.get("counters", {}).items():
+                counters = self._counters.setdefault(endpoint, {})
+                for counter, count in counts.items():
+                    counters[counter] = counters.get(counter, 0) + count
+            for endpoint, counts in data.get("transfer", {}).items():
+                transfer = self._transfer.setdefault(endpoint, dict.fromkeys(BYTE_COUNTERS, 0))
+                for counter, count in counts.items():
+                    transfer[counter] = transfer.get(counter, 0) + count
+        return self
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "histograms": {
+                    endpoint: {phase: histogram.to_dict() for phase, histogram in phases.items()}
+                    for endpoint, phases in self._endpoints.items()
+                },
+                "counters": {endpoint: dict(counters) for endpoint, counters in self._counters.items()},
+                "transfer": {endpoint: dict(counts) for endpoint, counts in self._transfer.items()},
+            }
+
+    def summary(self):
+        """Return {endpoint: {phase: percentiles}} with durations in seconds"""
+        with self._lock:
+            return {
+                endpoint: {phase: phases[phase].summary() for phase in PHASES if phase in phases}
+                for endpoint, phases in sorted(self._endpoints.items())
+            }
+
+    def write_json(self, path):
+        """Write the summary, counters and raw histograms to a JSON file"""
+        with open(path, "w", encoding="utf-8") as metrics_file:
+            json.dump({"summary": self.summary(), **self.to_dict()}, metrics_file, indent=2)
+
+    def format_table(self):
+        """Return total-time percentiles per endpoint as text lines"""
+        lines = [f"{'endpoint':<40} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+        for endpoint, phases in self.summary().items():
+            total = phases.get("total")
+            if total is None:
+                continue
+            lines.append(
+                f"{endpoint:<40} {total['count']:>6} {total['p50'] * 1000:>8.2f} "
+                f"{total['p95'] * 1000:>8.2f} {total['p99'] * 1000:>8.2f}"
+            )
+        return lines
+
+    def format_transfer_table(self):
+        """Return body sizes per endpoint and the share saved by compression as text lines"""
+        lines = [f"{'endpoint':<40} {'sent KiB':>9} {'wire':>9} {'received KiB':>12} {'wire':>9} {'saved':>6}"]
+        totals = dict.fromkeys(BYTE_COUNTERS, 0)
+        for endpoint, counts in self.transfer().items():
+            lines.append(_transfer_line(endpoint, counts))
+            for counter in BYTE_COUNTERS:
+                totals[counter] += counts[counter]
+        lines.append(_transfer_line("total", totals))
+        return lines
+
+    def to_html(self):
+        """Return an HTML table of phase percentiles per endpoint"""
+        header = "".join(f"<th>{phase} p50/p95/p99 ms</th>" for phase in PHASES)
+        counters = self.counters()
+        names = sorted({name for counts in counters.values() for name in counts})
+        header += "".join(f"<th>{html.escape(name)}</th>" for name in names)
+        rows = []
+        for endpoint, phases in self.summary().items():
+            cells = []
+            for phase in PHASES:
+                stats = phases.get(phase)
+                cells.append(
+                    "<td>-</td>" if stats is None else
+                    f"<td>{stats['p50'] * 1000:.2f} / {stats['p95'] * 1000:.2f} / {stats['p99'] * 1000:.2f}</td>"
+                )
+            counts = counters.get(endpoint, {})
+            cells.extend(f"<td>{counts.get(name, 0)}</td>" for name in names)
+            count = phases.get("total", {}).get("count", 0)
+            rows.append(f"<tr><td>{html.escape(endpoint)}</td><td>{count}</td>{''.join(cells)}</tr>")
+        tables = (
+            "<h2>Endpoint latency</h2><table id=\"petstore-metrics\">"
+            f"<tr><th>endpoint</th><th>requests</th>{header}</tr>{''.join(rows)}</table>"
+        )
+        transfer = self.transfer()
+        if transfer:
+            rows = "".join(
+                f"<tr><td>{html.escape(endpoint)}</td>"
+                + "".join(f"<td>{counts[counter]}</td>" for counter in BYTE_COUNTERS) + "</tr>"
+                for endpoint, counts in transfer.items()
+            )
+            header = "".join(f"<th>{counter}</th>" for counter in BYTE_COUNTERS)
+            tables += (
+                "<h2>Body sizes before and after content coding</h2><table id=\"petstore-transfer\">"
+                f"<tr><th>endpoint</th>{header}</tr>{rows}</table>"
+            )
+        return tables
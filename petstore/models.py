@@ -0,0 +1,176 @@
+"""
+Typed models of the Petstore v2 schema
+Validators are built on first use, or ahead of it by REGISTRY.warm_in_background(),
+and validate raw response bytes in a single pass
+
+Models (Pet, Order, User, ...) are for single objects and serialization. Bulk
+validators such as PET_LIST check large arrays against the same schema but
+produce plain dicts, because instantiating a model per item costs more than
+json.loads plus manual asserts.
+"""
+import threading
+import time
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict, TypeAdapter, with_config
+from pydantic.alias_generators import to_camel
+from typing_extensions import TypedDict
+
+
+# Build pydantic-core schemas on first validation instead of at class or adapter creation
+DEFERRED = ConfigDict(defer_build=True)
+
+
+class ModelRegistry:
+    """Models and bulk validators of the schema, built lazily and warmable in the background"""
+
+    def __init__(self):
+        self.models = {}
+        self.adapters = {}
+        self._lock = threading.Lock()
+        self._warming = None
+
+    def model(self, cls):
+        """Class decorator registering a model"""
+        self.models[cls.__name__] = cls
+        return cls
+
+    def adapter(self, name, annotation):
+        """Register and return a deferred TypeAdapter for annotation"""
+        # Classes such as the records below carry their own config
+        config = None if isinstance(annotation, type) else DEFERRED
+        adapter = self.adapters[name] = TypeAdapter(annotation, config=config)
+        return adapter
+
+    def built(self):
+        """Return whether each registered model and adapter has its validator built"""
+        built = {name: bool(model.__pydantic_complete__) for name, model in self.models.items()}
+        built.update((name, adapter.pydantic_complete) for name, adapter in self.adapters.items())
+        return built
+
+    def warm(self):
+        """Build every validator not built yet and return the seconds spent"""
+        started = time.perf_counter()
+        with self._lock:
+            for model in self.models.values():
+                if not model.__pydantic_complete__:
+                    model.model_rebuild()
+            for adapter in self.adapters.values():
+                if not adapter.pydantic_complete:
+                    adapter.rebuild()
+        return time.perf_counter() - started
+
+    def warm_in_background(self):
+        """Start warming in a daemon thread once and return the thread
+
+        A validator used before the thread reaches it is built by the caller,
+        possibly twice, but both builds produce the same validator.
+        """
+        with self._lock:
+            if self._warming is None:
+                self._warming = threading.Thread(target=self.warm, name="petstore-models-warm", daemon=True)
+                self._warming.start()
+            return self._warming
+
+
+REGISTRY = ModelRegistry()
+
+
+class PetstoreModel(BaseModel):
+    """Base model using the API's camelCase field names"""
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True, defer_build=True)
+
+
+@REGISTRY.model
+class Category(PetstoreModel):
+    id: int | None = None
+    name: str | None = None
+
+
+@REGISTRY.model
+class Tag(PetstoreModel):
+    id: int | None = None
+    name: str | None = None
+
+
+@REGISTRY.model
+class Pet(PetstoreModel):
+    id: int | None = None
+    category: Category | None = None
+    name: str | None = None
+    photo_urls: list[str] = []
+    tags: list[Tag] = []
+    status: str | None = None
+
+
+@REGISTRY.model
+class Order(PetstoreModel):
+    id: int | None = None
+    pet_id: int | None = None
+    quantity: int | None = None
+    ship_date: datetime | None = None
+    status: str | None = None
+    complete: bool = False
+
+
+@REGISTRY.model
+class User(PetstoreModel):
+    id: int | None = None
+    username: str | None = None
+    first_name: str | None = None
+    last_name: str | None = None
+    email: str | None = None
+    password: str | None = None
+    phone: str | None = None
+    user_status: int | None = None
+
+
+@REGISTRY.model
+class ApiResponse(PetstoreModel):
+    code: int | None = None
+    type: str | None = None
+    message: str | None = None
+
+
+# Dict-shaped schemas for bulk validation, keys as sent on the wire
+
+@with_config(DEFERRED)
+class CategoryRecord(TypedDict, total=False):
+    id: int | None
+    name: str | None
+
+
+@with_config(DEFERRED)
+class TagRecord(TypedDict, total=False):
+    id: int | None
+    name: str | None
+
+
+@with_config(DEFERRED)
+class PetRecord(TypedDict, total=False):
+    id: int | None
+    category: CategoryRecord | None
+    name: str | None
+    photoUrls: list[str]
+    tags: list[TagRecord]
+    status: str | None
+
+
+@with_config(DEFERRED)
+class UserRecord(TypedDict, total=False):
+    id: int | None
+    username: str | None
+    firstName: str | None
+    lastName: str | None
+    email: str | None
+    password: str | None
+    phone: str | None
+    userStatus: int | None
+
+
+# Bulk validators, e.g. PET_LIST.validate_json(response.content)
+PET_LIST = REGISTRY.adapter("PET_LIST", list[PetRecord])
+PET_RECORD = REGISTRY.adapter("PET_RECORD", PetRecord)
+USER_LIST = REGISTRY.adapter("USER_LIST", list[UserRecord])
+INVENTORY = REGISTRY.adapter("INVENTORY", dict[str, int])
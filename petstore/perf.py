@@ -0,0 +1,276 @@
+"""
+Endpoint performance regression checks against stored baselines and SLOs
+A benchmark runs an endpoint call for several rounds, each round giving
+latency percentiles and throughput, so run-to-run noise can be estimated
+
+A statistic regresses when the median over rounds is worse than the
+baseline's median by more than both the relative tolerance and z robust
+standard deviations (1.4826 * MAD) of the baseline rounds.
+
+SLOs are written as <stat><op><value>[unit], e.g. "p99<200ms" or "rps>=100".
+"""
+import json
+import os
+import re
+import statistics
+import time
+
+from petstore.compression import decompress
+from petstore.histogram import LatencyHistogram
+from petstore.load import ENDPOINTS, is_success
+
+
+DEFAULT_ROUNDS = 5
+DEFAULT_REQUESTS = 100
+DEFAULT_WARMUP = 10
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_Z = 3.0
+
+LATENCY_STATS = ("p50", "p95", "p99", "mean", "max")
+THROUGHPUT_STAT = "rps"
+
+_UNITS = {"us": 1e-6, "ms": 1e-3, "s": 1.0, "": 1.0}
+_SLO = re.compile(r"^\s*(?P<stat>[a-z0-9]+)\s*(?P<op><=|>=|<|>)\s*(?P<value>[0-9.]+)\s*(?P<unit>us|ms|s)?\s*$")
+_COMPARE = {
+    "<": lambda value, limit: value < limit,
+    "<=": lambda value, limit: value <= limit,
+    ">": lambda value, limit: value > limit,
+    ">=": lambda value, limit: value >= limit,
+}
+
+
+class PerfRegression(AssertionError):
+    """Raised when a benchmark misses an SLO or regresses against its baseline"""
+
+
+class SLO:
+    """A threshold on one statistic of an endpoint's benchmark, in seconds or requests per second"""
+
+    def __init__(self, stat, op, limit, text=None):
+        if stat not in LATENCY_STATS and stat != THROUGHPUT_STAT:
+            raise ValueError(f"unknown statistic {stat!r}, expected one of {LATENCY_STATS + (THROUGHPUT_STAT,)}")
+        self.stat = stat
+        self.op = op
+        self.limit = limit
+        self.text = text or f"{stat}{op}{limit}"
+
+    @classmethod
+    def parse(cls, text):
+        """Parse an SLO such as 'p99<200ms' or 'rps>=100'"""
+        match = _SLO.match(text)
+        if match is None:
+            raise ValueError(f"expected an SLO such as 'p99<200ms', got {text!r}")
+        stat, unit = match["stat"], match["unit"] or ""
+        if stat == THROUGHPUT_STAT and unit:
+            raise ValueError(f"{text!r}: throughput is in requests per second and takes no unit")
+        return cls(stat, match["op"], float(match["value"]) * _UNITS[unit], text.strip())
+
+    def check(self, result):
+        """Return a failure message, or None when result meets the SLO"""
+        value = result.stat(self.stat)
+        if _COMPARE[self.op](value, self.limit):
+            return None
+        return f"SLO {self.text} missed: {self.stat}={_format(self.stat, value)}"
+
+    def __repr__(self):
+        return f"SLO({self.text!r})"
+
+
+class BenchmarkResult:
+    """Per-round statistics and the merged latency histogram of one benchmark"""
+
+    def __init__(self, name, rounds, histogram=None, errors=0):
+        self.name = name
+        self.rounds = rounds
+        self.histogram = histogram if histogram is not None else LatencyHistogram()
+        self.errors = errors
+
+    def stat(self, stat):
+        """Return the median over rounds of a statistic"""
+        return statistics.median(round_stats[stat] for round_stats in self.rounds)
+
+    def summary(self):
+        return {stat: self.stat(stat) for stat in LATENCY_STATS + (THROUGHPUT_STAT,)}
+
+    def to_dict(self):
+        return {"rounds": self.rounds, "errors": self.errors, "histogram": self.histogram.to_dict()}
+
+    @classmethod
+    def from_dict(cls, name, data):
+        return cls(name, data["rounds"], LatencyHistogram.from_dict(data["histogram"]), data.get("errors", 0))
+
+    def format_line(self):
+        summary = self.summary()
+        return (
+            f"{self.name:<22} {summary['p50'] * 1000:>8.2f} {summary['p95'] * 1000:>8.2f} "
+            f"{summary['p99'] * 1000:>8.2f} {summary['rps']:>9.1f} {self.errors:>7}"
+        )
+
+
+def run_benchmark(client, name, call=None, rounds=DEFAULT_ROUNDS, requests=DEFAULT_REQUESTS,
+                  warmup=DEFAULT_WARMUP, ok=is_success):
+    """Send requests calls per round, back to back, and return a BenchmarkResult
+
+    call defaults to the load generator's endpoint of the same name.
+    Errors are counted and their latency excluded.
+    """
+    call = ENDPOINTS[name] if call is None else call
+    for _ in range(warmup):
+        call(client)
+    merged = LatencyHistogram()
+    round_stats = []
+    errors = 0
+    for _ in range(rounds):
+        histogram = LatencyHistogram()
+        started = time.perf_counter()
+        for _ in range(requests):
+            sent = time.perf_counter()
+            try:
+                failed = not ok(call(client))
+            except Exception:
+                failed = True
+            if failed:
+                errors += 1
+            else:
+                histogram.record(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - started
+        stats = histogram.summary()
+        round_stats.append({
+            **{stat: stats[stat] for stat in LATENCY_STATS},
+            THROUGHPUT_STAT: histogram.count / elapsed if elapsed else 0.0,
+        })
+        merged.merge(histogram)
+    return BenchmarkResult(name, round_stats, merged, errors)
+
+
+class RecordingCall:
+    """Endpoint call keeping its successful responses, e.g. to delete what a write benchmark created
+
+    Request bodies are only decoded by created(), after the benchmark, so the timing is unaffected.
+    """
+
+    def __init__(self, call, ok=is_success):
+        self.call = call
+        self.ok = ok
+        self.responses = []
+
+    def __call__(self, client):
+        response = self.call(client)
+        if self.ok(response):
+            self.responses.append(response)
+        return response
+
+    def created(self, field="id"):
+        """Return field of every resource created so far, e.g. pet IDs or usernames
+
+        Read from the request bodies, POST /user only answers with a message.
+        """
+        return [
+            json.loads(decompress(response.request.body, response.request.headers.get("Content-Encoding")))[field]
+            for response in self.responses
+        ]
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE, z=DEFAULT_Z, stats=("p50", "p95", "p99", "rps")):
+    """Return a message per statistic of current that regressed against baseline"""
+    regressions = []
+    for stat in stats:
+        base_values = [round_stats[stat] for round_stats in baseline.rounds]
+        base = statistics.median(base_values)
+        spread = 1.4826 * statistics.median(abs(value - base) for value in base_values)
+        value = current.stat(stat)
+        if stat == THROUGHPUT_STAT:
+            limit = min(base * (1 - tolerance), base - z * spread)
+            regressed = value < limit
+        else:
+            limit = max(base * (1 + tolerance), base + z * spread)
+            regressed = value > limit
+        if regressed:
+            regressions.append(
+                f"{stat} regressed: {_format(stat, value)} vs baseline {_format(stat, base)} "
+                f"(limit {_format(stat, limit)})"
+            )
+    return regressions
+
+
+def check(result, slos=(), baseline=None, tolerance=DEFAULT_TOLERANCE, z=DEFAULT_Z):
+    """Raise PerfRegression listing missed SLOs and regressions against baseline"""
+    failures = [message for message in (slo.check(result) for slo in slos) if message]
+    if baseline is not None:
+        failures.extend(compare(baseline, result, tolerance, z))
+    if result.errors:
+        failures.append(f"{result.errors} requests failed")
+    if failures:
+        raise PerfRegression(f"{result.name}: " + "; ".join(failures))
+
+
+class Baselines:
+    """Benchmark results of a reference run, stored as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self.results = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as baseline_file:
+                data = json.load(baseline_file)
+            self.results = {
+                name: BenchmarkResult.from_dict(name, result) for name, result in data["endpoints"].items()
+            }
+
+    def get(self, name):
+        return self.results.get(name)
+
+    def update(self, results):
+        """Replace the baselines of the given results, keeping other endpoints"""
+        self.results.update((result.name, result) for result in results)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = {"endpoints": {name: result.to_dict() for name, result in sorted(self.results.items())}}
+        with open(self.path, "w", encoding="utf-8") as baseline_file:
+            json.dump(data, baseline_file, indent=2)
+
+
+def format_table(results):
+    lines = [f"{'endpoint':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9} {'errors':>7}"]
+    lines.extend(result.format_line() for result in results)
+    return lines
+
+
+def _format(stat, value):
+    return f"{value:.1f} req/s" if stat == THROUGHPUT_STAT else f"{value * 1000:.2f}ms"
+
+
+class PerfSession:
+    """Benchmarks of one test run, checked against baselines and collected for reporting"""
+
+    def __init__(self, baselines, update=False, tolerance=DEFAULT_TOLERANCE, z=DEFAULT_Z):
+        self.baselines = baselines
+        self.update = update
+        self.tolerance = tolerance
+        self.z = z
+        self.results = {}
+
+    def run(self, client, name, slos=(), call=None, **kwargs):
+        """Benchmark an endpoint, record the result and raise PerfRegression on failure
+
+        While updating baselines only SLOs are checked.
+        """
+        result = run_benchmark(client, name, call, **kwargs)
+        self.results[name] = result
+        baseline = None if self.update else self.baselines.get(name)
+        check(result, slos, baseline, self.tolerance, self.z)
+        return result
+
+    def add(self, results):
+        """Add results serialized by to_dict, e.g. from an xdist worker"""
+        self.results.update((name, BenchmarkResult.from_dict(name, data)) for name, data in results.items())
+
+    def to_dict(self):
+        return {name: result.to_dict() for name, result in self.results.items()}
+
+    def finish(self):
+        """Save the run's results as baselines when updating"""
+        if self.update and self.results:
+            self.baselines.update(self.results.values())
+            self.baselines.save()
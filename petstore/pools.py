@@ -0,0 +1,129 @@
+"""
+Session-wide pools of pre-created pets, orders and users
+Resources are created in concurrent batches the first time tests need them and
+deleted together at the end of the session instead of once per test
+
+A test takes a resource either exclusively (checkout), after which it may
+update or delete it and it is never handed out again, or read-only (shared),
+in which case every test sees the same server-side resource.
+"""
+import copy
+import threading
+from collections import deque
+
+from petstore.factories import generate_orders, generate_pets, generate_users
+
+
+DEFAULT_BATCH_SIZE = 16
+
+
+async def _post_each(async_client, path, items):
+    responses = await async_client.gather(
+        [async_client.post(path, json=item) for item in items], return_exceptions=True
+    )
+    return [not isinstance(response, Exception) and response.status_code == 200 for response in responses]
+
+
+async def _post_users(async_client, users):
+    response = await async_client.create_users_with_list(users)
+    return [response.status_code == 200] * len(users)
+
+
+class ResourceKind:
+    """How to generate, create and address one kind of resource"""
+
+    def __init__(self, name, generate, create, path):
+        self.name = name
+        self.generate = generate
+        self.create = create
+        self.path = path
+
+
+RESOURCE_KINDS = {
+    "pet": ResourceKind(
+        "pet",
+        generate_pets,
+        lambda async_client, pets: _post_each(async_client, "/pet", pets),
+        lambda pet: f"/pet/{pet['id']}",
+    ),
+    "order": ResourceKind(
+        "order",
+        generate_orders,
+        lambda async_client, orders: _post_each(async_client, "/store/order", orders),
+        lambda order: f"/store/order/{order['id']}",
+    ),
+    # One createWithList request creates a whole batch
+    "user": ResourceKind(
+        "user",
+        generate_users,
+        _post_users,
+        lambda user: f"/user/{user['username']}",
+    ),
+}
+
+
+class PoolError(RuntimeError):
+    """Raised when the server did not create a pooled resource"""
+
+
+class ResourcePool:
+    """Pre-created resources of one kind handed out to tests
+
+    demand, when known from collection, caps how many exclusive resources are
+    created so a run never provisions more than its tests will take.
+    """
+
+    def __init__(self, async_client, kind, batch_size=DEFAULT_BATCH_SIZE, demand=None, shared_size=1):
+        self.async_client = async_client
+        self.kind = RESOURCE_KINDS[kind] if isinstance(kind, str) else kind
+        self.batch_size = batch_size
+        self.demand = demand
+        self.shared_size = shared_size
+        self.created = []
+        self.checked_out = 0
+        self.shared_uses = 0
+        self._free = deque()
+        self._shared = []
+        self._lock = threading.Lock()
+
+    def checkout(self):
+        """Return a resource no other test will receive, the caller may modify or delete it"""
+        with self._lock:
+            if not self._free:
+                remaining = (self.demand or 0) - self.checked_out
+                self._free.extend(self._provision(min(max(remaining, 1), self.batch_size)))
+            self.checked_out += 1
+            return copy.deepcopy(self._free.popleft())
+
+    def shared(self):
+        """Return a resource shared with other tests, the caller must not modify it on the server"""
+        with self._lock:
+            if not self._shared:
+                self._shared = self._provision(self.shared_size)
+            item = self._shared[self.shared_uses % len(self._shared)]
+            self.shared_uses += 1
+            return copy.deepcopy(item)
+
+    def paths(self):
+        """Return the API paths of every resource created by the pool"""
+        with self._lock:
+            return [self.kind.path(item) for item in self.created]
+
+    def summary(self):
+        """Return counters for reporting"""
+        with self._lock:
+            return {
+                "created": len(self.created),
+                "checked_out": self.checked_out,
+                "shared_uses": self.shared_uses,
+                "idle": len(self._free),
+            }
+
+    def _provision(self, count):
+        items = self.kind.generate(count)
+        results = self.async_client.run(self.kind.create(self.async_client, items))
+        created = [item for item, ok in zip(items, results) if ok]
+        self.created.extend(created)
+        if len(created) < count:
+            raise PoolError(f"created only {len(created)} of {count} pooled {self.kind.name}s")
+        return created
@@ -0,0 +1,82 @@
+"""
+Longest-processing-time-first scheduling of tests from durations of earlier runs
+Sending the slowest tests first lets xdist's on-demand distribution fill in
+with short tests at the end, so workers finish close together
+"""
+import heapq
+
+
+DURATIONS_CACHE_KEY = "petstore/durations"
+
+# Weight of the latest run when updating a stored duration
+SMOOTHING = 0.5
+
+
+def merge_durations(stored, measured, smoothing=SMOOTHING):
+    """Return stored durations updated with this run's, as an exponential moving average"""
+    merged = dict(stored)
+    for nodeid, seconds in measured.items():
+        previous = merged.get(nodeid)
+        merged[nodeid] = seconds if previous is None else previous + smoothing * (seconds - previous)
+    return merged
+
+
+def lpt_order(nodeids, durations, default=None):
+    """Return nodeids sorted longest first, ties kept in their given order
+
+    Tests without a stored duration get default, the longest known duration
+    unless given, so new and possibly slow tests are not left for the end.
+    """
+    if default is None:
+        default = max(durations.values(), default=0.0)
+    return sorted(nodeids, key=lambda nodeid: -durations.get(nodeid, default))
+
+
+def assign(durations, workers):
+    """Greedily give each duration, longest first, to the least loaded worker and return the loads"""
+    loads = [0.0] * max(workers, 1)
+    heapq.heapify(loads)
+    for seconds in sorted(durations, reverse=True):
+        heapq.heappush(loads, heapq.heappop(loads) + seconds)
+    return sorted(loads, reverse=True)
+
+
+def predicted_makespan(durations, workers):
+    """Return the wall time of running durations on workers in LPT order"""
+    return assign(durations, workers)[0] if durations else 0.0
+
+
+def makespan_bound(durations, workers):
+    """Return the lower bound on any schedule: the longest test or the work per worker"""
+    if not durations:
+        return 0.0
+    return max(max(durations), sum(durations) / max(workers, 1))
+
+
+def summary(durations, workers):
+    """Return total work, LPT makespan and lower bound in seconds for a set of test durations"""
+    # Imported here, the recorder is loaded by every run and only summaries need statistics
+    import statistics
+
+    durations = list(durations)
+    return {
+        "tests": len(durations),
+        "workers": workers,
+        "work": sum(durations),
+        "median": statistics.median(durations) if durations else 0.0,
+        "makespan": predicted_makespan(durations, workers),
+        "bound": makespan_bound(durations, workers),
+    }
+
+
+class DurationRecorder:
+    """pytest plugin summing setup, call and teardown time per test
+
+    Registered on the controller it also sees the reports of xdist workers.
+    """
+
+    def __init__(self):
+        self.durations = {}
+
+    def pytest_runtest_logreport(self, report):
+        self.durations[report.nodeid] = self.durations.get(report.nodeid, 0.0) + report.duration
@@ -0,0 +1,157 @@
+"""
+Local Petstore v2 HTTP server
+Runs PetstoreApp in a background thread so the suites can run offline
+
+Usage:
+    python -m petstore.server --port 8080
+"""
+import argparse
+import io
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from petstore.app import JSON_HEADERS, PetstoreApp
+from petstore.storage import encode_json
+
+
+BASE_PATH = "/v2"
+
+SERVER_ERROR = encode_json({"code": 500, "type": "unknown", "message": "something bad happened"})
+
+
+class PetstoreRequestHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler dispatching to PetstoreApp"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "PetstoreLocal/1.0"
+    # Buffer writes so headers and body leave in a single send
+    wbufsize = io.DEFAULT_BUFFER_SIZE
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        try:
+            status, headers, payload = self._handle()
+        except Exception:
+            # PetstoreApp answers handler errors itself, this covers unreadable request framing.
+            # The rest of the stream cannot be trusted, so the connection is closed after the response
+            self.close_connection = True
+            status, headers, payload = 500, list(JSON_HEADERS), SERVER_ERROR
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        body = self._read_body()
+        path = url.path
+        if path.startswith(BASE_PATH):
+            path = path[len(BASE_PATH):] or "/"
+        return self.server.app.handle(self.command, path, url.query, dict(self.headers.items()), body)
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    # Skip trailers up to the terminating blank line
+                    while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _PetstoreHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    block_on_close = False
+    request_queue_size = 128
+
+    def __init__(self, address, app):
+        self.app = app
+        super().__init__(address, PetstoreRequestHandler)
+
+
+class PetstoreServer:
+    """Petstore v2 server running in a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0, app=None):
+        self.app = app if app is not None else PetstoreApp()
+        self._httpd = _PetstoreHTTPServer((host, port), self.app)
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL equivalent to https://petstore.swagger.io/v2"""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def start(self):
+        # Short poll interval keeps stop() fast for per-test servers
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, args=(0.05,), name="petstore-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local Petstore v2 server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    server = PetstoreServer(args.host, args.port)
+    print(f"Serving Petstore at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
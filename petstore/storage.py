@@ -0,0 +1,166 @@
+"""
+In-memory storage for the local Petstore server
+Keeps secondary indexes so status/tag lookups and inventory never scan all pets
+"""
+import itertools
+import json
+import threading
+
+
+def encode_json(document):
+    """Encode a document to compact JSON bytes"""
+    return json.dumps(document, separators=(",", ":")).encode("utf-8")
+
+
+class PetstoreStorage:
+    """Thread-safe storage for pets, orders and users"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._pet_ids = itertools.count(1)
+        # id -> (pet, encoded pet)
+        self._pets = {}
+        # status / tag name -> {pet id: None}, dicts keep insertion order
+        self._by_status = {}
+        self._by_tag = {}
+        self._orders = {}
+        self._users = {}
+
+    # Pets
+
+    def put_pet(self, pet):
+        """Create or replace a pet and return the stored document"""
+        pet = dict(pet)
+        with self._lock:
+            if not pet.get("id"):
+                # Skip IDs taken by pets created with a client-supplied ID
+                pet["id"] = next(self._pet_ids)
+                while pet["id"] in self._pets:
+                    pet["id"] = next(self._pet_ids)
+            pet_id = pet["id"]
+            # Unhashable IDs, statuses or tag names raise here, before anything is written
+            keys = self._index_keys(pet)
+            entry = (pet, encode_json(pet))
+            previous = self._pets.get(pet_id)
+            if previous is not None:
+                self._unindex_pet(previous[0])
+            self._pets[pet_id] = entry
+            self._index_pet(pet, keys)
+        return pet
+
+    def get_pet(self, pet_id):
+        """Return a pet by ID or None"""
+        entry = self._pets.get(pet_id)
+        return entry[0] if entry else None
+
+    def get_pet_json(self, pet_id):
+        """Return the encoded pet by ID or None"""
+        entry = self._pets.get(pet_id)
+        return entry[1] if entry else None
+
+    def update_pet(self, pet_id, **fields):
+        """Update selected fields of a pet, return the pet or None if missing"""
+        with self._lock:
+            pet = self.get_pet(pet_id)
+            if pet is None:
+                return None
+            pet = dict(pet)
+            pet.update((key, value) for key, value in fields.items() if value is not None)
+            return self.put_pet(pet)
+
+    def delete_pet(self, pet_id):
+        """Delete a pet, return True if it existed"""
+        with self._lock:
+            entry = self._pets.pop(pet_id, None)
+            if entry is None:
+                return False
+            self._unindex_pet(entry[0])
+            return True
+
+    def find_pets_by_status(self, statuses):
+        """Return encoded pets having any of the given statuses"""
+        return self._lookup(self._by_status, statuses)
+
+    def find_pets_by_tags(self, tags):
+        """Return encoded pets having any of the given tag names"""
+        return self._lookup(self._by_tag, tags)
+
+    def inventory(self):
+        """Return pet counts by status"""
+        with self._lock:
+            return {status: len(ids) for status, ids in self._by_status.items() if ids}
+
+    def pet_count(self):
+        """Return the total number of stored pets"""
+        return len(self._pets)
+
+    def _lookup(self, index, keys):
+        with self._lock:
+            seen = {}
+            for key in keys:
+                seen.update(index.get(key, ()))
+            return [self._pets[pet_id][1] for pet_id in seen]
+
+    def _index_pet(self, pet, keys):
+        status, tag_names = keys
+        if status is not None:
+            self._by_status.setdefault(status, {})[pet["id"]] = None
+        for tag_name in tag_names:
+            self._by_tag.setdefault(tag_name, {})[pet["id"]] = None
+
+    def _unindex_pet(self, pet):
+        status, tag_names = self._index_keys(pet)
+        if status is not None:
+            self._discard(self._by_status, status, pet["id"])
+        for tag_name in tag_names:
+            self._discard(self._by_tag, tag_name, pet["id"])
+
+    @staticmethod
+    def _index_keys(pet):
+        """Return (status, tag names) of a pet, raising TypeError for unhashable values"""
+        status = pet.get("status")
+        hash((pet["id"], status))
+        tag_names = {tag["name"] for tag in pet.get("tags") or () if isinstance(tag, dict) and tag.get("name")}
+        return status, tag_names
+
+    @staticmethod
+    def _discard(index, key, pet_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.pop(pet_id, None)
+            if not ids:
+                del index[key]
+
+    # Orders
+
+    def put_order(self, order):
+        """Create or replace an order and return it"""
+        with self._lock:
+            self._orders[order["id"]] = dict(order)
+        return order
+
+    def get_order(self, order_id):
+        """Return an order by ID or None"""
+        return self._orders.get(order_id)
+
+    def delete_order(self, order_id):
+        """Delete an order, return True if it existed"""
+        with self._lock:
+            return self._orders.pop(order_id, None) is not None
+
+    # Users
+
+    def put_user(self, user):
+        """Create or replace a user and return it"""
+        with self._lock:
+            self._users[user["username"]] = dict(user)
+        return user
+
+    def get_user(self, username):
+        """Return a user by username or None"""
+        return self._users.get(username)
+
+    def delete_user(self, username):
+        """Delete a user, return True if it existed"""
+        with self._lock:
+            return self._users.pop(username, None) is not None
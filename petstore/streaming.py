@@ -0,0 +1,115 @@
+"""
+Incremental parsing of large JSON array responses
+Items are yielded as soon as they are complete, so memory stays bounded by the chunk size
+"""
+import codecs
+import json
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+
+def iter_json_array(chunks, decoder=None):
+    """Yield the items of a top-level JSON array from an iterable of byte chunks"""
+    decoder = decoder or json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    finished = False
+    # open: before '[', first: after '[', item: after ',', separator: after an item
+    state = "open"
+
+    while True:
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+            buffer += text_decoder.decode(b"", final=True)
+        else:
+            buffer += text_decoder.decode(chunk)
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if state == "open":
+                if char != "[":
+                    raise ValueError(f"Expected a JSON array, got {char!r}")
+                state = "first"
+                position += 1
+            elif state == "separator" or (state == "first" and char == "]"):
+                if char == "]":
+                    return
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']', got {char!r}")
+                state = "item"
+                position += 1
+            else:
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    if finished:
+                        raise
+                    break
+                if not finished and (end == len(buffer) or buffer[end] not in _DELIMITERS):
+                    # A number may continue in the next chunk, e.g. "1" then ".5"
+                    break
+                yield item
+                position = end
+                state = "separator"
+        if finished:
+            raise ValueError("Truncated JSON array")
+        # Drop consumed text so the buffer never holds more than one chunk plus one item
+        buffer = buffer[position:]
+        position = 0
+
+
+class JsonArrayStream:
+    """Iterate a streamed JSON array response item by item
+
+    Compressed bodies are decoded chunk by chunk as they arrive. bytes_read
+    counts the decoded bytes, on_close(stream) is called once on close.
+    """
+
+    def __init__(self, response, chunk_size=DEFAULT_CHUNK_SIZE, validate=None, on_close=None):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.validate = validate
+        self.on_close = on_close
+        self.bytes_read = 0
+
+    @property
+    def status_code(self):
+        return self.response.status_code
+
+    def __iter__(self):
+        try:
+            items = iter_json_array(self._chunks())
+            if self.validate is None:
+                yield from items
+            else:
+                for item in items:
+                    yield self.validate(item)
+        finally:
+            self.close()
+
+    def _chunks(self):
+        for chunk in self.response.iter_content(self.chunk_size):
+            self.bytes_read += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.response.close()
+        on_close, self.on_close = self.on_close, None
+        if on_close is not None:
+            on_close(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
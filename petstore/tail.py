@@ -0,0 +1,175 @@
+"""
+Tail-latency controls for the Petstore client
+Timeouts and hedging delays are derived from the latency each endpoint has shown so far
+
+AdaptiveTimeout sets every request's read timeout to a multiple of its
+endpoint's p99. Hedge sends a duplicate of a slow idempotent GET once it has
+taken longer than the endpoint's p95 and returns whichever response comes first.
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from petstore.histogram import LatencyHistogram
+
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_MIN_SAMPLES = 20
+
+# Methods that are safe to send twice
+HEDGEABLE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class EndpointLatency:
+    """Thread-safe total latency histograms per endpoint with cached percentiles
+
+    Percentiles are recomputed every refresh_every samples instead of per lookup.
+    """
+
+    def __init__(self, refresh_every=16):
+        self.refresh_every = refresh_every
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._cache = {}
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            histogram = self._histograms.get(endpoint)
+            if histogram is None:
+                histogram = self._histograms[endpoint] = LatencyHistogram()
+            histogram.record(seconds)
+
+    def count(self, endpoint):
+        with self._lock:
+            histogram = self._histograms.get(endpoint)
+            return histogram.count if histogram is not None else 0
+
+    def percentile(self, endpoint, percent, min_samples=DEFAULT_MIN_SAMPLES):
+        """Return the percentile in seconds, or None before min_samples requests were seen"""
+        with self._lock:
+            histogram = self._histograms.get(endpoint)
+            if histogram is None or histogram.count < min_samples:
+                return None
+            cached = self._cache.get((endpoint, percent))
+            if cached is None or histogram.count - cached[0] >= self.refresh_every:
+                cached = self._cache[(endpoint, percent)] = (histogram.count, histogram.percentile(percent))
+            return cached[1]
+
+
+class AdaptiveTimeout:
+    """Per-endpoint (connect, read) timeouts learned from observed latency
+
+    Until an endpoint has min_samples requests the read timeout is default.
+    Afterwards it is multiplier times the percentile, clamped to [minimum, maximum].
+    """
+
+    def __init__(self, latency=None, percentile=99, multiplier=3.0, minimum=1.0, maximum=DEFAULT_READ_TIMEOUT,
+                 default=DEFAULT_READ_TIMEOUT, connect=DEFAULT_CONNECT_TIMEOUT, min_samples=DEFAULT_MIN_SAMPLES):
+        self.latency = latency if latency is not None else EndpointLatency()
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.minimum = minimum
+        self.maximum = maximum
+        self.default = default
+        self.connect = connect
+        self.min_samples = min_samples
+
+    def read_timeout(self, endpoint):
+        observed = self.latency.percentile(endpoint, self.percentile, self.min_samples)
+        if observed is None:
+            return self.default
+        return min(max(observed * self.multiplier, self.minimum), self.maximum)
+
+    def __call__(self, endpoint):
+        """Return the requests timeout tuple for an endpoint"""
+        return self.connect, self.read_timeout(endpoint)
+
+
+class Hedge:
+    """Send a backup request when the first one is slower than the endpoint's percentile
+
+    At most budget of all eligible requests are hedged, so a slow server does
+    not see its load doubled. The slower response is closed in the background.
+    """
+
+    def __init__(self, latency=None, percentile=95, delay=None, minimum_delay=0.001, budget=0.1,
+                 min_samples=DEFAULT_MIN_SAMPLES, max_workers=32):
+        self.latency = latency if latency is not None else EndpointLatency()
+        self.percentile = percentile
+        self.delay = delay
+        self.minimum_delay = minimum_delay
+        self.budget = budget
+        self.min_samples = min_samples
+        self.requests = 0
+        self.fired = 0
+        self.won = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="petstore-hedge")
+
+    def delay_for(self, endpoint):
+        """Return how long to wait before hedging, or None when hedging is off for now"""
+        if self.delay is not None:
+            return self.delay
+        observed = self.latency.percentile(endpoint, self.percentile, self.min_samples)
+        return None if observed is None else max(observed, self.minimum_delay)
+
+    def send(self, endpoint, send, on_fire=None):
+        """Call send(), calling it again if the first call is slow, and return the first result"""
+        delay = self.delay_for(endpoint)
+        with self._lock:
+            self.requests += 1
+            allowed = delay is not None and self.fired < self.budget * self.requests
+        if not allowed:
+            return send()
+
+        primary = self._executor.submit(send)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        with self._lock:
+            if self.fired >= self.budget * self.requests:
+                allowed = False
+            else:
+                self.fired += 1
+        if not allowed:
+            return primary.result()
+        if on_fire is not None:
+            on_fire("hedged")
+        backup = self._executor.submit(send)
+
+        pending = {primary, backup}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Prefer a response over an error while the other request is still running
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None or not pending:
+                break
+        if winner is None:
+            return primary.result()
+        for future in (primary, backup):
+            if future is not winner:
+                future.add_done_callback(_close_response)
+        if winner is backup:
+            with self._lock:
+                self.won += 1
+            if on_fire is not None:
+                on_fire("hedge_won")
+        return winner.result()
+
+    def stats(self):
+        """Return eligible, hedged and won counts"""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.fired,
+                "won": self.won,
+                "hedge_ratio": self.fired / self.requests if self.requests else 0.0,
+            }
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+
+def _close_response(future):
+    if future.exception() is None:
+        future.result().close()
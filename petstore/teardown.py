@@ -0,0 +1,68 @@
+"""
+Batched teardown of resources created by tests
+Deletions are queued across tests and drained concurrently over the pooled client
+"""
+import threading
+
+
+DEFAULT_TIMEOUT = 10
+
+
+class TeardownQueue:
+    """Queue DELETE requests and drain them concurrently"""
+
+    def __init__(self, async_client, timeout=DEFAULT_TIMEOUT):
+        self.async_client = async_client
+        self.timeout = timeout
+        self.deleted = 0
+        self.missing = 0
+        self.failures = []
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def add(self, path):
+        """Queue deletion of an API path"""
+        with self._lock:
+            self._pending.append(path)
+
+    def extend(self, paths):
+        """Queue deletion of several API paths"""
+        with self._lock:
+            self._pending.extend(paths)
+
+    def pending(self):
+        """Return the number of queued deletions"""
+        return len(self._pending)
+
+    def drain(self):
+        """Delete everything queued so far and return the failures of this drain"""
+        with self._lock:
+            paths, self._pending = self._pending, []
+        if not paths:
+            return []
+        results = self.async_client.run(self.async_client.map(
+            "DELETE", paths, return_exceptions=True, timeout=self.timeout
+        ))
+        failures = []
+        for path, result in zip(paths, results):
+            if isinstance(result, Exception):
+                failures.append((path, f"{type(result).__name__}: {result}"))
+            elif result.status_code == 404:
+                # Already gone, e.g. deleted by the test itself
+                self.missing += 1
+            elif result.ok:
+                self.deleted += 1
+            else:
+                failures.append((path, f"HTTP {result.status_code}: {result.text[:200]}"))
+        with self._lock:
+            self.failures.extend(failures)
+        return failures
+
+    def summary(self):
+        """Return counters for reporting"""
+        return {
+            "deleted": self.deleted,
+            "missing": self.missing,
+            "failed": len(self.failures),
+            "pending": self.pending(),
+        }
@@ -0,0 +1,104 @@
+"""
+Reusable prepared requests for load runs
+Session headers, cookies, URL and proxy settings are resolved once per endpoint,
+each call only fills in path parameters and a ready-made bytes body
+
+    create_pet = client.template("POST", "/pet")
+    create_pet.send(encode_json(generate_pet_data()))
+    get_pet = client.template("GET", "/pet/{petId}")
+    get_pet.send(petId=10)
+"""
+import threading
+from collections import deque
+from urllib.parse import quote, urlencode
+
+import requests
+
+from petstore.compression import compress_body
+from petstore.factories import ITEMS
+from petstore.metrics import endpoint_key
+
+
+DEFAULT_BODY_BATCH = 256
+
+# Methods whose templates get content_type by default
+BODY_METHODS = frozenset({"POST", "PUT", "PATCH"})
+
+
+class RequestTemplate:
+    """A request to one endpoint prepared once and re-sent with new path parameters and body
+
+    path may hold {name} placeholders, filled in from send()'s keyword
+    arguments. Bodies are bytes, e.g. from encode_json, a bulk factory's ITEMS
+    output or a pydantic model_dump_json(), and are sent as they are with
+    content_type for POST, PUT and PATCH, gzip-compressed when at least the
+    client's compress_min_size.
+    Template requests are timed, counted and cached like any other, but are
+    never hedged or redirected.
+    """
+
+    def __init__(self, client, method, path, params=None, headers=None, content_type="application/json"):
+        self.client = client
+        self.method = method.upper()
+        self.path = path
+        self.endpoint = endpoint_key(self.method, path)
+        self._url = client.url(path)
+        self._query = "?" + urlencode(params, doseq=True) if params else ""
+        self._placeholders = "{" in path
+        headers = dict(headers or {})
+        if content_type is not None and self.method in BODY_METHODS:
+            headers.setdefault("Content-Type", content_type)
+        # Brace-free URL of the same host, for host-specific cookies and auth
+        url = self._url.replace("{", "").replace("}", "") + self._query
+        session = client.session
+        self._prepared = session.prepare_request(requests.Request(self.method, url, headers=headers))
+        self._settings = session.merge_environment_settings(url, {}, None, None, None)
+
+    def prepare(self, body=None, **path_params):
+        """Return a PreparedRequest for the path parameters and bytes body"""
+        prepared = self._prepared.copy()
+        path = self.path
+        if self._placeholders:
+            quoted = {name: quote(str(value), safe="") for name, value in path_params.items()}
+            path = path.format_map(quoted)
+            prepared.url = self._url.format_map(quoted) + self._query
+        if body is not None:
+            if self.client.compress_min_size is not None:
+                size = len(body)
+                body, encoding = compress_body(body, self.client.compress_min_size)
+                if encoding is not None:
+                    prepared.headers["Content-Encoding"] = encoding
+                    self.client.count_request_bytes(self.method, path, size, len(body))
+            prepared.body = body
+            prepared.headers["Content-Length"] = str(len(body))
+        return prepared, path
+
+    def send(self, body=None, timeout=None, **path_params):
+        """Send the request and return the requests.Response"""
+        prepared, path = self.prepare(body, **path_params)
+        if timeout is None:
+            timeout = self.client.timeout(self.endpoint) if callable(self.client.timeout) else self.client.timeout
+        return self.client.send_prepared(
+            prepared, path, timeout=timeout, allow_redirects=False, **self._settings
+        )
+
+
+class BodyStream:
+    """Thread-safe supply of pre-serialized bodies generated in batches by a bulk factory
+
+    generate is called as generate(count, output=ITEMS), e.g. generate_pets.
+    """
+
+    def __init__(self, generate, batch_size=DEFAULT_BODY_BATCH, **generate_kwargs):
+        self.generate = generate
+        self.batch_size = batch_size
+        self.generate_kwargs = generate_kwargs
+        self._bodies = deque()
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        """Return the next body"""
+        with self._lock:
+            if not self._bodies:
+                self._bodies.extend(self.generate(self.batch_size, output=ITEMS, **self.generate_kwargs))
+            return self._bodies.popleft()
@@ -0,0 +1,217 @@
+"""
+Streaming multipart uploads for /pet/{petId}/uploadImage
+File contents are sent as memoryview slices of a memory-mapped file, so an
+upload never copies the file into a Python bytes object
+
+Usage:
+    python -m petstore.upload --base-url local --pets 20 --copies 10 wolf.jpg
+"""
+import argparse
+import json
+import mimetypes
+import mmap
+import os
+import random
+import time
+
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_CONCURRENCY = 8
+
+# Percent-encoding of parameters in part headers, as browsers and urllib3 do
+_HEADER_PARAM_ESCAPES = {10: "%0A", 13: "%0D", 34: "%22"}
+
+
+class MultipartFile:
+    """multipart/form-data body streaming one file from an mmap
+
+    Iterating yields the part headers, then chunk_size memoryview slices of the
+    file, then the closing boundary. len() is the exact body size, so requests
+    sends a Content-Length instead of chunked transfer encoding. The body can be
+    iterated more than once, e.g. when a request is retried.
+    """
+
+    def __init__(self, path, field="file", filename=None, content_type=None, fields=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        # Drawn from the seeded module generator so recorded requests are reproducible
+        self.boundary = f"{random.getrandbits(128):032x}"
+        filename = filename or os.path.basename(path)
+        content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        head = []
+        for name, value in (fields or {}).items():
+            head.append(
+                f"--{self.boundary}\r\nContent-Disposition: form-data; {_header_param('name', name)}"
+                f"\r\n\r\n{value}\r\n"
+            )
+        head.append(
+            f"--{self.boundary}\r\nContent-Disposition: form-data; {_header_param('name', field)}; "
+            f"{_header_param('filename', filename)}\r\nContent-Type: {content_type}\r\n\r\n"
+        )
+        self._head = "".join(head).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("latin-1")
+
+        self._file = open(path, "rb")
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            # mmap cannot map an empty file
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        except BaseException:
+            self._file.close()
+            raise
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return len(self._head) + self.size + len(self._tail)
+
+    def __iter__(self):
+        yield self._head
+        if self._map is not None:
+            view = memoryview(self._map)
+            try:
+                for offset in range(0, self.size, self.chunk_size):
+                    chunk = view[offset:offset + self.chunk_size]
+                    try:
+                        yield chunk
+                    finally:
+                        # Exported slices keep the mmap from closing
+                        chunk.release()
+            finally:
+                view.release()
+        yield self._tail
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A suspended iterator still holds a slice, the map is closed when it is collected
+                pass
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _header_param(name, value):
+    """Return name="value" for a part header, with quotes and line breaks in value percent-encoded"""
+    return f'{name}="{value.translate(_HEADER_PARAM_ESCAPES)}"'
+
+
+def upload_image(client, pet_id, path, additional_metadata=None, **kwargs):
+    """Upload one file to a pet through a PetstoreClient and return the response"""
+    fields = {"additionalMetadata": additional_metadata} if additional_metadata is not None else None
+    with MultipartFile(path, fields=fields) as body:
+        headers = dict(kwargs.pop("headers", None) or {}, **{"Content-Type": body.content_type})
+        return client.post(f"/pet/{pet_id}/uploadImage", data=body, headers=headers, **kwargs)
+
+
+class UploadReport:
+    """Throughput and failures of a concurrent upload run"""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.failures = []
+        self.elapsed = 0.0
+
+    @property
+    def megabytes_per_second(self):
+        return self.bytes / self.elapsed / 1e6 if self.elapsed else 0.0
+
+    def summary(self):
+        """Return counters for reporting"""
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "failed": len(self.failures),
+            "elapsed": self.elapsed,
+            "megabytes_per_second": self.megabytes_per_second,
+        }
+
+    def format_lines(self):
+        lines = [
+            f"{self.files} files, {self.bytes / 1e6:.1f} MB in {self.elapsed:.2f}s "
+            f"({self.megabytes_per_second:.1f} MB/s), {len(self.failures)} failed"
+        ]
+        for (pet_id, path), reason in self.failures[:10]:
+            lines.append(f"  pet {pet_id} {path}: {reason}")
+        return lines
+
+
+def upload_images(async_client, uploads, concurrency=DEFAULT_CONCURRENCY, additional_metadata=None):
+    """Upload (pet_id, path) pairs concurrently and return an UploadReport
+
+    At most concurrency files are open at once, uploads is consumed lazily.
+    """
+    from petstore.aio import bounded
+
+    report = UploadReport()
+
+    def calls():
+        for pet_id, path in uploads:
+            yield (pet_id, path), async_client.upload_image(pet_id, path, additional_metadata)
+
+    def record(upload, result):
+        if isinstance(result, Exception):
+            report.failures.append((upload, f"{type(result).__name__}: {result}"))
+        elif result.status_code != 200:
+            report.failures.append((upload, f"HTTP {result.status_code}: {result.text[:200]}"))
+        else:
+            report.files += 1
+            report.bytes += os.path.getsize(upload[1])
+
+    started = time.perf_counter()
+    async_client.run(bounded(concurrency, calls(), record))
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def main(argv=None):
+    from petstore.aio import AsyncPetstoreClient
+    from petstore.client import PetstoreClient
+    from petstore.factories import generate_pets
+    from petstore.server import PetstoreServer
+
+    parser = argparse.ArgumentParser(description="Upload images to Petstore pets concurrently")
+    parser.add_argument("files", nargs="+", help="Image files to upload")
+    parser.add_argument("--base-url", default="local", help="API base URL or 'local' for an in-process server")
+    parser.add_argument("--pets", type=int, default=10, help="Pets to create and upload to (default: 10)")
+    parser.add_argument("--copies", type=int, default=1, help="Uploads of each file per pet (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Uploads in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--json", metavar="PATH", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    server = PetstoreServer().start() if args.base_url == "local" else None
+    base_url = server.url if server is not None else args.base_url
+    try:
+        with PetstoreClient(base_url, pool_maxsize=args.concurrency) as client, \
+                AsyncPetstoreClient(client, concurrency=args.concurrency) as async_client:
+            pets = generate_pets(args.pets)
+            async_client.run(async_client.gather([async_client.create_pet(pet) for pet in pets]))
+            uploads = (
+                (pet["id"], path) for pet in pets for path in args.files for _ in range(args.copies)
+            )
+            report = upload_images(async_client, uploads, args.concurrency)
+            async_client.run(async_client.gather([async_client.delete_pet(pet["id"]) for pet in pets]))
+    finally:
+        if server is not None:
+            server.stop()
+    print("\n".join(report.format_lines()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as report_file:
+            json.dump(report.summary(), report_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
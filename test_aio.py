@@ -0,0 +1,65 @@
+"""
+Tests for the asyncio Petstore client
+"""
+import threading
+import time
+
+from petstore.aio import AsyncPetstoreClient
+from petstore.factories import generate_user_data
+
+
+class SlowClient:
+    """Stand-in client that records how many calls overlap"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, path, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return method, path
+
+
+class TestAsyncFanOut:
+    """Tests for concurrent fan-out"""
+
+    def test_map_keeps_order(self):
+        """Test that results come back in request order"""
+        with AsyncPetstoreClient(SlowClient(delay=0), concurrency=4) as async_client:
+            results = async_client.run(async_client.map("GET", [f"/pet/{pet_id}" for pet_id in range(10)]))
+
+        assert results == [("GET", f"/pet/{pet_id}") for pet_id in range(10)]
+
+    def test_concurrency_is_bounded(self):
+        """Test that no more than the configured number of calls overlap"""
+        slow_client = SlowClient()
+        with AsyncPetstoreClient(slow_client, concurrency=3) as async_client:
+            started = time.perf_counter()
+            async_client.run(async_client.map("GET", ["/store/inventory"] * 9))
+            elapsed = time.perf_counter() - started
+
+        assert slow_client.peak == 3
+        # Three waves of calls instead of nine sequential ones
+        assert elapsed < 9 * slow_client.delay
+
+    def test_user_flow_against_server(self, client, cleanup_users):
+        """Test concurrent creation and verification of users"""
+        users = [generate_user_data() for _ in range(5)]
+        with AsyncPetstoreClient(client, concurrency=5) as async_client:
+            created = async_client.run(async_client.gather(
+                [async_client.create_user(user) for user in users]
+            ))
+            cleanup_users.extend(user["username"] for user in users)
+            fetched = async_client.run(async_client.gather(
+                [async_client.get_user(user["username"]) for user in users]
+            ))
+
+        assert [response.status_code for response in created] == [200] * 5
+        assert [response.json()["username"] for response in fetched] == [user["username"] for user in users]
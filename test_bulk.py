@@ -0,0 +1,156 @@
+"""
+Tests for the bulk user importer
+"""
+import json
+import threading
+import time
+
+import pytest
+
+from petstore.aio import AsyncPetstoreClient
+from petstore.bulk import BulkImporter, batched, generate_user_stream, tune_batch_size
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=None):
+        self.status_code = status_code
+        self.text = json.dumps(body)
+        self._body = body
+        self.parsed = 0
+
+    def json(self):
+        self.parsed += 1
+        return self._body
+
+
+class BatchServer:
+    """Stand-in client that stores posted users and tracks overlapping batches"""
+
+    def __init__(self, reject=(), delay=0.01):
+        self.reject = set(reject)
+        self.delay = delay
+        self.users = {}
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, path, data=None, **kwargs):
+        if method == "GET":
+            username = path.rsplit("/", 1)[1]
+            user = self.users.get(username)
+            return FakeResponse(200, user) if user else FakeResponse(404, {"message": "User not found"})
+        batch = json.loads(data)
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if batch[0]["username"] in self.reject:
+            return FakeResponse(500, {"message": "boom"})
+        for user in batch:
+            self.users[user["username"]] = user
+        return FakeResponse(200, {"code": 200})
+
+
+def make_users(count, prefix="user"):
+    return [{"username": f"{prefix}{index}"} for index in range(count)]
+
+
+class TestBulkImporter:
+    """Tests for batching, backpressure and verification"""
+
+    def test_batched_is_lazy(self):
+        """Test that batching never reads ahead of the batch being built"""
+        pulled = []
+
+        def users():
+            for index in range(10):
+                pulled.append(index)
+                yield index
+
+        batches = batched(users(), 4)
+
+        assert next(batches) == [0, 1, 2, 3]
+        assert len(pulled) == 4
+        assert list(batches) == [[4, 5, 6, 7], [8, 9]]
+
+    def test_in_flight_batches_are_bounded(self):
+        """Test backpressure on concurrently posted batches"""
+        server = BatchServer()
+        with AsyncPetstoreClient(server, concurrency=16) as async_client:
+            report = BulkImporter(async_client, batch_size=10, in_flight=3).run(make_users(200))
+
+        assert server.peak == 3
+        assert report.summary()["created"] == 200
+        assert report.summary()["batches"] == 20
+        assert report.verified == 200
+
+    def test_failed_batches_are_reported(self):
+        """Test that failed batches are summarized and not verified"""
+        server = BatchServer(reject={"user10"})
+        with AsyncPetstoreClient(server) as async_client:
+            report = BulkImporter(async_client, batch_size=10).run(make_users(30))
+
+        assert report.failures == [("user10", 'HTTP 500: {"message": "boom"}')]
+        assert report.verified == 20
+
+    def test_verification_catches_missing_users(self):
+        """Test that users the server did not keep are reported"""
+        server = BatchServer()
+        with AsyncPetstoreClient(server) as async_client:
+            importer = BulkImporter(async_client, batch_size=5)
+            report = importer.run(make_users(10), verify=False)
+            del server.users["user3"]
+            async_client.run(importer.verify(report))
+
+        assert report.verified == 9
+        assert report.verify_failures[0][0] == "user3"
+
+    def test_verification_reports_wrong_users(self):
+        """Test that a user stored under another name is reported, each body parsed once"""
+        server = BatchServer()
+        responses = []
+        request = server.request
+
+        def recording_request(*args, **kwargs):
+            responses.append(request(*args, **kwargs))
+            return responses[-1]
+
+        server.request = recording_request
+        with AsyncPetstoreClient(server) as async_client:
+            importer = BulkImporter(async_client, batch_size=5)
+            report = importer.run(make_users(10), verify=False)
+            server.users["user3"] = {"username": "user4"}
+            responses.clear()
+            async_client.run(importer.verify(report))
+
+        assert report.verified == 9
+        assert report.verify_failures == [("user3", "got user 'user4'")]
+        assert [response.parsed for response in responses] == [1] * 10
+
+    def test_unknown_endpoint(self):
+        """Test rejecting endpoints other than the bulk user endpoints"""
+        with AsyncPetstoreClient(BatchServer()) as async_client, pytest.raises(ValueError):
+            BulkImporter(async_client, endpoint="/user")
+
+    def test_tune_batch_size(self):
+        """Test that per-request overhead makes larger batches win"""
+        server = BatchServer(delay=0.005)
+        cleaned = []
+        with AsyncPetstoreClient(server) as async_client:
+            best, reports = tune_batch_size(
+                async_client, lambda count: make_users(count, prefix=f"t{len(cleaned)}_"), 100,
+                sizes=(5, 50), cleanup=cleaned.append, in_flight=1,
+            )
+
+        assert best == 50
+        assert sorted(reports) == [5, 50]
+        assert [len(usernames) for usernames in cleaned] == [100, 100]
+
+    def test_user_stream(self):
+        """Test generating a user stream in bulk chunks"""
+        users = list(generate_user_stream(25, chunk_size=10))
+
+        assert len(users) == 25
+        assert len({user["username"] for user in users}) == 25
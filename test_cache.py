@@ -0,0 +1,179 @@
+"""
+Tests for the client-side GET response cache
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from petstore.cache import ResponseCache, cache_key, resource_family
+from petstore.client import PetstoreClient
+from petstore.factories import generate_pet_data
+from petstore.server import PetstoreServer
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    """Local server URL, cache counters need real upstream calls even when replaying cassettes"""
+    with PetstoreServer() as server:
+        yield server.url
+
+
+class TestResponseCache:
+    """Tests for expiry, eviction and invalidation"""
+
+    def test_resource_family(self):
+        """Test mapping paths to the family a write invalidates"""
+        assert resource_family("/pet/12/uploadImage") == "/pet"
+        assert resource_family("/pet/findByStatus") == "/pet"
+        assert resource_family("/store/order/3") == "/store/order"
+        assert resource_family("/store/inventory") == "/store/inventory"
+        assert resource_family("/user/alice") == "/user"
+
+    def test_key_includes_query_and_headers(self):
+        """Test that params order does not matter but values and headers do"""
+        url = "http://example.com/v2/pet/findByStatus"
+
+        assert cache_key(url, [("a", 1), ("b", 2)]) == cache_key(url + "?a=1&b=2")
+        assert cache_key(url, {"status": "sold"}) != cache_key(url, {"status": "pending"})
+        assert cache_key(url, headers={"Accept": "application/xml"}) != cache_key(url)
+
+    def test_ttl_expiry(self):
+        """Test that entries are refetched once their TTL has passed"""
+        clock = FakeClock()
+        cache = ResponseCache(ttl=5, clock=clock)
+
+        first = cache.fetch("k", "/store/inventory", FakeResponse)
+        assert cache.fetch("k", "/store/inventory", FakeResponse) is first
+        clock.now = 6
+        assert cache.fetch("k", "/store/inventory", FakeResponse) is not first
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first"""
+        cache = ResponseCache(maxsize=2)
+        cache.fetch("a", "/pet/1", FakeResponse)
+        cache.fetch("b", "/pet/2", FakeResponse)
+        cache.fetch("a", "/pet/1", FakeResponse)
+        cache.fetch("c", "/pet/3", FakeResponse)
+
+        assert len(cache) == 2
+        cache.fetch("a", "/pet/1", FakeResponse)
+        cache.fetch("b", "/pet/2", FakeResponse)
+        assert (cache.hits, cache.misses) == (2, 4)
+
+    def test_only_success_is_cached(self):
+        """Test that errors are always refetched"""
+        cache = ResponseCache()
+        cache.fetch("k", "/pet/1", lambda: FakeResponse(404))
+        cache.fetch("k", "/pet/1", lambda: FakeResponse(404))
+
+        assert cache.misses == 2
+        assert len(cache) == 0
+
+    def test_pet_writes_invalidate_inventory(self):
+        """Test invalidating the written family and the reads derived from it"""
+        cache = ResponseCache()
+        cache.fetch("pet", "/pet/1", FakeResponse)
+        cache.fetch("inventory", "/store/inventory", FakeResponse)
+        cache.fetch("user", "/user/alice", FakeResponse)
+
+        cache.invalidate("/pet")
+
+        assert cache.invalidations == 2
+        assert len(cache) == 1
+
+    def test_write_during_fetch_discards_result(self):
+        """Test that a response racing a write is returned but not cached"""
+        cache = ResponseCache()
+
+        def send():
+            cache.invalidate("/pet/1")
+            return FakeResponse()
+
+        cache.fetch("k", "/pet/1", send)
+
+        assert len(cache) == 0
+
+    def test_concurrent_gets_are_coalesced(self):
+        """Test that identical in-flight GETs share one upstream call"""
+        cache = ResponseCache()
+        release = threading.Event()
+        calls = []
+
+        def send():
+            calls.append(1)
+            release.wait(5)
+            return FakeResponse()
+
+        with ThreadPoolExecutor(8) as executor:
+            futures = [executor.submit(cache.fetch, "k", "/store/inventory", send) for _ in range(8)]
+            while cache.coalesced < 7:
+                threading.Event().wait(0.001)
+            release.set()
+            responses = {id(future.result()) for future in futures}
+
+        assert len(calls) == 1
+        assert len(responses) == 1
+        assert cache.stats()["hit_ratio"] == pytest.approx(7 / 8)
+
+    def test_errors_propagate_to_waiters(self):
+        """Test that a failed upstream call is not cached"""
+        cache = ResponseCache()
+
+        def send():
+            raise ConnectionError("down")
+
+        with pytest.raises(ConnectionError):
+            cache.fetch("k", "/pet/1", send)
+        assert cache.fetch("k", "/pet/1", FakeResponse).status_code == 200
+
+
+class TestCachedClient:
+    """Tests for the cache wired into PetstoreClient"""
+
+    def test_reads_hit_until_written(self, server_url):
+        """Test GET caching and invalidation by a write to the same resource"""
+        pet_data = generate_pet_data(status="available")
+        with PetstoreClient(server_url, cache=ResponseCache()) as petstore_client:
+            petstore_client.post("/pet", json=pet_data)
+            first = petstore_client.get(f"/pet/{pet_data['id']}")
+            second = petstore_client.get(f"/pet/{pet_data['id']}")
+            inventory = petstore_client.get("/store/inventory").json()
+
+            petstore_client.put("/pet", json=dict(pet_data, status="sold"))
+            updated = petstore_client.get(f"/pet/{pet_data['id']}")
+            new_inventory = petstore_client.get("/store/inventory").json()
+            petstore_client.delete(f"/pet/{pet_data['id']}")
+
+            stats = petstore_client.cache.stats()
+            sent = petstore_client.connection_stats()["requests"]
+
+        assert second is first
+        assert updated.json()["status"] == "sold"
+        assert new_inventory.get("sold", 0) == inventory.get("sold", 0) + 1
+        assert stats["hits"] == 1
+        assert sent == 7
+
+    def test_login_is_never_cached(self, server_url):
+        """Test that session endpoints always reach the server"""
+        with PetstoreClient(server_url, cache=ResponseCache()) as petstore_client:
+            params = {"username": "alice", "password": "secret"}
+            petstore_client.get("/user/login", params=params)
+            petstore_client.get("/user/login", params=params)
+
+            assert petstore_client.cache.stats()["hits"] == 0
+            assert petstore_client.connection_stats()["requests"] == 2
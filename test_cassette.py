@@ -0,0 +1,112 @@
+"""
+Tests for cassette record/replay
+"""
+import base64
+import io
+
+import pytest
+
+from petstore.cassette import Cassette, CassetteAdapter, CassetteMiss, CassetteRecorder, read_meta, request_key
+from petstore.client import PetstoreClient
+from petstore.server import PetstoreServer
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """Record a short user flow against a local server and return the cassette path"""
+    path = str(tmp_path / "petstore.jsonl")
+    with PetstoreServer() as server:
+        recorder = CassetteRecorder(path, seed=1)
+        with PetstoreClient(server.url, adapter_class=CassetteAdapter, recorder=recorder) as recording_client:
+            recording_client.get("/user/alice")
+            recording_client.post("/user", json={"id": 1, "username": "alice"})
+            recording_client.get("/user/alice")
+            recording_client.get("/pet/findByStatus", params={"status": "sold", "limit": "5"})
+    return path
+
+
+class TestRequestKey:
+    """Tests for request key normalization"""
+
+    def test_host_and_query_order_are_ignored(self):
+        """Test that keys only depend on path and sorted query"""
+        assert request_key("GET", "http://a:1/v2/pet?b=2&a=1", None) == request_key("GET", "https://b/v2/pet?a=1&b=2", b"")
+
+    def test_json_bodies_are_canonical(self):
+        """Test that key order and volatile fields do not change the key"""
+        first = request_key("POST", "/store/order", b'{"id": 1, "shipDate": "2024-01-01T00:00:00Z"}')
+        second = request_key("POST", "/store/order", b'{"shipDate": "2030-01-01T00:00:00Z", "id": 1}')
+
+        assert first == second
+        assert first != request_key("POST", "/store/order", b'{"id": 2}')
+
+
+class TestReplay:
+    """Tests for replaying recorded traffic"""
+
+    def test_replay_follows_call_sequence(self, recording):
+        """Test that repeated calls replay in recorded order"""
+        with PetstoreClient("http://cassette.invalid/v2", adapter_class=CassetteAdapter,
+                            cassette=Cassette(recording)) as replay_client:
+            assert replay_client.get("/user/alice").status_code == 404
+            assert replay_client.post("/user", json={"username": "alice", "id": 1}).status_code == 200
+            replayed = replay_client.get("/user/alice")
+            assert replayed.status_code == 200
+            assert replayed.json()["username"] == "alice"
+            assert replay_client.get("/pet/findByStatus?limit=5&status=sold").json() == []
+
+    def test_unknown_request_raises(self, recording):
+        """Test that requests missing from the cassette fail loudly"""
+        with PetstoreClient("http://cassette.invalid/v2", adapter_class=CassetteAdapter,
+                            cassette=Cassette(recording)) as replay_client:
+            with pytest.raises(CassetteMiss):
+                replay_client.get("/user/bob")
+
+    def test_index_is_built_lazily(self, recording):
+        """Test that opening a cassette does not read it"""
+        cassette = Cassette(recording)
+        assert cassette._index is None
+
+        assert len(cassette) == 4
+        assert read_meta(recording)["seed"] == 1
+
+
+class TestStreamedRecording:
+    """Tests for recording bodies as the caller streams them"""
+
+    def test_streamed_body_is_recorded_once_read(self, tmp_path):
+        """Test that a streamed body stays unread at send time and replays in full, even when left early"""
+        path = str(tmp_path / "petstore.jsonl")
+        with PetstoreServer() as server:
+            for index in range(300):
+                server.app.storage.put_pet({"id": index + 1, "name": f"Pet_{index}", "status": "sold"})
+            recorder = CassetteRecorder(path, seed=1)
+            with PetstoreClient(server.url, adapter_class=CassetteAdapter, recorder=recorder) as recording_client:
+                response = recording_client.get("/pet/findByStatus", params={"status": "sold"}, stream=True)
+                assert len(Cassette(path)) == 0
+                pets = list(recording_client.stream_array("/pet/findByStatus", params={"status": "sold"}))
+                first = next(iter(recording_client.stream_array("/pet/findByTags", params={"tags": "x"})), None)
+                response.close()
+                recording_client.get("/store/inventory", stream=True)
+            recorder.close()
+
+        assert len(pets) == 300
+        assert first is None
+        with PetstoreClient("http://cassette.invalid/v2", adapter_class=CassetteAdapter,
+                            cassette=Cassette(path)) as replay_client:
+            assert replay_client.get("/pet/findByStatus", params={"status": "sold"}).json() == pets
+            assert list(replay_client.stream_array("/pet/findByStatus", params={"status": "sold"})) == pets
+            assert replay_client.get("/store/inventory").json() == {"sold": 300}
+
+    def test_binary_bodies(self, tmp_path):
+        """Test that bodies that are not UTF-8 are spooled as base64"""
+        path = str(tmp_path / "petstore.jsonl")
+        payload = bytes(range(256)) * 5000
+        recorder = CassetteRecorder(path)
+        recorder._write_spooled({"key": "GET /v2/blob -", "status": 200, "reason": "OK", "headers": {}},
+                                io.BytesIO(payload))
+        recorder.close()
+
+        record = Cassette(path).lookup("GET", "/v2/blob", None)
+
+        assert base64.b64decode(record["body_b64"]) == payload
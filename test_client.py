@@ -0,0 +1,60 @@
+"""
+Tests for the pooled Petstore client
+"""
+import subprocess
+import sys
+
+import pytest
+
+from petstore.client import PetstoreClient
+from petstore.server import PetstoreServer
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    """Local server URL, pooling needs real sockets even when replaying cassettes"""
+    with PetstoreServer() as server:
+        yield server.url
+
+
+class TestPetstoreClient:
+    """Tests for URL handling and connection reuse"""
+
+    def test_url_joins_paths(self):
+        """Test building absolute URLs from API paths"""
+        petstore_client = PetstoreClient("http://example.com/v2/")
+
+        assert petstore_client.url("/pet") == "http://example.com/v2/pet"
+        assert petstore_client.url("store/inventory") == "http://example.com/v2/store/inventory"
+        assert petstore_client.url("https://other.example.com/x") == "https://other.example.com/x"
+
+    def test_connections_are_reused(self, server_url):
+        """Test that sequential requests share one keep-alive connection"""
+        with PetstoreClient(server_url) as petstore_client:
+            for _ in range(5):
+                assert petstore_client.get("/store/inventory").status_code == 200
+            stats = petstore_client.connection_stats()
+
+        assert stats["requests"] == 5
+        assert stats["connections"] == 1
+        assert stats["reused"] == 4
+
+    def test_stats_survive_close(self, server_url):
+        """Test that counters are kept after the pool is closed"""
+        petstore_client = PetstoreClient(server_url)
+        petstore_client.get("/user/logout")
+        petstore_client.close()
+
+        assert petstore_client.connection_stats()["requests"] == 1
+
+
+def test_package_imports_lazily():
+    """Test that importing petstore defers requests until a client is used"""
+    script = (
+        "import sys, petstore\n"
+        "assert 'requests' not in sys.modules\n"
+        "assert petstore.PetstoreClient.__module__ == 'petstore.client'\n"
+        "assert 'requests' in sys.modules\n"
+    )
+
+    subprocess.run([sys.executable, "-c", script], check=True)
@@ -0,0 +1,172 @@
+"""
+Tests for gzip/deflate content coding and body size accounting
+"""
+import gzip
+import zlib
+
+import pytest
+
+from petstore.app import PetstoreApp
+from petstore.client import PetstoreClient
+from petstore.compression import compress, compress_body, decompress, negotiate
+from petstore.factories import generate_pet_data, generate_users
+from petstore.inprocess import INPROCESS_URL, InProcessAdapter, WSGIApp
+from petstore.metrics import Metrics
+from petstore.storage import encode_json
+
+
+@pytest.fixture
+def compressing_client():
+    """In-process client with metrics that gzips request bodies of 256 bytes or more"""
+    with PetstoreClient(
+        INPROCESS_URL, adapter_class=InProcessAdapter, app=WSGIApp(), metrics=Metrics(), compress_min_size=256
+    ) as petstore_client:
+        yield petstore_client
+
+
+def add_pets(petstore_client, count, status="available"):
+    for _ in range(count):
+        petstore_client.post("/pet", json=dict(generate_pet_data(), status=status))
+
+
+class TestContentCoding:
+    """Tests for negotiating, compressing and decoding bodies"""
+
+    @pytest.mark.parametrize("accept_encoding, expected", [
+        ("gzip, deflate", "gzip"),
+        ("deflate", "deflate"),
+        ("gzip;q=0.5, deflate", "deflate"),
+        ("br, *;q=0.1", "gzip"),
+        ("gzip;q=0, identity", None),
+        ("", None),
+        (None, None),
+    ])
+    def test_negotiate(self, accept_encoding, expected):
+        """Test q-values, wildcards and unsupported codings"""
+        assert negotiate(accept_encoding) == expected
+
+    @pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+    def test_round_trip(self, encoding):
+        """Test that bodies decode to the original and gzip output is reproducible"""
+        body = encode_json(generate_users(50))
+        compressed = compress(body, encoding)
+
+        assert decompress(compressed, encoding) == body
+        assert compress(body, encoding) == compressed
+        assert len(compressed) < len(body) / 2
+
+    def test_decompress_interoperates(self):
+        """Test gzip from the standard library and raw deflate streams"""
+        body = b'{"name": "doggie"}' * 10
+        raw_deflate = zlib.compressobj(wbits=-15)
+
+        assert decompress(gzip.compress(body), "gzip") == body
+        assert decompress(raw_deflate.compress(body) + raw_deflate.flush(), "deflate") == body
+        assert decompress(body, "identity") == body
+
+    def test_compress_body_threshold(self):
+        """Test that small and streamed bodies are left alone"""
+        body = b"x" * 100
+
+        assert compress_body(body, min_size=101) == (body, None)
+        assert compress_body(iter([body]), min_size=0)[1] is None
+        assert compress_body(body, min_size=100)[1] == "gzip"
+
+
+class TestAppCompression:
+    """Tests for compressed responses and request bodies in PetstoreApp"""
+
+    def test_compresses_large_responses(self):
+        """Test that only responses over the threshold are compressed, as negotiated"""
+        app = PetstoreApp(compress_min_size=512)
+        for _ in range(20):
+            app.handle("POST", "/pet", body=encode_json(dict(generate_pet_data(), status="sold")))
+
+        status, headers, payload = app.handle(
+            "GET", "/pet/findByStatus", "status=sold", {"Accept-Encoding": "gzip, deflate"}
+        )
+        _, plain_headers, plain = app.handle("GET", "/pet/findByStatus", "status=sold")
+        _, small_headers, _ = app.handle("GET", "/store/inventory", "", {"Accept-Encoding": "gzip"})
+
+        assert status == 200
+        assert ("Content-Encoding", "gzip") in headers
+        assert ("Vary", "Accept-Encoding") in headers
+        assert gzip.decompress(payload) == plain
+        assert "Content-Encoding" not in dict(plain_headers)
+        assert "Content-Encoding" not in dict(small_headers)
+
+    def test_decodes_request_bodies(self):
+        """Test gzip request bodies, unknown codings and corrupt data"""
+        app = PetstoreApp()
+        users = encode_json(generate_users(3))
+
+        assert app.handle("POST", "/user/createWithList", headers={"Content-Encoding": "gzip"},
+                          body=gzip.compress(users))[0] == 200
+        assert app.handle("POST", "/user/createWithList", headers={"Content-Encoding": "br"}, body=users)[0] == 415
+        assert app.handle("POST", "/user/createWithList", headers={"Content-Encoding": "gzip"}, body=users)[0] == 400
+
+
+class TestClientCompression:
+    """Tests for client-side compression and wire size accounting"""
+
+    def test_large_bodies_are_compressed(self, compressing_client):
+        """Test that createWithList batches are gzipped and counted before and after"""
+        users = generate_users(20)
+
+        response = compressing_client.post("/user/createWithList", json=users)
+        compressing_client.post("/user", json=generate_users(1)[0])
+
+        assert response.status_code == 200
+        assert response.request.headers["Content-Encoding"] == "gzip"
+        assert compressing_client.get(f"/user/{users[-1]['username']}").json() == users[-1]
+        transfer = compressing_client.metrics.transfer()
+        batch = transfer["POST /user/createWithList"]
+        assert batch["request_bytes"] == len(encode_json(users))
+        assert batch["request_wire_bytes"] < batch["request_bytes"] / 2
+        single = transfer["POST /user"]
+        assert single["request_wire_bytes"] == single["request_bytes"] > 0
+
+    def test_template_bodies_are_compressed(self, compressing_client):
+        """Test that RequestTemplate bodies follow the client's threshold"""
+        create_users = compressing_client.template("POST", "/user/createWithList")
+
+        response = create_users.send(encode_json(generate_users(20)))
+
+        assert response.status_code == 200
+        assert response.request.headers["Content-Encoding"] == "gzip"
+
+    def test_response_bytes(self, compressing_client):
+        """Test decoded and wire sizes of buffered and streamed responses"""
+        add_pets(compressing_client, 30, status="pending")
+
+        pets = compressing_client.get("/pet/findByStatus", params={"status": "pending"}).json()
+        streamed = list(compressing_client.stream_array("/pet/findByStatus", params={"status": "pending"}))
+
+        assert streamed == pets
+        counts = compressing_client.metrics.transfer()["GET /pet/findByStatus"]
+        assert counts["response_bytes"] == 2 * len(encode_json(pets))
+        assert 0 < counts["response_wire_bytes"] < counts["response_bytes"] / 2
+
+    def test_identity(self):
+        """Test that accept_encoding='identity' turns response compression off"""
+        with PetstoreClient(INPROCESS_URL, adapter_class=InProcessAdapter, app=WSGIApp(),
+                            accept_encoding="identity", metrics=Metrics()) as petstore_client:
+            add_pets(petstore_client, 30)
+            response = petstore_client.get("/pet/findByStatus", params={"status": "available"})
+
+            assert "Content-Encoding" not in response.headers
+            counts = petstore_client.metrics.transfer()["GET /pet/findByStatus"]
+            assert counts["response_wire_bytes"] == counts["response_bytes"]
+
+
+def test_transfer_merges():
+    """Test that byte counts survive to_dict and merge, e.g. from xdist workers"""
+    first, second = Metrics(), Metrics()
+    first.add_bytes("GET", "/pet/1", "response_bytes", 100)
+    second.add_bytes("GET", "/pet/2", "response_bytes", 50)
+    second.add_bytes("GET", "/pet/2", "response_wire_bytes", 20)
+
+    merged = Metrics().merge(first.to_dict()).merge(second)
+
+    assert merged.transfer()["GET /pet/{petId}"]["response_bytes"] == 150
+    assert merged.format_transfer_table()[-1].split()[-1] == "87%"
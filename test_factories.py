@@ -0,0 +1,73 @@
+"""
+Tests for the bulk payload factories
+"""
+import json
+import random
+
+import pytest
+
+from petstore import factories, ids
+from petstore.storage import encode_json
+
+
+@pytest.fixture
+def allocator():
+    """Fresh ID allocator, restored afterwards so other tests keep their IDs"""
+    previous = ids._allocator
+    yield ids.configure(0, 1, seed=11)
+    ids._allocator = previous
+
+
+class TestBulkFactories:
+    """Tests for bulk generation and its output formats"""
+
+    def test_pets_match_single_factory(self, allocator):
+        """Test that bulk pets equal the per-payload factory"""
+        pets = factories.generate_pets(5, status="sold")
+        ids.configure(0, 1, seed=11)
+
+        assert pets == [factories.generate_pet_data(status="sold") for _ in range(5)]
+
+    @pytest.mark.parametrize("generate", [factories.generate_pets, factories.generate_users])
+    def test_bytes_outputs_match_dicts(self, allocator, generate):
+        """Test that the byte templates encode exactly what encode_json would"""
+        random.seed(0)
+        dicts = generate(20, output=factories.DICTS)
+        ids.configure(0, 1, seed=11)
+        random.seed(0)
+        items = generate(20, output=factories.ITEMS)
+        ids.configure(0, 1, seed=11)
+        random.seed(0)
+        array = generate(20, output=factories.ARRAY)
+
+        assert items == [encode_json(document) for document in dicts]
+        assert json.loads(array) == dicts
+
+    def test_orders_share_one_ship_date(self, allocator):
+        """Test seeded pet IDs and a single ship date per batch"""
+        orders = json.loads(factories.generate_orders(50, status="approved", seed=3, output=factories.ARRAY))
+        ids.configure(0, 1, seed=11)
+        again = factories.generate_orders(50, status="approved", seed=3)
+
+        assert [order["petId"] for order in orders] == [order["petId"] for order in again]
+        assert len({order["shipDate"] for order in orders}) == 1
+        assert all(1 <= order["petId"] <= 1000 and order["status"] == "approved" for order in orders)
+
+    def test_usernames_are_unique(self, allocator):
+        """Test unique usernames of the requested length"""
+        usernames = factories.generate_usernames(10000, length=10, seed=1)
+
+        assert len(set(usernames)) == 10000
+        assert all(len(username) == 10 and username.isalnum() for username in usernames)
+
+    def test_seed_reproduces_users(self, allocator):
+        """Test deterministic users for a given seed"""
+        first = factories.generate_users(10, seed=5, output=factories.ARRAY)
+        ids.configure(0, 1, seed=11)
+
+        assert factories.generate_users(10, seed=5, output=factories.ARRAY) == first
+
+    def test_unknown_output(self, allocator):
+        """Test rejecting an unknown output format"""
+        with pytest.raises(ValueError):
+            factories.generate_pets(1, output="xml")
@@ -0,0 +1,64 @@
+"""
+Tests for the per-worker ID allocator
+"""
+import pytest
+
+from petstore.ids import ID_RANGES, IdAllocator, to_base36
+
+
+class TestIdAllocator:
+    """Tests for collision-free ID allocation"""
+
+    def test_worker_slices_are_disjoint(self):
+        """Test that every worker owns a separate part of each range"""
+        allocators = [IdAllocator(index, 4) for index in range(4)]
+
+        for kind, (low, high) in ID_RANGES.items():
+            slices = sorted(allocator.slice_for(kind) for allocator in allocators)
+            assert slices[0][0] == low
+            assert slices[-1][1] <= high
+            for (_, previous_high), (next_low, _) in zip(slices, slices[1:]):
+                assert previous_high < next_low
+
+    def test_ids_do_not_collide_across_workers(self):
+        """Test that concurrent workers draw distinct IDs"""
+        allocators = [IdAllocator(index, 3, seed=42) for index in range(3)]
+        drawn = [allocator.next_id("order") for allocator in allocators for _ in range(1000)]
+
+        assert len(set(drawn)) == len(drawn)
+
+    def test_same_seed_reproduces_ids(self):
+        """Test deterministic IDs for a given seed"""
+        first = IdAllocator(1, 2, seed=7)
+        second = IdAllocator(1, 2, seed=7)
+        other = IdAllocator(1, 2, seed=8)
+
+        assert [first.next_id("pet") for _ in range(5)] == [second.next_id("pet") for _ in range(5)]
+        assert other.next_id("pet") != IdAllocator(1, 2, seed=7).next_id("pet")
+
+    def test_ids_stay_inside_slice(self):
+        """Test wrap-around at the end of a slice"""
+        allocator = IdAllocator(0, 999999, seed=0)
+        low, high = allocator.slice_for("order")
+
+        assert [allocator.next_id("order") for _ in range(3)] == [low, low, low]
+        assert low == high
+
+    def test_tokens_are_unique(self):
+        """Test unique username tokens"""
+        allocator = IdAllocator()
+        tokens = {allocator.next_token() for _ in range(500)}
+
+        assert len(tokens) == 500
+        assert all(len(token) == 6 for token in tokens)
+
+    def test_invalid_worker_index(self):
+        """Test rejecting a worker index outside the worker count"""
+        with pytest.raises(ValueError):
+            IdAllocator(2, 2)
+
+    def test_to_base36(self):
+        """Test base36 encoding"""
+        assert to_base36(0) == "0"
+        assert to_base36(35) == "z"
+        assert to_base36(36) == "10"
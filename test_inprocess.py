@@ -0,0 +1,92 @@
+"""
+Tests for the in-process WSGI/ASGI transport
+"""
+import asyncio
+import os
+from wsgiref.validate import validator
+
+import pytest
+
+from petstore.client import PetstoreClient
+from petstore.factories import generate_pet_data, generate_user_data
+from petstore.inprocess import INPROCESS_URL, ASGIApp, InProcessAdapter, WSGIApp, is_asgi
+from petstore.upload import upload_image
+
+
+WOLF_IMAGE = os.path.join(os.path.dirname(__file__), "wolf.jpg")
+
+
+@pytest.fixture(params=["wsgi", "asgi"])
+def inprocess_client(request):
+    """Client whose requests are handled in-process, through each interface"""
+    # wsgiref's validator checks both sides of the WSGI protocol on every call
+    app = validator(WSGIApp()) if request.param == "wsgi" else ASGIApp()
+    with PetstoreClient(INPROCESS_URL, adapter_class=InProcessAdapter, app=app) as petstore_client:
+        yield petstore_client
+
+
+class TestInProcessAdapter:
+    """Tests for requests semantics without sockets"""
+
+    def test_round_trip(self, inprocess_client):
+        """Test creating and reading a pet with status, headers and timings"""
+        pet_data = generate_pet_data()
+
+        assert inprocess_client.post("/pet", json=pet_data).status_code == 200
+        response = inprocess_client.get(f"/pet/{pet_data['id']}")
+
+        assert response.json() == pet_data
+        assert response.reason == "OK"
+        assert response.headers["Content-Type"] == "application/json"
+        assert response.url == f"{INPROCESS_URL}/pet/{pet_data['id']}"
+        assert response.timings["ttfb"] > 0
+        assert inprocess_client.get("/nowhere").status_code == 404
+
+    def test_quoted_path_and_query(self, inprocess_client):
+        """Test that escaped path segments and query strings reach the app intact"""
+        user_data = generate_user_data()
+        user_data["username"] = "in process%user"
+        inprocess_client.post("/user", json=user_data)
+
+        assert inprocess_client.get("/user/in%20process%25user").json()["username"] == "in process%user"
+        response = inprocess_client.get("/user/login", params={"username": "a", "password": "b"})
+        assert response.status_code == 200
+
+    def test_streamed_bodies(self, inprocess_client):
+        """Test streamed multipart uploads and streamed JSON array responses"""
+        pet_data = generate_pet_data()
+        inprocess_client.post("/pet", json=pet_data)
+
+        uploaded = upload_image(inprocess_client, pet_data["id"], WOLF_IMAGE, additional_metadata="wolf")
+        pets = list(inprocess_client.stream_array("/pet/findByStatus", params={"status": "available"}))
+
+        assert uploaded.status_code == 200
+        assert f"{os.path.getsize(WOLF_IMAGE)} bytes" in uploaded.json()["message"]
+        assert pet_data["id"] in {pet["id"] for pet in pets}
+
+
+def test_is_asgi():
+    """Test telling ASGI callables from WSGI ones"""
+    async def asgi_function(scope, receive, send):
+        pass
+
+    assert is_asgi(ASGIApp())
+    assert is_asgi(asgi_function)
+    assert not is_asgi(WSGIApp())
+    assert not is_asgi(lambda environ, start_response: [])
+
+
+def test_asgi_lifespan():
+    """Test that the ASGI app completes startup and shutdown"""
+    messages = [{"type": "lifespan.shutdown"}, {"type": "lifespan.startup"}]
+    sent = []
+
+    async def receive():
+        return messages.pop()
+
+    async def send(message):
+        sent.append(message["type"])
+
+    asyncio.run(ASGIApp()({"type": "lifespan"}, receive, send))
+
+    assert sent == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
@@ -0,0 +1,112 @@
+"""
+Tests for the open-loop load generator
+"""
+import time
+
+import pytest
+
+from petstore.cache import ResponseCache
+from petstore.distributed import DistributedLoadError, make_client, run_distributed
+from petstore.histogram import LatencyHistogram
+from petstore.inprocess import INPROCESS_URL
+from petstore.load import EndpointLoad, LoadReport, run_load
+
+
+class TestLoadGeneration:
+    """Tests for rate control and reporting"""
+
+    def test_rates_are_met(self, client):
+        """Test that each endpoint receives its target rate"""
+        report = run_load(client, {"get_inventory": 100, "create_pet": 40}, duration=0.5, concurrency=8)
+        summary = report.summary()
+
+        assert summary["get_inventory"]["requests"] == 50
+        assert summary["create_pet"]["requests"] == 20
+        assert summary["get_inventory"]["errors"] == 0
+        assert summary["create_pet"]["latency"]["count"] == 20
+
+    def test_errors_are_counted(self, client):
+        """Test error accounting for failing calls"""
+        endpoints = {"missing_pet": lambda petstore_client: petstore_client.get("/pet/9999999991")}
+
+        report = run_load(client, {"missing_pet": 20}, duration=0.25, endpoints=endpoints)
+
+        assert report.summary()["missing_pet"]["error_rate"] == 1.0
+
+    def test_unknown_endpoint(self, client):
+        """Test rejecting rates for endpoints that do not exist"""
+        with pytest.raises(ValueError):
+            run_load(client, {"no_such_endpoint": 10}, duration=0.1)
+
+    def test_cache_serves_repeated_gets(self, base_url):
+        """Test that a load run with a response cache sends repeated templated GETs once"""
+        if base_url.endswith(".invalid/v2"):
+            pytest.skip("needs a live server")
+        if base_url == INPROCESS_URL:
+            base_url = "wsgi"
+        with make_client(base_url, cache=ResponseCache(ttl=60)) as petstore_client:
+            report = run_load(petstore_client, {"get_inventory": 100}, duration=0.2)
+            stats = petstore_client.cache.stats()
+
+        assert report.summary()["get_inventory"]["errors"] == 0
+        assert stats["misses"] == 1
+        assert stats["hits"] + stats["coalesced"] == 19
+
+    def test_phase_shifts_first_request(self, client):
+        """Test that a phase delays the schedule by a fraction of the interval"""
+        sent = []
+        endpoints = {"tick": lambda petstore_client: sent.append(time.perf_counter())}
+
+        started = time.perf_counter()
+        run_load(client, {"tick": 10}, duration=0.15, endpoints=endpoints, ok=lambda response: True, phase=0.5)
+
+        assert len(sent) == 1
+        assert sent[0] - started == pytest.approx(0.05, abs=0.03)
+
+
+def test_reports_merge_losslessly():
+    """Test that merged reports equal one report over every sample"""
+    samples = [[0.001 * (i + 1) for i in range(50)], [0.1 + 0.002 * i for i in range(30)]]
+    reports = []
+    combined = LatencyHistogram()
+    for index, latencies in enumerate(samples):
+        load = EndpointLoad("get_inventory", None, 50)
+        for seconds in latencies:
+            load.latency.record(seconds)
+            load.service.record(seconds)
+            combined.record(seconds)
+        load.requests = len(latencies)
+        load.errors = index
+        reports.append(LoadReport.from_dict(LoadReport({"get_inventory": load}, 1.0 + index).to_dict()))
+
+    merged = LoadReport.merged(reports).summary()["get_inventory"]
+
+    assert merged["requests"] == 80
+    assert merged["errors"] == 1
+    assert merged["target_rps"] == 100
+    assert merged["latency"] == combined.summary()
+    assert merged["achieved_rps"] == pytest.approx(40.0)
+
+
+class TestDistributedLoad:
+    """Tests for load split across worker processes"""
+
+    def test_rates_are_split(self, request, base_url):
+        """Test that two workers together send each endpoint's rate"""
+        if base_url.endswith(".invalid/v2"):
+            pytest.skip("workers need a live server")
+        if base_url == INPROCESS_URL:
+            # Every worker runs its own in-process app
+            base_url = request.config.getoption("--base-url")
+        report = run_distributed(base_url, {"get_inventory": 40, "create_pet": 20}, duration=0.5, workers=2)
+        summary = report.summary()
+
+        assert summary["get_inventory"]["requests"] == 20
+        assert summary["create_pet"]["requests"] == 10
+        assert summary["create_pet"]["errors"] == 0
+        assert summary["get_inventory"]["latency"]["count"] == 20
+
+    def test_worker_failure(self):
+        """Test that a failing worker's traceback reaches the coordinator"""
+        with pytest.raises(DistributedLoadError, match="Unknown endpoints"):
+            run_distributed("wsgi", {"no_such_endpoint": 10}, duration=0.1, workers=2)
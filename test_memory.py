@@ -0,0 +1,109 @@
+"""
+Tests for per-test memory profiling
+"""
+import pathlib
+import tracemalloc
+
+import pytest
+
+from petstore.memory import MemoryUsage, format_size, parse_size, reset, usage_since_reset
+
+
+pytest_plugins = ["pytester"]
+
+
+@pytest.mark.parametrize("text, size", [
+    ("1000", 1000),
+    ("512K", 512 * 1024),
+    ("64MiB", 64 * 1024 ** 2),
+    ("1.5 GB", int(1.5 * 1024 ** 3)),
+    ("2kib", 2048),
+])
+def test_parse_size(text, size):
+    """Test plain bytes and binary suffixes"""
+    assert parse_size(text) == size
+
+
+@pytest.mark.parametrize("text", ["", "64 MB of RAM", "-1K", "1T"])
+def test_parse_size_rejects(text):
+    """Test rejecting malformed sizes"""
+    with pytest.raises(ValueError):
+        parse_size(text)
+
+
+def test_format_size():
+    """Test choosing the unit"""
+    assert [format_size(size) for size in (512, 1536, 3 * 1024 ** 2, 2 * 1024 ** 3)] == [
+        "512 B", "1.5 KiB", "3.0 MiB", "2.0 GiB",
+    ]
+
+
+def test_usage_since_reset():
+    """Test that a transient buffer counts to the peak and a kept one to net and the sites"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        reset()
+        transient = bytearray(4 * 1024 ** 2)
+        del transient
+        kept = bytearray(1024 ** 2)
+        usage = usage_since_reset("test", top=1, budget=2 * 1024 ** 2)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    assert usage.peak >= 4 * 1024 ** 2
+    assert 1024 ** 2 <= usage.net < 2 * 1024 ** 2
+    site, size, count = usage.sites[0]
+    assert site.endswith(f"test_memory.py:{test_usage_since_reset.__code__.co_firstlineno + 9}")
+    assert size >= len(kept)
+    assert usage.over_budget
+
+
+def test_usage_round_trip():
+    """Test that usage survives the serialization of xdist reports"""
+    usage = MemoryUsage("test_a", 2048, 1024, [("a.py:1", 1024, 3)], budget=4096)
+
+    restored = MemoryUsage.from_dict("test_a", usage.to_dict())
+
+    assert restored.to_dict() == usage.to_dict()
+    assert not restored.over_budget
+
+
+def test_memory_budget_fails_tests(pytester):
+    """Test reporting every test and failing the ones over their budget"""
+    pytester.makeconftest(pathlib.Path(__file__).with_name("conftest.py").read_text())
+    pytester.makepyfile(test_allocations="""
+        import pytest
+
+        KEPT = []
+
+        def test_small():
+            assert sum(range(100))
+
+        def test_keeps_buffer():
+            KEPT.append(bytearray(2 * 1024 * 1024))
+
+        @pytest.mark.memory_budget("16MiB")
+        def test_within_own_budget():
+            assert len(bytearray(8 * 1024 * 1024))
+    """)
+
+    result = pytester.runpytest("--memory-budget", "4MiB", "-p", "no:cacheprovider")
+
+    result.assert_outcomes(passed=3)
+    result.stdout.fnmatch_lines([
+        "*petstore memory (highest peak of 3 tests, 0 over budget)*",
+        "*8.0 MiB*test_allocations.py::test_within_own_budget",
+        "*2.0 MiB*2.0 MiB*test_allocations.py::test_keeps_buffer",
+    ])
+
+    result = pytester.runpytest("--memory-budget", "1MiB", "-p", "no:cacheprovider")
+
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines([
+        "*test_keeps_buffer exceeded its memory budget: peak 2.0 MiB > 1.0 MiB",
+        "*Captured memory call*",
+        "*2.0 MiB in*blocks at*test_allocations.py:9",
+    ])
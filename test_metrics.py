@@ -0,0 +1,112 @@
+"""
+Tests for latency histograms and endpoint metrics
+"""
+import socket
+
+import pytest
+
+from petstore.client import PetstoreClient
+from petstore.histogram import LatencyHistogram, bucket_bounds, bucket_index
+from petstore.metrics import Metrics, endpoint_template
+from petstore.server import PetstoreServer
+
+
+class TestLatencyHistogram:
+    """Tests for the HDR-style histogram"""
+
+    def test_bucket_bounds_contain_value(self):
+        """Test that every value maps to a bucket that covers it within 1%"""
+        for value in list(range(600)) + [10 ** exponent + 7 for exponent in range(3, 10)]:
+            low, high = bucket_bounds(bucket_index(value))
+            assert low <= value <= high
+            assert high - low <= max(value // 100, 0) + 1
+
+    def test_percentiles(self):
+        """Test percentiles over a uniform distribution"""
+        histogram = LatencyHistogram()
+        for millis in range(1, 1001):
+            histogram.record(millis / 1000)
+
+        assert histogram.count == 1000
+        assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+        assert histogram.percentile(99) == pytest.approx(0.99, rel=0.01)
+        assert histogram.percentile(100) == 1.0
+
+    def test_merge_is_lossless(self):
+        """Test that merging equals recording everything in one histogram"""
+        combined, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for micros in range(0, 50000, 7):
+            combined.record_value(micros)
+            (first if micros % 2 else second).record_value(micros)
+
+        merged = LatencyHistogram.from_dict(first.to_dict()).merge(second)
+
+        assert merged.to_dict() == combined.to_dict()
+
+    def test_empty_histogram(self):
+        """Test summary of a histogram without samples"""
+        assert LatencyHistogram().summary()["p99"] == 0.0
+
+
+class TestEndpointMetrics:
+    """Tests for per-endpoint metrics"""
+
+    @pytest.mark.parametrize("path, template", [
+        ("/pet/1001", "/pet/{petId}"),
+        ("/pet/findByStatus", "/pet/findByStatus"),
+        ("/pet/1001/uploadImage", "/pet/{petId}/uploadImage"),
+        ("/store/order/7", "/store/order/{orderId}"),
+        ("/store/inventory", "/store/inventory"),
+        ("/user/login?username=a", "/user/login"),
+        ("/user/createWithList", "/user/createWithList"),
+        ("/user/alice", "/user/{username}"),
+    ])
+    def test_endpoint_template(self, path, template):
+        """Test mapping paths to endpoint templates"""
+        assert endpoint_template(path) == template
+
+    def test_client_records_phases(self):
+        """Test that a new connection records connect phases and every request records total"""
+        metrics = Metrics()
+        with PetstoreServer() as server:
+            with PetstoreClient(server.url, metrics=metrics) as petstore_client:
+                petstore_client.get("/pet/1")
+                petstore_client.get("/pet/2")
+
+        assert metrics.endpoints() == ["GET /pet/{petId}"]
+        assert metrics.histogram("GET /pet/{petId}", "total").count == 2
+        assert metrics.histogram("GET /pet/{petId}", "ttfb").count == 2
+        assert metrics.histogram("GET /pet/{petId}", "connect").count == 1
+        assert metrics.histogram("GET /pet/{petId}", "dns").count == 1
+        assert metrics.histogram("GET /pet/{petId}", "tls") is None
+
+    def test_host_is_resolved_once(self, monkeypatch):
+        """Test that a new connection looks its host up once and connects to the result"""
+        lookups = []
+        getaddrinfo = socket.getaddrinfo
+
+        def counting_getaddrinfo(host, *args, **kwargs):
+            lookups.append(host)
+            return getaddrinfo(host, *args, **kwargs)
+
+        monkeypatch.setattr(socket, "getaddrinfo", counting_getaddrinfo)
+        metrics = Metrics()
+        with PetstoreServer() as server:
+            url = server.url.replace("127.0.0.1", "localhost")
+            with PetstoreClient(url, metrics=metrics) as petstore_client:
+                assert petstore_client.get("/store/inventory").status_code == 200
+
+        assert lookups.count("localhost") == 1
+        assert metrics.histogram("GET /store/inventory", "connect").count == 1
+
+    def test_merge_and_report(self):
+        """Test merging worker metrics and rendering reports"""
+        first, second = Metrics(), Metrics()
+        first.record("GET", "/store/inventory", {"total": 0.002})
+        second.record("GET", "/store/inventory", {"total": 0.004})
+
+        merged = Metrics().merge(first).merge(second.to_dict())
+
+        assert merged.histogram("GET /store/inventory").count == 2
+        assert "GET /store/inventory" in merged.to_html()
+        assert merged.format_table()[1].startswith("GET /store/inventory")
@@ -0,0 +1,100 @@
+"""
+Tests for the Petstore models and bulk validators
+"""
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from petstore.factories import generate_order_data, generate_pet_data, generate_user_data
+from petstore.models import INVENTORY, PET_LIST, REGISTRY, USER_LIST, ModelRegistry, Order, Pet, PetstoreModel, User
+
+
+class TestModels:
+    """Tests for camelCase models"""
+
+    def test_pet_round_trip(self):
+        """Test parsing and dumping a pet with wire field names"""
+        pet_data = generate_pet_data()
+
+        pet = Pet.model_validate_json(json.dumps(pet_data))
+
+        assert pet.photo_urls == pet_data["photoUrls"]
+        assert pet.tags[0].name == "tag1"
+        assert pet.model_dump(by_alias=True) == pet_data
+
+    def test_order_parses_ship_date(self):
+        """Test that shipDate becomes a datetime"""
+        order = Order.model_validate(generate_order_data())
+
+        assert order.ship_date.tzinfo is not None
+        assert order.complete is False
+
+    def test_user_accepts_python_names(self):
+        """Test populating by field name"""
+        user = User(username="alice", first_name="Alice")
+
+        assert user.model_dump(by_alias=True, exclude_none=True) == {"username": "alice", "firstName": "Alice"}
+
+
+class TestBulkValidators:
+    """Tests for precompiled list validators"""
+
+    def test_pet_list_from_bytes(self):
+        """Test validating raw response bytes into records"""
+        body = json.dumps([generate_pet_data(status="sold") for _ in range(3)]).encode("utf-8")
+
+        pets = PET_LIST.validate_json(body)
+
+        assert [pet["status"] for pet in pets] == ["sold"] * 3
+        assert pets[0]["category"]["name"] == "Dogs"
+
+    def test_pet_list_rejects_bad_types(self):
+        """Test that schema violations are reported"""
+        with pytest.raises(ValidationError):
+            PET_LIST.validate_json(b'[{"id": "not-a-number", "photoUrls": []}]')
+
+    def test_user_list_and_inventory(self):
+        """Test the user list and inventory validators"""
+        users = USER_LIST.validate_json(json.dumps([generate_user_data()]))
+
+        assert users[0]["userStatus"] == 1
+        assert INVENTORY.validate_json(b'{"available": 3, "sold": 1}') == {"available": 3, "sold": 1}
+
+
+class TestModelRegistry:
+    """Tests for deferred and warmed validators"""
+
+    @pytest.fixture
+    def registry(self):
+        registry = ModelRegistry()
+
+        @registry.model
+        class Owner(PetstoreModel):
+            first_name: str | None = None
+
+        registry.adapter("OWNERS", list[Owner])
+        return registry
+
+    def test_build_is_deferred_to_first_use(self, registry):
+        """Test that validators are built by the first validation, not at definition"""
+        owner = registry.models["Owner"]
+        assert registry.built() == {"Owner": False, "OWNERS": False}
+
+        assert owner.model_validate({"firstName": "Ann"}).first_name == "Ann"
+
+        assert registry.built() == {"Owner": True, "OWNERS": False}
+
+    def test_warm_in_background(self, registry):
+        """Test that one background thread builds every validator"""
+        thread = registry.warm_in_background()
+
+        assert registry.warm_in_background() is thread
+        thread.join(timeout=10)
+        assert all(registry.built().values())
+        assert registry.adapters["OWNERS"].validate_python([{"firstName": "Ann"}])[0].first_name == "Ann"
+
+    def test_schema_registered(self):
+        """Test that every model and bulk validator of the schema is in the registry"""
+        assert {"Pet", "Category", "Tag", "Order", "User", "ApiResponse"} <= set(REGISTRY.models)
+        assert REGISTRY.adapters["PET_LIST"] is PET_LIST
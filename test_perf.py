@@ -0,0 +1,148 @@
+"""
+Tests for SLOs, baselines and regression checks of the endpoint benchmarks
+"""
+import pathlib
+
+import pytest
+
+from petstore.load import ENDPOINTS
+from petstore.perf import (
+    SLO, Baselines, BenchmarkResult, PerfRegression, RecordingCall, check, compare, run_benchmark,
+)
+
+
+pytest_plugins = ["pytester"]
+
+
+def make_result(name="get_inventory", p50=0.010, rps=100.0, jitter=0.0, errors=0):
+    """Result of five rounds whose p50 and throughput vary by +-jitter"""
+    rounds = []
+    for step in (-2, -1, 0, 1, 2):
+        latency = p50 * (1 + step * jitter)
+        rounds.append({
+            "p50": latency, "p95": latency * 2, "p99": latency * 3, "mean": latency, "max": latency * 4,
+            "rps": rps * (1 - step * jitter),
+        })
+    return BenchmarkResult(name, rounds, errors=errors)
+
+
+class TestSLO:
+    """Tests for parsing and checking SLOs"""
+
+    @pytest.mark.parametrize("text, stat, op, limit", [
+        ("p99<200ms", "p99", "<", 0.2),
+        (" p50 <= 500us ", "p50", "<=", 0.0005),
+        ("max<1.5s", "max", "<", 1.5),
+        ("rps>=100", "rps", ">=", 100.0),
+    ])
+    def test_parse(self, text, stat, op, limit):
+        """Test statistics, operators and units"""
+        slo = SLO.parse(text)
+
+        assert (slo.stat, slo.op) == (stat, op)
+        assert slo.limit == pytest.approx(limit)
+
+    @pytest.mark.parametrize("text", ["p99 200ms", "p42<1ms", "rps>10ms"])
+    def test_parse_rejects(self, text):
+        """Test rejecting malformed SLOs"""
+        with pytest.raises(ValueError):
+            SLO.parse(text)
+
+    def test_check(self):
+        """Test that missed SLOs are reported with the measured value"""
+        result = make_result(p50=0.010)
+
+        assert SLO.parse("p99<40ms").check(result) is None
+        assert SLO.parse("p99<20ms").check(result) == "SLO p99<20ms missed: p99=30.00ms"
+        assert SLO.parse("rps>=200").check(result) == "SLO rps>=200 missed: rps=100.0 req/s"
+
+
+class TestRegression:
+    """Tests for statistical comparison with baselines"""
+
+    def test_noise_within_tolerance(self):
+        """Test that a slowdown within the relative tolerance passes"""
+        assert compare(make_result(p50=0.010), make_result(p50=0.012), tolerance=0.25) == []
+
+    def test_slowdown_regresses(self):
+        """Test that latency and throughput regressions are both reported"""
+        regressions = compare(make_result(p50=0.010, rps=100), make_result(p50=0.020, rps=50))
+
+        assert [message.split(" ")[0] for message in regressions] == ["p50", "p95", "p99", "rps"]
+
+    def test_noisy_baseline_widens_limit(self):
+        """Test that rounds spread out in the baseline tolerate more slowdown"""
+        baseline = make_result(p50=0.010, jitter=0.2)
+
+        assert compare(baseline, make_result(p50=0.014), stats=("p50",)) == []
+        assert compare(make_result(p50=0.010), make_result(p50=0.014), stats=("p50",)) != []
+
+    def test_check_raises(self):
+        """Test that SLO misses, regressions and errors fail together"""
+        with pytest.raises(PerfRegression, match="SLO p50<1ms missed.*p50 regressed.*3 requests failed"):
+            check(make_result(p50=0.020, errors=3), [SLO.parse("p50<1ms")], make_result(p50=0.010))
+
+
+def test_baselines_round_trip(tmp_path):
+    """Test saving and loading baselines, keeping endpoints not rerun"""
+    path = tmp_path / "baselines" / "petstore.json"
+    baselines = Baselines(str(path))
+    baselines.update([make_result("get_inventory"), make_result("login")])
+    baselines.save()
+
+    reloaded = Baselines(str(path))
+    reloaded.update([make_result("login", p50=0.5)])
+
+    assert reloaded.get("get_inventory").rounds == make_result("get_inventory").rounds
+    assert reloaded.get("login").stat("p50") == 0.5
+    assert reloaded.get("create_pet") is None
+
+
+def test_run_benchmark(client):
+    """Test rounds, warmup and error accounting against the session client"""
+    calls = []
+
+    def call(petstore_client):
+        calls.append(1)
+        return petstore_client.get("/pet/9999999991" if len(calls) % 5 == 0 else "/store/inventory")
+
+    result = run_benchmark(client, "inventory", call, rounds=3, requests=10, warmup=2)
+
+    assert len(calls) == 32
+    assert len(result.rounds) == 3
+    assert result.errors == 6
+    assert result.histogram.count == 24
+    assert result.stat("rps") > 0
+
+
+def test_recording_call(client, cleanup_users):
+    """Test collecting what a write benchmark created, for deletion"""
+    call = RecordingCall(ENDPOINTS["create_user"])
+
+    run_benchmark(client, "create_user", call, rounds=2, requests=3, warmup=1)
+    usernames = call.created("username")
+    cleanup_users.extend(usernames)
+
+    assert len(set(usernames)) == 7
+    assert client.get(f"/user/{usernames[-1]}").status_code == 200
+
+
+def test_perf_suite_fails_on_regression(pytester):
+    """Test storing baselines, then failing a run on a missed SLO"""
+    pytester.makeconftest(pathlib.Path(__file__).with_name("conftest.py").read_text())
+    pytester.makepyfile(test_bench="""
+        import pytest
+
+        @pytest.mark.perf
+        @pytest.mark.slo("p50<1us")
+        def test_get_inventory(perf):
+            perf("get_inventory", rounds=2, requests=5, warmup=0)
+    """)
+    pytester.runpytest().assert_outcomes(skipped=1)
+
+    pytester.runpytest("--perf", "--perf-update", "-p", "no:cacheprovider").assert_outcomes(failed=1)
+    assert (pytester.path / "baselines" / "petstore.json").exists()
+
+    result = pytester.runpytest("--perf", "-p", "no:cacheprovider")
+    result.assert_outcomes(failed=1)
+    result.stdout.fnmatch_lines(["*PerfRegression: get_inventory: SLO p50<1us missed*"])
@@ -0,0 +1,68 @@
+"""
+Benchmarks of the Petstore endpoints the functional suites cover, run with --perf
+
+    pytest test_performance.py --perf --perf-update    # store baselines
+    pytest test_performance.py --perf                  # compare with them
+
+Benchmarks only read data they created, and write benchmarks delete what they
+create, so results do not depend on which tests ran before them.
+"""
+import pytest
+
+from petstore.factories import generate_pets
+from petstore.load import templated
+
+
+pytestmark = pytest.mark.perf
+
+# findByStatus searches a fixed set of pets with a status no other test uses
+DATASET_STATUS = "perf"
+DATASET_SIZE = 100
+
+
+@pytest.fixture
+def perf_pets(client, async_client, cleanup_pets):
+    """DATASET_SIZE pets with DATASET_STATUS, deleted after the test"""
+    pets = generate_pets(DATASET_SIZE, status=DATASET_STATUS)
+    responses = async_client.run(async_client.gather([async_client.create_pet(pet) for pet in pets]))
+    cleanup_pets.extend(pet["id"] for pet in pets)
+    assert all(response.status_code == 200 for response in responses)
+    found = client.get("/pet/findByStatus", params={"status": DATASET_STATUS}).json()
+    assert len(found) == DATASET_SIZE, f"{len(found) - DATASET_SIZE} leftover pets with status {DATASET_STATUS!r}"
+    return pets
+
+
+@pytest.mark.slo("p99<300ms")
+def test_create_pet(perf, cleanup_pets):
+    """Benchmark POST /pet"""
+    perf("create_pet", cleanup=cleanup_pets)
+
+
+@pytest.mark.slo("p99<300ms")
+def test_find_pets_by_status(perf, perf_pets):
+    """Benchmark GET /pet/findByStatus"""
+    perf("find_pets_by_status", call=templated("GET", "/pet/findByStatus", params={"status": DATASET_STATUS}))
+
+
+@pytest.mark.slo("p99<300ms")
+def test_place_order(perf, cleanup_orders):
+    """Benchmark POST /store/order"""
+    perf("place_order", cleanup=cleanup_orders)
+
+
+@pytest.mark.slo("p99<200ms")
+def test_get_inventory(perf):
+    """Benchmark GET /store/inventory"""
+    perf("get_inventory")
+
+
+@pytest.mark.slo("p99<300ms")
+def test_create_user(perf, cleanup_users):
+    """Benchmark POST /user"""
+    perf("create_user", cleanup=cleanup_users, field="username")
+
+
+@pytest.mark.slo("p99<200ms")
+def test_login(perf):
+    """Benchmark GET /user/login"""
+    perf("login")
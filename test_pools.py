@@ -0,0 +1,70 @@
+"""
+Tests for session resource pools
+"""
+import pytest
+
+from petstore.factories import generate_orders
+from petstore.pools import RESOURCE_KINDS, PoolError, ResourceKind, ResourcePool
+
+
+@pytest.fixture
+def make_pool(async_client, teardown_queue):
+    """Build pools whose resources are queued for deletion after the test"""
+    pools = []
+
+    def make(kind, **kwargs):
+        pool = ResourcePool(async_client, kind, **kwargs)
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        teardown_queue.extend(pool.paths())
+    teardown_queue.drain()
+
+
+class TestResourcePool:
+    """Tests for provisioning and handing out pooled resources"""
+
+    def test_checkout_is_exclusive(self, client, make_pool):
+        """Test that checked out pets are distinct and exist on the server"""
+        pool = make_pool("pet", batch_size=4, demand=6)
+
+        pets = [pool.checkout() for _ in range(6)]
+
+        assert len({pet["id"] for pet in pets}) == 6
+        assert pool.summary() == {"created": 6, "checked_out": 6, "shared_uses": 0, "idle": 0}
+        for pet in pets:
+            assert client.get(f"/pet/{pet['id']}").status_code == 200
+
+    def test_demand_caps_provisioning(self, make_pool):
+        """Test that no more resources than collected demand are created"""
+        pool = make_pool("user", batch_size=16, demand=2)
+
+        pool.checkout()
+
+        assert pool.summary()["created"] == 2
+        assert pool.summary()["idle"] == 1
+
+    def test_shared_resources_are_reused(self, make_pool):
+        """Test that shared checkouts reuse one server-side resource"""
+        pool = make_pool("order")
+
+        first = pool.shared()
+        first["quantity"] = 99
+        second = pool.shared()
+
+        assert second["id"] == first["id"]
+        assert second["quantity"] == 1
+        assert pool.summary()["created"] == 1
+
+    def test_failed_creation(self, make_pool):
+        """Test that rejected resources raise instead of being handed out"""
+        kind = RESOURCE_KINDS["order"]
+        invalid = ResourceKind(
+            "order", lambda count: generate_orders(count, status="invalid"), kind.create, kind.path
+        )
+        pool = make_pool(invalid)
+
+        with pytest.raises(PoolError):
+            pool.checkout()
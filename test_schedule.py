@@ -0,0 +1,65 @@
+"""
+Tests for longest-first test scheduling
+"""
+import pathlib
+
+import pytest
+
+from petstore.schedule import (
+    assign, lpt_order, makespan_bound, merge_durations, predicted_makespan, summary,
+)
+
+
+pytest_plugins = ["pytester"]
+
+
+class TestSchedule:
+    """Tests for ordering and makespan prediction"""
+
+    def test_lpt_order(self):
+        """Test longest first with unknown tests scheduled as the longest known"""
+        durations = {"a": 1.0, "b": 3.0, "c": 2.0}
+
+        assert lpt_order(["a", "b", "c", "new"], durations) == ["b", "new", "c", "a"]
+        assert lpt_order(["a", "new"], durations, default=0.0) == ["a", "new"]
+
+    def test_assign_balances_workers(self):
+        """Test that LPT reaches the lower bound when it is achievable"""
+        durations = [5, 4, 3, 3, 2, 2, 1]
+
+        assert assign(durations, 2) == [10, 10]
+        assert predicted_makespan(durations, 2) == makespan_bound(durations, 2) == 10
+
+    def test_longest_test_bounds_makespan(self):
+        """Test that one long test dominates however many workers there are"""
+        durations = [9, 1, 1, 1]
+
+        assert predicted_makespan(durations, 4) == makespan_bound(durations, 4) == 9
+        assert summary(durations, 4)["work"] == 12
+        assert predicted_makespan([], 4) == 0.0
+
+    def test_merge_durations(self):
+        """Test smoothing of stored durations and keeping tests not run"""
+        merged = merge_durations({"a": 1.0, "b": 2.0}, {"a": 3.0, "c": 0.5})
+
+        assert merged == {"a": pytest.approx(2.0), "b": 2.0, "c": 0.5}
+
+
+def test_durations_reorder_next_run(pytester):
+    """Test that a run stores durations and --schedule=lpt runs the slowest test first"""
+    pytester.makeconftest(pathlib.Path(__file__).with_name("conftest.py").read_text())
+    pytester.makepyfile(test_timed="""
+        import time
+
+        def test_fast():
+            pass
+
+        def test_slow():
+            time.sleep(0.2)
+    """)
+    pytester.runpytest().assert_outcomes(passed=2)
+
+    result = pytester.runpytest("--schedule=lpt", "-v")
+
+    result.assert_outcomes(passed=2)
+    result.stdout.fnmatch_lines(["*test_slow PASSED*", "*test_fast PASSED*"])
@@ -0,0 +1,164 @@
+"""
+Tests for the local Petstore storage
+Covers secondary indexes used by findByStatus, findByTags and inventory, and
+malformed requests that must be rejected without touching them
+"""
+import json
+import socket
+
+import pytest
+
+from petstore.app import PetstoreApp
+from petstore.server import PetstoreServer
+from petstore.storage import PetstoreStorage, encode_json
+
+
+def make_pet(pet_id, status="available", tags=("tag1",)):
+    """Generate a stored pet document"""
+    return {
+        "id": pet_id,
+        "name": f"Pet_{pet_id}",
+        "photoUrls": [],
+        "tags": [{"id": index, "name": name} for index, name in enumerate(tags)],
+        "status": status
+    }
+
+
+def decode(encoded_pets):
+    """Decode pets returned by index lookups"""
+    return [json.loads(pet) for pet in encoded_pets]
+
+
+class TestStorageIndexes:
+    """Tests for status and tag indexes"""
+
+    def test_find_by_status_follows_updates(self):
+        """Test that status changes move a pet between index entries"""
+        storage = PetstoreStorage()
+        storage.put_pet(make_pet(1, status="available"))
+        storage.put_pet(make_pet(1, status="sold"))
+
+        assert storage.find_pets_by_status(["available"]) == []
+        assert [pet["id"] for pet in decode(storage.find_pets_by_status(["sold"]))] == [1]
+
+    def test_find_by_multiple_statuses_has_no_duplicates(self):
+        """Test lookups over several statuses"""
+        storage = PetstoreStorage()
+        storage.put_pet(make_pet(1, status="available"))
+        storage.put_pet(make_pet(2, status="pending"))
+        storage.put_pet(make_pet(3, status="sold"))
+
+        pets = decode(storage.find_pets_by_status(["available", "pending", "available"]))
+        assert [pet["id"] for pet in pets] == [1, 2]
+
+    def test_find_by_tags(self):
+        """Test that any matching tag selects a pet once"""
+        storage = PetstoreStorage()
+        storage.put_pet(make_pet(1, tags=("tag1", "tag2")))
+        storage.put_pet(make_pet(2, tags=("tag2",)))
+        storage.put_pet(make_pet(3, tags=()))
+
+        pets = decode(storage.find_pets_by_tags(["tag1", "tag2"]))
+        assert sorted(pet["id"] for pet in pets) == [1, 2]
+
+    def test_delete_removes_from_indexes(self):
+        """Test that deleted pets disappear from lookups and inventory"""
+        storage = PetstoreStorage()
+        storage.put_pet(make_pet(1, status="pending"))
+
+        assert storage.delete_pet(1) is True
+        assert storage.delete_pet(1) is False
+        assert storage.find_pets_by_tags(["tag1"]) == []
+        assert storage.inventory() == {}
+
+    def test_inventory_counts_statuses(self):
+        """Test inventory counts per status"""
+        storage = PetstoreStorage()
+        for pet_id, status in enumerate(["available", "available", "sold"], start=1):
+            storage.put_pet(make_pet(pet_id, status=status))
+        storage.update_pet(3, status="pending")
+
+        assert storage.inventory() == {"available": 2, "pending": 1}
+
+    def test_auto_ids_skip_client_ids(self):
+        """Test that generated IDs never replace a pet created with an explicit ID"""
+        storage = PetstoreStorage()
+        storage.put_pet(make_pet(2, status="sold"))
+
+        created = [storage.put_pet(make_pet(0))["id"] for _ in range(2)]
+
+        assert created == [1, 3]
+        assert storage.get_pet(2)["status"] == "sold"
+
+    def test_unhashable_pet_leaves_no_trace(self):
+        """Test that a pet failing to index is not stored, so later writes still work"""
+        storage = PetstoreStorage()
+
+        with pytest.raises(TypeError):
+            storage.put_pet(dict(make_pet(1), status=["a"]))
+        with pytest.raises(TypeError):
+            storage.put_pet(dict(make_pet(1), tags=[{"name": ["tag"]}]))
+
+        assert storage.get_pet(1) is None
+        assert storage.put_pet(make_pet(0))["id"] == 1
+        assert storage.inventory() == {"available": 1}
+
+
+class TestMalformedRequests:
+    """Tests for error responses to bodies of the wrong shape"""
+
+    @pytest.mark.parametrize("method, path, body, status", [
+        ("POST", "/pet", {"name": "a", "status": ["a"]}, 405),
+        ("PUT", "/pet", {"name": "a", "tags": [{"name": ["tag"]}]}, 405),
+        ("POST", "/pet", {"id": [1], "name": "a"}, 405),
+        ("POST", "/pet", {"name": "a", "tags": "tag"}, 405),
+        ("POST", "/user", {"username": ["alice"]}, 400),
+        ("POST", "/user/createWithList", [{"username": "bob"}, {"username": {"a": 1}}], 400),
+        ("PUT", "/user/alice", {"username": 7}, 400),
+        ("POST", "/store/order", {"id": [1], "petId": 1}, 400),
+    ])
+    def test_wrong_field_types(self, method, path, body, status):
+        """Test that bodies with unusable field types are rejected and nothing is stored"""
+        app = PetstoreApp()
+
+        assert app.handle(method, path, body=encode_json(body))[0] == status
+        assert app.storage.pet_count() == 0
+        assert app.handle("POST", "/pet", body=encode_json({"name": "a", "status": "sold"}))[0] == 200
+        assert app.handle("GET", "/store/inventory")[2] == b'{"sold":1}'
+
+    def test_form_body_not_utf8(self):
+        """Test that a form body in another charset is rejected"""
+        app = PetstoreApp()
+        app.handle("POST", "/pet", body=encode_json({"id": 5, "name": "a"}))
+
+        status, _, _ = app.handle(
+            "POST", "/pet/5", headers={"Content-Type": "application/x-www-form-urlencoded"}, body=b"name=\xff"
+        )
+
+        assert status == 405
+        assert app.storage.get_pet(5)["name"] == "a"
+
+    def test_handler_errors_become_500(self, monkeypatch):
+        """Test that an unexpected handler error is answered instead of raised"""
+        app = PetstoreApp()
+        monkeypatch.setattr(app.storage, "inventory", lambda: 1 / 0)
+
+        status, _, payload = app.handle("GET", "/store/inventory")
+
+        assert status == 500
+        assert json.loads(payload)["code"] == 500
+
+    def test_server_answers_malformed_framing(self):
+        """Test that the HTTP server responds 500 and closes on an unreadable chunked body"""
+        with PetstoreServer() as server:
+            host, port = server._httpd.server_address[:2]
+            with socket.create_connection((host, port), timeout=5) as connection:
+                connection.sendall(
+                    b"POST /v2/pet HTTP/1.1\r\nHost: x\r\nTransfer-Encoding: chunked\r\n\r\nnot-hex\r\n"
+                )
+                response = b""
+                while chunk := connection.recv(4096):
+                    response += chunk
+
+        assert response.startswith(b"HTTP/1.1 500 ")
+        assert response.endswith(b'"message":"something bad happened"}')
@@ -0,0 +1,62 @@
+"""
+Tests for incremental JSON array parsing
+"""
+import json
+
+import pytest
+
+from petstore.factories import generate_pet_data
+from petstore.streaming import iter_json_array
+
+
+def split(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestIterJsonArray:
+    """Tests for parsing arrays split across chunks"""
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 4096])
+    def test_any_chunk_size(self, size):
+        """Test that chunk boundaries never change the parsed items"""
+        items = [generate_pet_data(name="Ünïcode 🐕"), -1.5e3, 10, "a,]", None, [], {"k": [1, 2]}]
+        body = json.dumps(items, ensure_ascii=False).encode("utf-8")
+
+        assert list(iter_json_array(split(body, size))) == items
+
+    def test_empty_array(self):
+        """Test an empty array with surrounding whitespace"""
+        assert list(iter_json_array([b" [ ", b" ] \n"])) == []
+
+    def test_items_yielded_before_end(self):
+        """Test that items are produced before the last chunk arrives"""
+        def chunks():
+            yield b'[{"id": 1}, {"id": 2},'
+            raise AssertionError("read past the first complete items")
+
+        items = iter_json_array(chunks())
+
+        assert next(items) == {"id": 1}
+        assert next(items) == {"id": 2}
+
+    @pytest.mark.parametrize("body", [b"", b"{}", b"[1", b"[1,]", b"[1 2]", b"[,1]"])
+    def test_malformed(self, body):
+        """Test rejecting bodies that are not a complete JSON array"""
+        with pytest.raises(ValueError):
+            list(iter_json_array(split(body, 1)))
+
+
+class TestStreamArray:
+    """Tests for the client's streaming mode"""
+
+    def test_stream_find_by_status(self, client, headers, cleanup_pets):
+        """Test streaming findByStatus with a small chunk size"""
+        pet_data = generate_pet_data(status="pending")
+        client.post("/pet", headers=headers, json=pet_data)
+        cleanup_pets.append(pet_data["id"])
+
+        with client.stream_array("/pet/findByStatus", chunk_size=16, params={"status": "pending"}) as pets:
+            assert pets.status_code == 200
+            ids = [pet["id"] for pet in pets]
+
+        assert pet_data["id"] in ids
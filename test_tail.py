@@ -0,0 +1,164 @@
+"""
+Tests for adaptive timeouts and hedged requests
+"""
+import threading
+import time
+
+import pytest
+
+from petstore.client import PetstoreClient
+from petstore.metrics import Metrics
+from petstore.server import PetstoreServer
+from petstore.tail import AdaptiveTimeout, EndpointLatency, Hedge
+
+
+class FakeResponse:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ScriptedSend:
+    """Callable returning responses after per-call delays, or raising"""
+
+    def __init__(self, *delays):
+        self.delays = list(delays)
+        self.calls = 0
+        self.responses = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+        delay = self.delays[index]
+        if isinstance(delay, Exception):
+            raise delay
+        time.sleep(delay)
+        response = FakeResponse(index)
+        self.responses.append(response)
+        return response
+
+
+@pytest.fixture
+def hedge():
+    hedge = Hedge(delay=0.02, budget=1.0)
+    yield hedge
+    hedge.close()
+
+
+class TestAdaptiveTimeout:
+    """Tests for per-endpoint timeouts learned from latency"""
+
+    def test_default_until_enough_samples(self):
+        """Test the default read timeout before min_samples requests"""
+        timeouts = AdaptiveTimeout(default=10, connect=2, min_samples=5)
+        for _ in range(4):
+            timeouts.latency.record("GET /pet/{petId}", 0.5)
+
+        assert timeouts("GET /pet/{petId}") == (2, 10)
+
+    def test_timeout_follows_p99(self):
+        """Test that the read timeout is a clamped multiple of p99"""
+        timeouts = AdaptiveTimeout(multiplier=3, minimum=1, maximum=30, min_samples=10)
+        for _ in range(100):
+            timeouts.latency.record("GET /slow", 2.0)
+            timeouts.latency.record("GET /fast", 0.01)
+            timeouts.latency.record("GET /stalled", 60.0)
+
+        assert timeouts.read_timeout("GET /slow") == pytest.approx(6.0, rel=0.01)
+        assert timeouts.read_timeout("GET /fast") == 1
+        assert timeouts.read_timeout("GET /stalled") == 30
+
+    def test_percentiles_are_cached(self):
+        """Test that percentiles refresh only every refresh_every samples"""
+        latency = EndpointLatency(refresh_every=10)
+        for _ in range(20):
+            latency.record("GET /pet", 0.1)
+        assert latency.percentile("GET /pet", 99) == pytest.approx(0.1, rel=0.01)
+
+        for _ in range(9):
+            latency.record("GET /pet", 5.0)
+        assert latency.percentile("GET /pet", 99) == pytest.approx(0.1, rel=0.01)
+        latency.record("GET /pet", 5.0)
+        assert latency.percentile("GET /pet", 99) == pytest.approx(5.0, rel=0.01)
+
+
+class TestHedge:
+    """Tests for hedged duplicates"""
+
+    def test_fast_request_is_not_hedged(self, hedge):
+        """Test that no duplicate is sent below the delay"""
+        send = ScriptedSend(0)
+
+        assert hedge.send("GET /pet", send).name == 0
+        assert send.calls == 1
+        assert hedge.stats()["hedged"] == 0
+
+    def test_backup_wins_and_loser_is_closed(self, hedge):
+        """Test that the faster duplicate is returned and the slow response closed"""
+        send = ScriptedSend(0.3, 0)
+        fired = []
+
+        response = hedge.send("GET /pet", send, on_fire=fired.append)
+
+        assert response.name == 1
+        assert fired == ["hedged", "hedge_won"]
+        time.sleep(0.4)
+        assert send.responses[1].closed
+        assert hedge.stats() == {"requests": 1, "hedged": 1, "won": 1, "hedge_ratio": 1.0}
+
+    def test_error_waits_for_other_request(self, hedge):
+        """Test that a failing request does not win over a pending one"""
+        send = ScriptedSend(0.05, ConnectionError("reset"))
+
+        assert hedge.send("GET /pet", send).name == 0
+
+    def test_budget_limits_hedging(self):
+        """Test that at most budget of requests are duplicated"""
+        hedge = Hedge(delay=0, budget=0.25)
+        try:
+            sends = [ScriptedSend(0.01, 0.01) for _ in range(8)]
+            for send in sends:
+                hedge.send("GET /pet", send)
+        finally:
+            hedge.close()
+
+        assert hedge.stats()["hedged"] == 2
+        assert sum(send.calls for send in sends) == 10
+
+    def test_learned_delay(self):
+        """Test that hedging starts only after enough samples"""
+        hedge = Hedge(percentile=95, min_samples=3)
+        try:
+            assert hedge.delay_for("GET /pet") is None
+            for seconds in (0.01, 0.02, 0.03):
+                hedge.latency.record("GET /pet", seconds)
+            assert hedge.delay_for("GET /pet") == pytest.approx(0.03, rel=0.01)
+        finally:
+            hedge.close()
+
+
+class TestClientPolicies:
+    """Tests for timeouts and hedging wired into PetstoreClient"""
+
+    def test_client_learns_and_counts_hedges(self):
+        """Test per-endpoint timeouts and hedge counters in metrics"""
+        metrics = Metrics()
+        timeouts = AdaptiveTimeout(min_samples=3, minimum=0.5)
+        hedge = Hedge(timeouts.latency, delay=0, budget=1.0)
+        with PetstoreServer() as server, \
+                PetstoreClient(server.url, timeout=timeouts, hedge=hedge, metrics=metrics) as petstore_client:
+            for _ in range(3):
+                assert petstore_client.get("/store/inventory").status_code == 200
+            petstore_client.post("/user/createWithList", json=[])
+        hedge.close()
+
+        assert timeouts("GET /store/inventory") == (timeouts.connect, 0.5)
+        assert timeouts.latency.count("GET /store/inventory") == 6
+        assert metrics.counters()["GET /store/inventory"]["hedged"] == 3
+        assert "POST /user/createWithList" not in metrics.counters()
+        assert "<th>hedged</th>" in metrics.to_html()
@@ -0,0 +1,41 @@
+"""
+Tests for the batched teardown queue
+"""
+from petstore.factories import generate_pet_data
+from petstore.teardown import TeardownQueue
+
+
+class TestTeardownQueue:
+    """Tests for draining queued deletions"""
+
+    def test_drain_deletes_queued_resources(self, client, async_client):
+        """Test that queued resources are deleted concurrently"""
+        pets = [generate_pet_data() for _ in range(10)]
+        for pet in pets:
+            assert client.post("/pet", json=pet).status_code == 200
+
+        queue = TeardownQueue(async_client)
+        queue.extend(f"/pet/{pet['id']}" for pet in pets)
+        assert queue.pending() == 10
+
+        assert queue.drain() == []
+        assert queue.summary() == {"deleted": 10, "missing": 0, "failed": 0, "pending": 0}
+        for pet in pets:
+            assert client.get(f"/pet/{pet['id']}").status_code == 404
+
+    def test_failures_are_reported(self, async_client):
+        """Test that failed deletions are recorded instead of swallowed"""
+        queue = TeardownQueue(async_client)
+        queue.add("/pet/9999999991")
+        queue.add("/store/inventory")
+
+        failures = queue.drain()
+
+        assert [path for path, _ in failures] == ["/store/inventory"]
+        assert failures[0][1].startswith("HTTP 405")
+        assert queue.summary()["missing"] == 1
+        assert queue.failures == failures
+
+    def test_drain_without_pending_is_noop(self, async_client):
+        """Test draining an empty queue"""
+        assert TeardownQueue(async_client).drain() == []
@@ -0,0 +1,100 @@
+"""
+Tests for prepared request templates
+"""
+import json
+
+import pytest
+
+from petstore.cache import ResponseCache
+from petstore.client import PetstoreClient
+from petstore.factories import generate_pet_data, generate_pets
+from petstore.metrics import Metrics
+from petstore.server import PetstoreServer
+from petstore.storage import encode_json
+from petstore.templates import BodyStream
+
+
+@pytest.fixture(scope="module")
+def server_url():
+    """Local server URL, templates are sent through real sockets"""
+    with PetstoreServer() as server:
+        yield server.url
+
+
+class TestRequestTemplate:
+    """Tests for preparing once and sending many times"""
+
+    def test_prepare_fills_path_and_body(self):
+        """Test URL, headers and body of a prepared template request"""
+        petstore_client = PetstoreClient("http://example.com/v2", headers={"api_key": "special-key"})
+        template = petstore_client.template("PUT", "/user/{username}", params={"x": "1"})
+
+        prepared, path = template.prepare(b'{"a":1}', username="a b/c")
+
+        assert path == "/user/a%20b%2Fc"
+        assert prepared.url == "http://example.com/v2/user/a%20b%2Fc?x=1"
+        assert prepared.body == b'{"a":1}'
+        assert prepared.headers["Content-Length"] == "7"
+        assert prepared.headers["Content-Type"] == "application/json"
+        assert prepared.headers["api_key"] == "special-key"
+        assert "Content-Type" not in petstore_client.template("GET", "/pet/{petId}").prepare(petId=1)[0].headers
+
+    def test_round_trip(self, server_url):
+        """Test creating and reading a pet through templates, recorded per endpoint"""
+        metrics = Metrics()
+        pet_data = generate_pet_data()
+        with PetstoreClient(server_url, metrics=metrics) as petstore_client:
+            create_pet = petstore_client.template("POST", "/pet")
+            get_pet = petstore_client.template("GET", "/pet/{petId}")
+
+            assert create_pet.send(encode_json(pet_data)).status_code == 200
+            response = get_pet.send(petId=pet_data["id"])
+            petstore_client.delete(f"/pet/{pet_data['id']}")
+
+        assert response.status_code == 200
+        assert response.json() == pet_data
+        assert {"POST /pet", "GET /pet/{petId}"} <= set(metrics.endpoints())
+
+    def test_writes_invalidate_cache(self, server_url):
+        """Test that a template write drops cached reads of the same resource"""
+        pet_data = generate_pet_data()
+        with PetstoreClient(server_url, cache=ResponseCache()) as petstore_client:
+            petstore_client.post("/pet", json=pet_data)
+            assert petstore_client.get(f"/pet/{pet_data['id']}").json()["name"] == pet_data["name"]
+
+            update = petstore_client.template("PUT", "/pet")
+            update.send(encode_json(dict(pet_data, name="Renamed")))
+
+            assert petstore_client.get(f"/pet/{pet_data['id']}").json()["name"] == "Renamed"
+            petstore_client.delete(f"/pet/{pet_data['id']}")
+
+    def test_gets_are_cached(self, server_url):
+        """Test that template GETs are served from the cache until a write to the resource"""
+        pet_data = generate_pet_data()
+        with PetstoreClient(server_url, cache=ResponseCache()) as petstore_client:
+            petstore_client.post("/pet", json=pet_data)
+            get_pet = petstore_client.template("GET", "/pet/{petId}")
+
+            first = get_pet.send(petId=pet_data["id"])
+            assert get_pet.send(petId=pet_data["id"]) is first
+            petstore_client.template("PUT", "/pet").send(encode_json(dict(pet_data, name="Renamed")))
+            assert get_pet.send(petId=pet_data["id"]).json()["name"] == "Renamed"
+
+            stats = petstore_client.cache.stats()
+            assert (stats["hits"], stats["misses"]) == (1, 2)
+            petstore_client.delete(f"/pet/{pet_data['id']}")
+
+
+def test_body_stream_refills_in_batches():
+    """Test that bodies are pre-serialized in batches and handed out once each"""
+    calls = []
+
+    def generate(count, output):
+        calls.append(count)
+        return generate_pets(count, output=output)
+
+    bodies = BodyStream(generate, batch_size=4)
+    pets = [json.loads(bodies()) for _ in range(6)]
+
+    assert calls == [4, 4]
+    assert len({pet["id"] for pet in pets}) == 6
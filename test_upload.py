@@ -0,0 +1,112 @@
+"""
+Tests for streaming multipart uploads
+"""
+import mmap
+import os
+
+import pytest
+
+from petstore import upload
+from petstore.app import _parse_multipart
+from petstore.factories import generate_pets
+from petstore.upload import MultipartFile, upload_images
+
+WOLF_IMAGE = os.path.join(os.path.dirname(__file__), "wolf.jpg")
+
+
+def parse(body):
+    payload = b"".join(bytes(chunk) for chunk in body)
+    return payload, _parse_multipart({"headers": {"content-type": body.content_type}, "body": payload})
+
+
+class TestMultipartFile:
+    """Tests for the mmap-backed multipart body"""
+
+    def test_body_is_valid_multipart(self):
+        """Test that the streamed body parses and its length matches len()"""
+        with MultipartFile(WOLF_IMAGE, fields={"additionalMetadata": "wolf"}, chunk_size=4096) as body:
+            payload, (fields, files) = parse(body)
+
+            assert len(payload) == len(body)
+            assert fields == {"additionalMetadata": "wolf"}
+            assert files == [("wolf.jpg", os.path.getsize(WOLF_IMAGE))]
+            assert b"Content-Type: image/jpeg" in payload
+
+    def test_file_is_streamed_in_slices(self):
+        """Test that file contents are yielded as memoryview slices of chunk_size"""
+        with MultipartFile(WOLF_IMAGE, chunk_size=64 * 1024) as body:
+            chunks = list(body)[1:-1]
+
+            assert all(isinstance(chunk, memoryview) for chunk in chunks)
+            assert len(chunks) == -(-body.size // (64 * 1024))
+
+    def test_body_can_be_iterated_again(self):
+        """Test re-iteration, e.g. for a retried request"""
+        with MultipartFile(WOLF_IMAGE) as body:
+            first = b"".join(bytes(chunk) for chunk in body)
+
+            assert b"".join(bytes(chunk) for chunk in body) == first
+        with open(WOLF_IMAGE, "rb") as image:
+            assert image.read() in first
+
+    def test_empty_file(self, tmp_path):
+        """Test uploading a file that cannot be memory-mapped"""
+        empty = tmp_path / "empty.bin"
+        empty.write_bytes(b"")
+
+        with MultipartFile(str(empty)) as body:
+            _, (_, files) = parse(body)
+
+        assert files == [("empty.bin", 0)]
+
+    def test_header_params_are_escaped(self):
+        """Test that quotes and line breaks in names cannot break out of the part headers"""
+        with MultipartFile(WOLF_IMAGE, field='fi"le', filename='wolf"\r\nX-Evil: 1.jpg',
+                           fields={'meta"\n': "wolf"}) as body:
+            payload, (fields, files) = parse(body)
+
+        assert fields == {"meta%22%0A": "wolf"}
+        assert files == [("wolf%22%0D%0AX-Evil: 1.jpg", os.path.getsize(WOLF_IMAGE))]
+        assert b'name="fi%22le"; filename="wolf%22%0D%0AX-Evil: 1.jpg"\r\n' in payload
+
+    def test_file_is_closed_when_mmap_fails(self, monkeypatch):
+        """Test that a file which cannot be mapped is not left open"""
+        opened = []
+
+        def recording_open(*args, **kwargs):
+            opened.append(open(*args, **kwargs))
+            return opened[-1]
+
+        def failing_mmap(*args, **kwargs):
+            raise OSError("cannot map")
+
+        monkeypatch.setattr(upload, "open", recording_open, raising=False)
+        monkeypatch.setattr(mmap, "mmap", failing_mmap)
+
+        with pytest.raises(OSError, match="cannot map"):
+            MultipartFile(WOLF_IMAGE)
+        assert opened[0].closed
+
+
+class TestUploadImages:
+    """Tests for concurrent uploads"""
+
+    def test_many_pets(self, async_client, cleanup_pets):
+        """Test uploading to several pets concurrently and reporting throughput"""
+        pets = generate_pets(4)
+        async_client.run(async_client.gather([async_client.create_pet(pet) for pet in pets]))
+        cleanup_pets.extend(pet["id"] for pet in pets)
+
+        report = upload_images(async_client, ((pet["id"], WOLF_IMAGE) for pet in pets for _ in range(3)), concurrency=4)
+
+        assert report.failures == []
+        assert report.files == 12
+        assert report.bytes == 12 * os.path.getsize(WOLF_IMAGE)
+        assert report.megabytes_per_second > 0
+
+    def test_missing_pet_is_reported(self, async_client):
+        """Test that failed uploads are collected"""
+        report = upload_images(async_client, [(9999999993, WOLF_IMAGE)])
+
+        assert report.files == 0
+        assert report.failures[0][1].startswith("HTTP 404")
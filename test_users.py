@@ -2,48 +2,21 @@
 Tests for User API endpoints
 Covers CRUD operations for users
 """
-import requests
-import pytest
-import json
-import random
-import string
-
-
-def generate_username(length=8):
-    """Generate a unique username"""
-    letters = string.ascii_lowercase
-    numbers = string.digits
-    return ''.join(random.choice(letters + numbers) for _ in range(length))
-
-
-def generate_user_data(username=None, user_id=None):
-    """Generate data for creating a user"""
-    if username is None:
-        username = f"testuser_{generate_username()}"
-    if user_id is None:
-        user_id = random.randint(1, 999999)
-    
-    return {
-        "id": user_id,
-        "username": username,
-        "firstName": "John",
-        "lastName": "Doe",
-        "email": f"{username}@example.com",
-        "password": "SecurePassword123!",
-        "phone": "+1-555-123-4567",
-        "userStatus": 1
-    }
+from petstore import ids
+from petstore.bulk import BulkImporter
+from petstore.factories import generate_user_data, generate_username, generate_users
+from petstore.models import ApiResponse, User
 
 
 class TestUserCreation:
     """Tests for creating users"""
     
-    def test_create_user_success(self, base_url, headers, cleanup_users):
+    def test_create_user_success(self, client, headers, cleanup_users):
         """Test successful user creation"""
         user_data = generate_user_data()
         
-        response = requests.post(
-            f"{base_url}/user",
+        response = client.post(
+            "/user",
             headers=headers,
             json=user_data
         )
@@ -52,25 +25,25 @@ class TestUserCreation:
         cleanup_users.append(user_data["username"])
         
         # Verify that the user is created
-        get_response = requests.get(
-            f"{base_url}/user/{user_data['username']}",
+        get_response = client.get(
+            f"/user/{user_data['username']}",
             headers=headers
         )
         assert get_response.status_code == 200
-        created_user = get_response.json()
-        assert created_user["username"] == user_data["username"]
-        assert created_user["email"] == user_data["email"]
+        created_user = User.model_validate_json(get_response.content)
+        assert created_user.username == user_data["username"]
+        assert created_user.email == user_data["email"]
     
-    def test_create_user_with_minimal_data(self, base_url, headers, cleanup_users):
+    def test_create_user_with_minimal_data(self, client, headers, cleanup_users):
         """Test creating a user with minimal data"""
         minimal_user = {
-            "id": random.randint(1, 999999),
+            "id": ids.next_id("user"),
             "username": f"minimal_{generate_username()}",
             "email": f"minimal_{generate_username()}@example.com"
         }
         
-        response = requests.post(
-            f"{base_url}/user",
+        response = client.post(
+            "/user",
             headers=headers,
             json=minimal_user
         )
@@ -78,7 +51,7 @@ class TestUserCreation:
         assert response.status_code == 200
         cleanup_users.append(minimal_user["username"])
     
-    def test_create_users_with_list(self, base_url, headers, cleanup_users):
+    def test_create_users_with_list(self, client, async_client, headers, cleanup_users):
         """Test creating multiple users via list"""
         users = [
             generate_user_data(username=f"listuser1_{generate_username()}"),
@@ -86,8 +59,8 @@ class TestUserCreation:
             generate_user_data(username=f"listuser3_{generate_username()}")
         ]
         
-        response = requests.post(
-            f"{base_url}/user/createWithList",
+        response = client.post(
+            "/user/createWithList",
             headers=headers,
             json=users
         )
@@ -98,23 +71,35 @@ class TestUserCreation:
         for user in users:
             cleanup_users.append(user["username"])
         
-        # Verify that users are created
-        for user in users:
-            get_response = requests.get(
-                f"{base_url}/user/{user['username']}",
-                headers=headers
-            )
+        # Verify that users are created, reads run concurrently
+        get_responses = async_client.run(async_client.map(
+            "GET",
+            [f"/user/{user['username']}" for user in users],
+            headers=headers
+        ))
+        for get_response in get_responses:
             assert get_response.status_code == 200
     
-    def test_create_users_with_array(self, base_url, headers, cleanup_users):
+    def test_bulk_import_users(self, async_client, cleanup_users):
+        """Test importing users in concurrent batches and reading them back"""
+        importer = BulkImporter(async_client, batch_size=25, in_flight=4, endpoint="/user/createWithArray")
+
+        report = importer.run(generate_users(120))
+        cleanup_users.extend(report.created)
+
+        assert report.failures == []
+        assert report.verify_failures == []
+        assert report.verified == 120
+    
+    def test_create_users_with_array(self, client, headers, cleanup_users):
         """Test creating multiple users via array"""
         users = [
             generate_user_data(username=f"arrayuser1_{generate_username()}"),
             generate_user_data(username=f"arrayuser2_{generate_username()}")
         ]
         
-        response = requests.post(
-            f"{base_url}/user/createWithArray",
+        response = client.post(
+            "/user/createWithArray",
             headers=headers,
             json=users
         )
@@ -129,36 +114,28 @@ class TestUserCreation:
 class TestUserRetrieval:
     """Tests for retrieving user information"""
     
-    def test_get_user_by_username_success(self, base_url, headers, cleanup_users):
+    def test_get_user_by_username_success(self, client, headers, shared_user):
         """Test successful user retrieval by username"""
-        # Create a user
-        user_data = generate_user_data()
-        create_response = requests.post(
-            f"{base_url}/user",
-            headers=headers,
-            json=user_data
-        )
-        assert create_response.status_code == 200
-        cleanup_users.append(user_data["username"])
+        user_data = shared_user
         
         # Get the user
-        response = requests.get(
-            f"{base_url}/user/{user_data['username']}",
+        response = client.get(
+            f"/user/{user_data['username']}",
             headers=headers
         )
         
         assert response.status_code == 200
-        response_data = response.json()
-        assert response_data["username"] == user_data["username"]
-        assert response_data["email"] == user_data["email"]
-        assert response_data["firstName"] == user_data["firstName"]
+        user = User.model_validate_json(response.content)
+        assert user.username == user_data["username"]
+        assert user.email == user_data["email"]
+        assert user.first_name == user_data["firstName"]
     
-    def test_get_user_by_username_not_found(self, base_url, headers):
+    def test_get_user_by_username_not_found(self, client, headers):
         """Test retrieving a non-existent user"""
         nonexistent_username = f"nonexistent_{generate_username()}"
         
-        response = requests.get(
-            f"{base_url}/user/{nonexistent_username}",
+        response = client.get(
+            f"/user/{nonexistent_username}",
             headers=headers
         )
         
@@ -168,25 +145,17 @@ class TestUserRetrieval:
 class TestUserUpdate:
     """Tests for updating users"""
     
-    def test_update_user_success(self, base_url, headers, cleanup_users):
+    def test_update_user_success(self, client, headers, fresh_user):
         """Test successful user update"""
-        # Create a user
-        user_data = generate_user_data()
-        create_response = requests.post(
-            f"{base_url}/user",
-            headers=headers,
-            json=user_data
-        )
-        assert create_response.status_code == 200
-        cleanup_users.append(user_data["username"])
+        user_data = fresh_user
         
         # Update the user
         user_data["firstName"] = "Jane"
         user_data["lastName"] = "Smith"
         user_data["email"] = "jane.smith@example.com"
         
-        update_response = requests.put(
-            f"{base_url}/user/{user_data['username']}",
+        update_response = client.put(
+            f"/user/{user_data['username']}",
             headers=headers,
             json=user_data
         )
@@ -194,21 +163,21 @@ class TestUserUpdate:
         assert update_response.status_code == 200
         
         # Verify the update
-        get_response = requests.get(
-            f"{base_url}/user/{user_data['username']}",
+        get_response = client.get(
+            f"/user/{user_data['username']}",
             headers=headers
         )
         assert get_response.status_code == 200
-        updated_user = get_response.json()
-        assert updated_user["firstName"] == "Jane"
-        assert updated_user["lastName"] == "Smith"
+        updated_user = User.model_validate_json(get_response.content)
+        assert updated_user.first_name == "Jane"
+        assert updated_user.last_name == "Smith"
     
-    def test_update_nonexistent_user(self, base_url, headers):
+    def test_update_nonexistent_user(self, client, headers):
         """Test updating a non-existent user"""
         nonexistent_user = generate_user_data(username=f"nonexistent_{generate_username()}")
         
-        response = requests.put(
-            f"{base_url}/user/{nonexistent_user['username']}",
+        response = client.put(
+            f"/user/{nonexistent_user['username']}",
             headers=headers,
             json=nonexistent_user
         )
@@ -220,38 +189,31 @@ class TestUserUpdate:
 class TestUserDeletion:
     """Tests for deleting users"""
     
-    def test_delete_user_success(self, base_url, headers):
+    def test_delete_user_success(self, client, headers, fresh_user):
         """Test successful user deletion"""
-        # Create a user
-        user_data = generate_user_data()
-        create_response = requests.post(
-            f"{base_url}/user",
-            headers=headers,
-            json=user_data
-        )
-        assert create_response.status_code == 200
+        user_data = fresh_user
         
         # Delete the user
-        delete_response = requests.delete(
-            f"{base_url}/user/{user_data['username']}",
+        delete_response = client.delete(
+            f"/user/{user_data['username']}",
             headers=headers
         )
         
         assert delete_response.status_code == 200
         
         # Verify that the user is deleted
-        get_response = requests.get(
-            f"{base_url}/user/{user_data['username']}",
+        get_response = client.get(
+            f"/user/{user_data['username']}",
             headers=headers
         )
         assert get_response.status_code == 404
     
-    def test_delete_nonexistent_user(self, base_url, headers):
+    def test_delete_nonexistent_user(self, client, headers):
         """Test deleting a non-existent user"""
         nonexistent_username = f"nonexistent_{generate_username()}"
         
-        response = requests.delete(
-            f"{base_url}/user/{nonexistent_username}",
+        response = client.delete(
+            f"/user/{nonexistent_username}",
             headers=headers
         )
         
@@ -261,17 +223,9 @@ class TestUserDeletion:
 class TestUserLogin:
     """Tests for user login"""
     
-    def test_user_login_success(self, base_url, headers, cleanup_users):
+    def test_user_login_success(self, client, headers, shared_user):
         """Test successful user login"""
-        # Create a user
-        user_data = generate_user_data()
-        create_response = requests.post(
-            f"{base_url}/user",
-            headers=headers,
-            json=user_data
-        )
-        assert create_response.status_code == 200
-        cleanup_users.append(user_data["username"])
+        user_data = shared_user
         
         # Perform login
         params = {
@@ -279,26 +233,26 @@ class TestUserLogin:
             "password": user_data["password"]
         }
         
-        response = requests.get(
-            f"{base_url}/user/login",
+        response = client.get(
+            "/user/login",
             headers=headers,
             params=params
         )
         
         assert response.status_code == 200
-        response_data = response.json()
+        login_response = ApiResponse.model_validate_json(response.content)
         # API returns a message about successful login
-        assert "message" in response_data or "logged in" in str(response_data).lower()
+        assert "logged in" in login_response.message.lower()
     
-    def test_user_login_invalid_credentials(self, base_url, headers):
+    def test_user_login_invalid_credentials(self, client, headers):
         """Test login with invalid credentials"""
         params = {
             "username": f"invalid_{generate_username()}",
             "password": "wrongpassword"
         }
         
-        response = requests.get(
-            f"{base_url}/user/login",
+        response = client.get(
+            "/user/login",
             headers=headers,
             params=params
         )
@@ -306,10 +260,10 @@ class TestUserLogin:
         # API may return 200 with error message or 400
         assert response.status_code in [200, 400]
     
-    def test_user_login_missing_credentials(self, base_url, headers):
+    def test_user_login_missing_credentials(self, client, headers):
         """Test login without credentials"""
-        response = requests.get(
-            f"{base_url}/user/login",
+        response = client.get(
+            "/user/login",
             headers=headers
         )
         
@@ -320,29 +274,29 @@ class TestUserLogin:
 class TestUserLogout:
     """Tests for user logout"""
     
-    def test_user_logout_success(self, base_url, headers):
+    def test_user_logout_success(self, client, headers):
         """Test successful user logout"""
-        response = requests.get(
-            f"{base_url}/user/logout",
+        response = client.get(
+            "/user/logout",
             headers=headers
         )
         
         assert response.status_code == 200
-        response_data = response.json()
+        logout_response = ApiResponse.model_validate_json(response.content)
         # API returns a message about successful logout
-        assert "message" in response_data or "logged out" in str(response_data).lower()
+        assert logout_response.message is not None
 
 
 class TestUserNegativeCases:
     """Negative tests for User API"""
     
-    def test_create_user_with_invalid_email(self, base_url, headers, cleanup_users):
+    def test_create_user_with_invalid_email(self, client, headers, cleanup_users):
         """Test creating a user with invalid email"""
         user_data = generate_user_data()
         user_data["email"] = "invalid_email_format"
         
-        response = requests.post(
-            f"{base_url}/user",
+        response = client.post(
+            "/user",
             headers=headers,
             json=user_data
         )
@@ -352,23 +306,15 @@ class TestUserNegativeCases:
         if response.status_code == 200:
             cleanup_users.append(user_data["username"])
     
-    def test_create_user_with_duplicate_username(self, base_url, headers, cleanup_users):
+    def test_create_user_with_duplicate_username(self, client, headers, fresh_user):
         """Test creating a user with duplicate username"""
-        user_data = generate_user_data()
-        
-        # Create the first user
-        create_response = requests.post(
-            f"{base_url}/user",
-            headers=headers,
-            json=user_data
-        )
-        assert create_response.status_code == 200
-        cleanup_users.append(user_data["username"])
+        # The pooled user is the first one, the duplicate may overwrite it
+        user_data = fresh_user
         
         # Try to create a second user with the same username
         duplicate_user = generate_user_data(username=user_data["username"])
-        response = requests.post(
-            f"{base_url}/user",
+        response = client.post(
+            "/user",
             headers=headers,
             json=duplicate_user
         )
@@ -376,12 +322,12 @@ class TestUserNegativeCases:
         # API may allow or prohibit duplicates
         assert response.status_code in [200, 400, 409]
     
-    def test_get_user_with_special_characters(self, base_url, headers):
+    def test_get_user_with_special_characters(self, client, headers):
         """Test retrieving a user with special characters in username"""
         special_username = "user@#$%"
         
-        response = requests.get(
-            f"{base_url}/user/{special_username}",
+        response = client.get(
+            f"/user/{special_username}",
             headers=headers
         )
         